@@ -1,20 +1,12 @@
 import configparser
-import mysql.connector
 import csv
 import os
+import sys
 from datetime import datetime, timedelta
 
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-db = mysql.connector.connect(
-    host=config['mysql']['host'],
-    user=config['mysql']['user'],
-    password=config['mysql']['password'],
-    database=config['mysql']['database']
-)
-
-cursor = db.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from db_backend import DB_ERRORS, backend_name, connect_factory  # noqa: E402
+from migrations import migrate  # noqa: E402
 
 # -------------------------
 # Data Definition Commands
@@ -86,7 +78,10 @@ def Create_tables(cursor):
                       semester        ENUM('Spring','Summer','Fall') NOT NULL,
                       year_offered    SMALLINT NOT NULL,
                       num_enrollments INT NOT NULL DEFAULT 0,
+                      term_key        INT AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) STORED,
                       PRIMARY KEY (course_code, section_num, semester, year_offered),
+                      KEY idx_section_course_term (course_code, term_key),
+                      KEY idx_section_term (term_key),
                       CONSTRAINT fk_section_course FOREIGN KEY (course_code)
                         REFERENCES Course(course_code)
                         ON DELETE CASCADE ON UPDATE CASCADE
@@ -101,7 +96,10 @@ def Create_tables(cursor):
                               semester        ENUM('Spring','Summer','Fall') NOT NULL,
                               year_offered    SMALLINT NOT NULL,
                               instructor_id   VARCHAR(10) NOT NULL,
+                              -- VIRTUAL: the term columns are cascaded from Section, which STORED columns do not allow
+                              term_key        INT AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) VIRTUAL,
                               PRIMARY KEY (course_code, section_num, semester, year_offered),
+                              KEY idx_teaches_instructor_term (instructor_id, term_key),
                               CONSTRAINT fk_teaches_section FOREIGN KEY (course_code, section_num, semester, year_offered)
                                 REFERENCES Section(course_code, section_num, semester, year_offered)
                                 ON DELETE CASCADE ON UPDATE CASCADE,
@@ -146,6 +144,7 @@ def Create_tables(cursor):
                               course_code  VARCHAR(10) NOT NULL,
                               obj_code     VARCHAR(20) NOT NULL,
                               PRIMARY KEY (degree_name, degree_level, course_code, obj_code),
+                              KEY idx_co_course_obj (course_code, obj_code),
                               CONSTRAINT fk_co_degree_course FOREIGN KEY (degree_name, degree_level, course_code)
                                 REFERENCES Degree_Course(degree_name, degree_level, course_code)
                                 ON DELETE CASCADE ON UPDATE CASCADE,
@@ -172,11 +171,13 @@ def Create_tables(cursor):
                               count_C        INT NOT NULL DEFAULT 0,
                               count_F        INT NOT NULL DEFAULT 0,
                               improvement    TEXT,
+                              term_key       INT AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) VIRTUAL,
                             
                               PRIMARY KEY (
                                 course_code, section_num, semester, year_offered,
                                 degree_name, degree_level, obj_code
                               ),
+                              KEY idx_eval_term (term_key),
                             
                               -- Tie to Section (which implies the specific offering)
                               CONSTRAINT fk_eval_section FOREIGN KEY (course_code, section_num, semester, year_offered)
@@ -221,6 +222,43 @@ def Create_tables(cursor):
                                 ) 
                             """
 
+        # 12. Create Evaluation_Summary Table (pass rate per evaluation, kept in sync by the app)
+        create_evaluation_summary_sql = """
+                            CREATE TABLE IF NOT EXISTS Evaluation_Summary (
+                                  course_code    VARCHAR(10) NOT NULL,
+                                  section_num    SMALLINT NOT NULL,
+                                  semester       ENUM('Spring','Summer','Fall') NOT NULL,
+                                  year_offered   SMALLINT NOT NULL,
+
+                                  degree_name    VARCHAR(100) NOT NULL,
+                                  degree_level   ENUM('BA','BS','MS','PhD','Cert') NOT NULL,
+                                  obj_code       VARCHAR(20) NOT NULL,
+
+                                  passed         INT NOT NULL DEFAULT 0,
+                                  total          INT NOT NULL DEFAULT 0,
+                                  pass_rate      DECIMAL(5,2),  -- NULL while no grades are entered
+                                  methods        TEXT,
+
+                                  PRIMARY KEY (
+                                    course_code, section_num, semester, year_offered,
+                                    degree_name, degree_level, obj_code
+                                  ),
+                                  KEY idx_summary_term_rate (year_offered, semester, pass_rate),
+                                  KEY idx_summary_degree_rate (degree_name, degree_level, pass_rate),
+                                  KEY idx_summary_rate (pass_rate),
+
+                                  CONSTRAINT fk_summary_eval FOREIGN KEY (
+                                    course_code, section_num, semester, year_offered,
+                                    degree_name, degree_level, obj_code
+                                  )
+                                    REFERENCES Evaluation(
+                                      course_code, section_num, semester, year_offered,
+                                      degree_name, degree_level, obj_code
+                                    )
+                                    ON DELETE CASCADE ON UPDATE CASCADE
+                                )
+                            """
+
         try:
             cursor.execute(create_degree_sql)
             cursor.execute(create_course_sql)
@@ -233,10 +271,32 @@ def Create_tables(cursor):
             cursor.execute(create_course_objective_sql)
             cursor.execute(create_evaluation_sql)
             cursor.execute(create_evaluation_method_sql)
+            cursor.execute(create_evaluation_summary_sql)
             print("Tables checked/created.")
-        except mysql.connector.Error as err:
+        except DB_ERRORS as err:
             print(f"Error creating tables: {err}")
 
-Create_tables(cursor)
-cursor.close()
-db.close()
\ No newline at end of file
+
+def main():
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+
+    if backend_name(config) == 'sqlite':
+        # The SQLite schema and its migrations are applied by the backend when it first connects
+        connect_factory(config)().close()
+        print(f"Tables checked/created in {config.get('sqlite', 'path', fallback='program_eval.db')}.")
+        return
+
+    db = connect_factory(config)()
+    cursor = db.cursor()
+    Create_tables(cursor)
+    # Bring the tables forward to the current schema version (see src/migrations.py)
+    for version, description, _ in migrate(db, 'mysql'):
+        print(f"Applied migration {version}: {description}")
+    print("Schema is up to date.")
+    cursor.close()
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+    Checks that every query the app issues is served by an index.
+
+    Drives every page, form, report and JSON API listing of src/app.py through Flask's test
+    client (the same cases as run_benchmarks.py plus the remaining GET pages), captures each
+    distinct SQL statement with the parameters it ran with, and EXPLAINs it. A full scan of one of the
+    fact or mapping tables fails the check; the small dimension tables behind the cached
+    dropdowns (Degree, Course, Instructor, Objective) may be read whole, and so may Evaluation
+    by the outcome store's full load (analytics.py), which reads every graded row on purpose.
+
+    Run from the project root against a database with data in it (generate_data.py):
+        python benchmarks/check_indexes.py
+    Exits with status 1 if any statement scans a large table.
+"""
+import os
+import random
+import re
+import sys
+
+from flask import g
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_benchmarks import app, build_cases, config, evaluation_post_data, pool, sample_parameters  # noqa: E402
+from db_backend import backend_name  # noqa: E402
+from instrumentation import normalize_sql  # noqa: E402
+
+SCANNABLE_TABLES = {'Degree', 'Course', 'Instructor', 'Objective'}
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+# Statements expected to read a whole table, by normalized prefix
+ALLOWED_SCANS = ('SELECT term_key, course_code, obj_code, degree_name, degree_level, count_A',)
+
+captured = {}   # normalized sql -> (sql, params)
+
+
+@app.before_request
+def keep_statement_args():
+    g.stats.keep_args = True
+
+
+@app.teardown_request
+def collect_statements(exc):
+    # Registered after the app's own teardown, so it runs first and still sees g.stats
+    stats = g.get('stats')
+    for record in stats.statements if stats is not None else ():
+        if record['sql'].lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+            captured.setdefault(normalize_sql(record['sql']), (record['sql'], record.get('args')))
+
+
+def table_aliases(sql):
+    # alias (or table name) -> table, from FROM / JOIN clauses
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE|JOIN|LEFT|ON|SET|ORDER|GROUP|LIMIT)(\w+))?",
+                                   sql, re.I):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(cursor, backend, sql, params):
+    """Tables the plan reads in full, excluding the small dimension tables."""
+    aliases = table_aliases(sql)
+    scanned = []
+    if backend == 'sqlite':
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        for row in cursor.fetchall():
+            match = re.fullmatch(r"SCAN (\w+)", row[3])
+            # Names that are not a table or alias are derived tables, already reduced by their own plan
+            if match and match.group(1) in aliases:
+                scanned.append(aliases[match.group(1)])
+    else:
+        cursor.execute("EXPLAIN " + sql, params)
+        columns = cursor.column_names
+        for row in cursor.fetchall():
+            row = dict(zip(columns, row))
+            if row['type'] == 'ALL' and row['table'] and not row['table'].startswith('<'):
+                scanned.append(aliases.get(row['table'], row['table']))
+    return [table for table in scanned if table not in SCANNABLE_TABLES]
+
+
+def api_pages(client, path, data):
+    # First and second page, so the keyset seek of each listing is explained too
+    page = client.get(path, query_string=dict(data, limit=5)).get_json()
+    if page.get('next_cursor'):
+        client.get(path, query_string=dict(data, limit=5, cursor=page['next_cursor']))
+
+
+def exercise_app(client, cursor):
+    rng = random.Random(7)
+    params = sample_parameters(cursor)
+    for name, method, path, factory in build_cases(params, rng):
+        data = factory()
+        if name == 'route:enter_evaluation_form POST':
+            data = evaluation_post_data(cursor, data)
+        if method == 'GET':
+            client.get(path, query_string=data)
+        else:
+            client.post(path, data=data)
+        if name.startswith('report:'):
+            client.post('/reports/export?format=csv', data=data).get_data()
+            api_pages(client, '/api/reports/' + name.split(':', 1)[1], data)
+        elif name == 'route:evaluation_selection':
+            api_pages(client, '/api/evaluation_selection', data)
+
+    graded = params['graded'][0]
+    degree = f"{graded[4]}|{graded[5]}"
+    for scope in ('all', 'degree'):
+        client.post('/reports', data={'report_type': 'passing_rate', 'scope': scope, 'percentage': 80,
+                                      'degree_selection': degree})
+    pages = ['/', '/add_degree', '/add_course', '/add_instructor', '/add_section', '/bulk_import',
+             '/manage_objectives', f'/map_course_objective?degree={degree}', '/evaluation_selection', '/reports',
+             f'/edit_instructor/{graded[6]}', f'/edit_section/{graded[0]}/{graded[1]}/{graded[2]}/{graded[3]}',
+             f'/evaluation_progress?semester={graded[2]}&year={graded[3]}',
+             f'/evaluation_progress?semester={graded[2]}&year={graded[3]}&degree_selection={degree}']
+    pages += [f'/manage_data?tab={tab}' for tab in ('instructors', 'degrees', 'courses', 'sections')] + ['/jobs']
+    pages += [f'/manage_data?tab=sections&prefix={graded[0][:2]}&start_sem=Spring&start_year={params["min_year"]}'
+              f'&end_sem=Fall&end_year={params["max_year"]}']
+    for page in pages:
+        client.get(page)
+    # Archive previews only count, so they are safe to explain against a real database
+    for scope in ({'start_year': params['min_year'], 'end_year': params['min_year']}, {'course_code': graded[0]},
+                  {'start_year': params['min_year'], 'end_year': params['min_year'], 'degree_selection': degree}):
+        client.post('/bulk_archive', data=dict(scope, step='preview', start_sem='Spring', end_sem='Fall'))
+
+
+def main():
+    backend = backend_name(config)
+    app.config['TESTING'] = True
+    client = app.test_client()
+    conn = pool.checkout()
+    cursor = conn.cursor()
+    try:
+        exercise_app(client, cursor)
+        failures = 0
+        for key, (sql, params) in sorted(captured.items()):
+            scans = [] if key.startswith(ALLOWED_SCANS) else full_scans(cursor, backend, sql, params)
+            status = f"SCAN {', '.join(scans)}" if scans else 'ok'
+            failures += bool(scans)
+            print(f"{status:<28} {key[:150]}")
+    finally:
+        conn.rollback()
+        conn.close()
+    print(f"\n{len(captured)} statements checked, {failures} with full scans of large tables.")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
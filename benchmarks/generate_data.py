@@ -0,0 +1,196 @@
+"""
+    Seeded synthetic data generator for benchmarking.
+
+    Fills the schema created by Create_Tables.py at a configurable scale. The defaults
+    approximate a large department's history:
+        50 degrees, 2,000 courses, 100k sections, ~2M Evaluation rows, ~5M Evaluation_Method rows
+
+    Run from the project root against a scratch database (it refuses to add to non-empty
+    tables unless --truncate is given); with backend = sqlite in config.ini it fills the
+    SQLite file instead:
+        python benchmarks/generate_data.py --truncate
+        python benchmarks/generate_data.py --sections 5000 --courses 200 --degrees 10   (quick run)
+"""
+import argparse
+import configparser
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from db_backend import backend_name, connect_factory  # noqa: E402
+from evaluation_store import rebuild_evaluation_progress, rebuild_evaluation_summary  # noqa: E402
+
+LEVELS = ['BA', 'BS', 'MS', 'PhD', 'Cert']
+SEMESTERS = ['Spring', 'Summer', 'Fall']
+METHODS = ['Homework', 'Project', 'Quiz', 'Oral Presentation', 'Report', 'Mid-term', 'Final Exam']
+SUBJECTS = ['CS', 'DS', 'MATH', 'STAT', 'EE', 'IS', 'PHYS', 'ECON']
+IMPROVEMENTS = ['More practice problems before the exam.', 'Add a lab session on this topic.',
+                'Students struggled with the project scope.', '']
+
+TABLES = ['Evaluation_Summary_Archive', 'Evaluation_Method_Archive', 'Evaluation_Archive', 'Teaches_Archive',
+          'Section_Archive', 'Evaluation_Progress', 'Evaluation_Summary', 'Evaluation_Method', 'Evaluation', 'Teaches',
+          'Section', 'Course_Objective', 'Degree_Objective', 'Degree_Course', 'Objective', 'Instructor', 'Course', 'Degree']
+
+
+def insert_many(db, cursor, sql, rows, batch=5000):
+    for i in range(0, len(rows), batch):
+        cursor.executemany(sql, rows[i:i + batch])
+        db.commit()
+
+
+def set_checks(cursor, backend, enabled):
+    # The generator only writes consistent rows, so constraint checks are off while it loads
+    if backend == 'sqlite':
+        cursor.execute(f"PRAGMA foreign_keys = {'ON' if enabled else 'OFF'}")
+    else:
+        cursor.execute(f"SET SESSION foreign_key_checks = {int(enabled)}")
+        cursor.execute(f"SET SESSION unique_checks = {int(enabled)}")
+
+
+def generate(db, args, backend='mysql'):
+    rng = random.Random(args.seed)
+    cursor = db.cursor()
+    set_checks(cursor, backend, False)
+    started = time.time()
+
+    if args.truncate:
+        for table in TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+        db.commit()
+    else:
+        cursor.execute("SELECT COUNT(*) FROM Section")
+        if cursor.fetchone()[0]:
+            sys.exit("Section already has rows; use --truncate on a scratch database.")
+
+    # --- Dimensions
+    degrees = [(f"Program {i:03d}", LEVELS[i % len(LEVELS)]) for i in range(args.degrees)]
+    insert_many(db, cursor, "INSERT INTO Degree (degree_name, degree_level, description) VALUES (%s, %s, %s)",
+                [(n, l, f"Synthetic degree {n}") for n, l in degrees])
+
+    courses = [f"{SUBJECTS[i % len(SUBJECTS)]}{1000 + i}"[:10] for i in range(args.courses)]
+    insert_many(db, cursor, "INSERT INTO Course (course_code, course_name) VALUES (%s, %s)",
+                [(c, f"Course {c}") for c in courses])
+
+    instructors = [f"I{i:05d}" for i in range(args.instructors)]
+    insert_many(db, cursor,
+                "INSERT INTO Instructor (instructor_id, first_name, middle_name, last_name, email_id, phone_number) VALUES (%s, %s, %s, %s, %s, %s)",
+                [(i, f"First{i}", None, f"Last{i}", f"{i.lower()}@example.edu", None) for i in instructors])
+
+    objectives = [f"OBJ{i:04d}" for i in range(args.objectives)]
+    insert_many(db, cursor, "INSERT INTO Objective (obj_code, title, description) VALUES (%s, %s, %s)",
+                [(o, f"Objective {o}", f"Synthetic learning objective {o}") for o in objectives])
+
+    # --- Degree mappings: each course belongs to a few degrees and maps to a few of each degree's objectives
+    degree_objs = {d: rng.sample(objectives, min(len(objectives), args.objectives_per_degree)) for d in degrees}
+    insert_many(db, cursor, "INSERT INTO Degree_Objective (degree_name, degree_level, obj_code) VALUES (%s, %s, %s)",
+                [d + (o,) for d in degrees for o in degree_objs[d]])
+
+    degree_course, course_obj = [], []
+    course_targets = {}   # course -> [(degree_name, degree_level, obj_code)]
+    for c in courses:
+        targets = []
+        for d in rng.sample(degrees, min(len(degrees), args.degrees_per_course)):
+            degree_course.append(d + (c, 1 if rng.random() < 0.3 else 0))
+            for o in rng.sample(degree_objs[d], min(len(degree_objs[d]), args.objectives_per_course)):
+                course_obj.append(d + (c, o))
+                targets.append(d + (o,))
+        course_targets[c] = targets
+    insert_many(db, cursor,
+                "INSERT INTO Degree_Course (degree_name, degree_level, course_code, is_core) VALUES (%s, %s, %s, %s)",
+                degree_course)
+    insert_many(db, cursor,
+                "INSERT INTO Course_Objective (degree_name, degree_level, course_code, obj_code) VALUES (%s, %s, %s, %s)",
+                course_obj)
+
+    # --- Sections, teaching assignments and evaluations, streamed in batches
+    terms = [(sem, year) for year in range(args.start_year, args.end_year + 1) for sem in SEMESTERS]
+    section_numbers = {}
+    sections, teaches, evals, methods = [], [], [], []
+    counts = {'sections': 0, 'evaluations': 0, 'methods': 0}
+
+    def flush():
+        insert_many(db, cursor,
+                    "INSERT INTO Section (course_code, section_num, semester, year_offered, num_enrollments) VALUES (%s, %s, %s, %s, %s)",
+                    sections)
+        insert_many(db, cursor,
+                    "INSERT INTO Teaches (course_code, section_num, semester, year_offered, instructor_id) VALUES (%s, %s, %s, %s, %s)",
+                    teaches)
+        insert_many(db, cursor,
+                    "INSERT INTO Evaluation (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code, count_A, count_B, count_C, count_F, improvement) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    evals)
+        insert_many(db, cursor,
+                    "INSERT INTO Evaluation_Method (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code, method_name) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                    methods)
+        counts['sections'] += len(sections)
+        counts['evaluations'] += len(evals)
+        counts['methods'] += len(methods)
+        del sections[:], teaches[:], evals[:], methods[:]
+
+    for n in range(args.sections):
+        c = rng.choice(courses)
+        sem, year = rng.choice(terms)
+        section_numbers[(c, sem, year)] = section_numbers.get((c, sem, year), 0) + 1
+        sec = section_numbers[(c, sem, year)]
+        if sec > 999:
+            continue
+        enroll = rng.randint(10, 120)
+        sections.append((c, sec, sem, year, enroll))
+        teaches.append((c, sec, sem, year, rng.choice(instructors)))
+
+        if rng.random() < args.graded:
+            for d_name, d_level, o in course_targets[c]:
+                a = rng.randint(0, enroll)
+                b = rng.randint(0, enroll - a)
+                cc = rng.randint(0, enroll - a - b)
+                evals.append((c, sec, sem, year, d_name, d_level, o, a, b, cc, enroll - a - b - cc,
+                              rng.choice(IMPROVEMENTS)))
+                k = min(len(METHODS), max(1, int(rng.expovariate(1 / args.methods_per_evaluation) + 0.5)))
+                for m in rng.sample(METHODS, k):
+                    methods.append((c, sec, sem, year, d_name, d_level, o, m))
+
+        if len(sections) >= 2000:
+            flush()
+            print(f"  {counts['sections']:,} sections, {counts['evaluations']:,} evaluations", flush=True)
+    flush()
+
+    print("Rebuilding Evaluation_Summary and Evaluation_Progress...", flush=True)
+    rebuild_evaluation_summary(cursor)
+    rebuild_evaluation_progress(cursor)
+    db.commit()
+    set_checks(cursor, backend, True)
+    print(f"Generated {counts['sections']:,} sections, {counts['evaluations']:,} evaluations, "
+          f"{counts['methods']:,} evaluation methods in {time.time() - started:.0f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with seeded synthetic data.')
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--truncate', action='store_true', help='delete all existing rows first')
+    parser.add_argument('--degrees', type=int, default=50)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--instructors', type=int, default=1500)
+    parser.add_argument('--objectives', type=int, default=400)
+    parser.add_argument('--sections', type=int, default=100000)
+    parser.add_argument('--start-year', type=int, default=2000)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--objectives-per-degree', type=int, default=25)
+    parser.add_argument('--degrees-per-course', type=int, default=4)
+    parser.add_argument('--objectives-per-course', type=int, default=5)
+    parser.add_argument('--methods-per-evaluation', type=float, default=2.5)
+    parser.add_argument('--graded', type=float, default=1.0, help='fraction of sections with evaluations')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    db = connect_factory(config)()
+    try:
+        generate(db, args, backend_name(config))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
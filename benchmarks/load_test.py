@@ -0,0 +1,308 @@
+"""
+    HTTP load test for a running instance of src/app.py.
+
+    Virtual users, each a thread with its own cookie session, run scripted sessions against
+    the server over HTTP, as a browser would:
+        grading  evaluation_selection (GET, then POST a term), open a section's
+                 enter_evaluation_form and POST back the grades it showed
+        reports  the report page, then one of the report types (the run_benchmarks.py cases)
+        manage   one manage_data tab
+    Sessions are picked by weight (--mix). Each concurrency level in --users runs for
+    --duration seconds; requests started in the first --warmup seconds are not counted.
+    Per level and route it reports throughput, p50 / p95 / p99 latency and the error rate
+    (HTTP errors, refused connections, timeouts, pages flashing a danger alert, and
+    evaluation posts that did not save), then the saturation curve across the levels.
+
+    Start the app the way it will be served, then run from the project root with the same
+    config.ini, since realistic inputs are sampled from that database:
+        python benchmarks/load_test.py --users 1,2,4,8,16,32 --duration 30
+        python benchmarks/load_test.py --users 20 --think 2 --mix grading=1   (grading week)
+    Evaluation posts re-submit only the objectives that already have grades (a section with
+    none is opened but not posted), so the data is left as it was. With
+    --think 0 (the default) users send their next request at once, which finds the saturation
+    point; the server's report cache stays on, so repeated reports are served from it.
+
+    Each run is appended to benchmarks/load_results.jsonl.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, build_opener
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_benchmarks import build_cases, git_version, percentile, pool, sample_parameters  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_results.jsonl')
+SESSIONS = ('grading', 'reports', 'manage')
+MANAGE_TABS = ('instructors', 'degrees', 'courses', 'sections')
+OBJECTIVE_FIELDS = ('count_A_', 'count_B_', 'count_C_', 'count_F_', 'methods_', 'method_other_', 'improvement_')
+# Throughput growing less than this from one level to the next marks saturation
+SATURATION_GAIN = 1.1
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # Redirects are returned, not followed, so each request is timed on its own
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class FormParser(HTMLParser):
+    """The fields a browser would submit from a page's first form, and its links."""
+
+    def __init__(self):
+        super().__init__()
+        self.fields = []
+        self.links = []
+        self._forms = 0
+        self._textarea = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'a' and attrs.get('href'):
+            self.links.append(attrs['href'])
+        elif tag == 'form':
+            self._forms += 1
+        elif self._forms != 1 or not attrs.get('name'):
+            return
+        elif tag == 'input':
+            if attrs.get('type') in ('checkbox', 'radio') and 'checked' not in attrs:
+                return
+            if attrs.get('type') not in ('submit', 'button'):
+                self.fields.append((attrs['name'], attrs.get('value') or ''))
+        elif tag == 'textarea':
+            self._textarea = [attrs['name'], '']
+            self.fields.append(self._textarea)
+
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self._textarea[1] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'textarea':
+            self._textarea = None
+
+
+def parse_page(body):
+    parser = FormParser()
+    parser.feed(body)
+    return [tuple(field) for field in parser.fields], parser.links
+
+
+def graded_fields(fields):
+    """
+        The evaluation form's fields less the objectives with no grades yet, or None if no
+        objective has any: posting zeros would save them as new all-zero evaluations.
+    """
+    def objective(name):
+        return next((name[len(prefix):] for prefix in OBJECTIVE_FIELDS if name.startswith(prefix)), None)
+
+    graded = {objective(name) for name, value in fields
+              if name.startswith('count_') and objective(name) and value.strip() not in ('', '0')}
+    if not graded:
+        return None
+    return [(name, value) for name, value in fields if objective(name) is None or objective(name) in graded]
+
+
+class VirtualUser:
+    def __init__(self, base_url, params, rng, timeout, think):
+        self.base_url = base_url
+        self.rng = rng
+        self.timeout = timeout
+        self.think = think
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()), _NoRedirect())
+        self.cases = build_cases(params, rng)
+        self.report_cases = [case for case in self.cases if case[0].startswith('report:')]
+        self.forms = {case[0]: case[3] for case in self.cases}
+        self.samples = []   # (started, route, ms, error)
+
+    def request(self, route, method, path, data=None, expect_redirect=None):
+        """Times one request and records it; returns the page body, or None if it failed."""
+        url = urljoin(self.base_url, path)
+        body = urlencode(data or {}, doseq=True).encode() if method == 'POST' else None
+        if method == 'GET' and data:
+            url += '?' + urlencode(data, doseq=True)
+        started = time.time()
+        try:
+            with self.opener.open(url, data=body, timeout=self.timeout) as response:
+                status, location, page = response.status, None, response.read()
+        except HTTPError as err:
+            status, location, page = err.code, err.headers.get('Location'), err.read()
+        except (URLError, OSError) as err:
+            status, location, page = None, None, str(getattr(err, 'reason', err)).encode()
+        ms = (time.time() - started) * 1000
+        page = page.decode('utf-8', 'replace')
+
+        if status is None or status >= 400:
+            error = f"HTTP {status}" if status else page
+        elif 300 <= status < 400:
+            error = None if expect_redirect is None or urlsplit(location or '').path == expect_redirect \
+                else f"redirected to {location}"
+        else:
+            error = 'danger alert' if 'alert alert-danger' in page else None
+        self.samples.append((started, route, ms, error))
+        return None if error else page
+
+    def pause(self):
+        if self.think:
+            time.sleep(self.rng.expovariate(1 / self.think))
+
+    def grading(self):
+        self.request('route:evaluation_selection GET', 'GET', '/evaluation_selection')
+        self.pause()
+        page = self.request('route:evaluation_selection', 'POST', '/evaluation_selection',
+                            self.forms['route:evaluation_selection']())
+        links = [link for link in parse_page(page)[1] if '/enter_evaluation_form?' in link] if page else []
+        self.pause()
+        if links:
+            form_path = self.rng.choice(links)
+        else:
+            form_path = '/enter_evaluation_form?' + urlencode(self.forms['route:enter_evaluation_form GET']())
+        page = self.request('route:enter_evaluation_form GET', 'GET', form_path)
+        if page is None:
+            return
+        fields = graded_fields(parse_page(page)[0])
+        if fields is None:
+            return
+        self.pause()
+        self.request('route:enter_evaluation_form POST', 'POST', form_path, fields, expect_redirect='/')
+
+    def reports(self):
+        self.request('route:reports GET', 'GET', '/reports')
+        self.pause()
+        name, method, path, factory = self.rng.choice(self.report_cases)
+        self.request(name, method, path, factory())
+
+    def manage(self):
+        tab = self.rng.choice(MANAGE_TABS)
+        self.request(f'route:manage_data {tab}', 'GET', '/manage_data', {'tab': tab})
+
+    def run(self, mix, stop_at):
+        names, weights = zip(*mix.items())
+        while time.time() < stop_at:
+            getattr(self, self.rng.choices(names, weights)[0])()
+            self.pause()
+
+
+def summarize(samples, seconds):
+    timings = [ms for _, _, ms, _ in samples]
+    errors = sum(1 for sample in samples if sample[3])
+    return {'requests': len(samples), 'rps': round(len(samples) / seconds, 2),
+            'p50_ms': round(percentile(timings, 50), 2), 'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2), 'error_rate': round(errors / len(samples), 4)}
+
+
+def run_level(base_url, params, users, args, seed):
+    started = time.time()
+    stop_at = started + args.warmup + args.duration
+    vusers = [VirtualUser(base_url, params, random.Random(seed * 1000 + i), args.timeout, args.think)
+              for i in range(users)]
+    threads = [threading.Thread(target=vuser.run, args=(args.mix, stop_at), daemon=True) for vuser in vusers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counted = [sample for vuser in vusers for sample in vuser.samples if sample[0] >= started + args.warmup]
+    if not counted:
+        return {'users': users, 'requests': 0, 'routes': [], 'errors': {}}
+    level = {'users': users, **summarize(counted, args.duration), 'routes': []}
+    for route in sorted({sample[1] for sample in counted}):
+        level['routes'].append({'route': route, **summarize([s for s in counted if s[1] == route], args.duration)})
+    errors = {}
+    for sample in counted:
+        if sample[3]:
+            errors[sample[3][:80]] = errors.get(sample[3][:80], 0) + 1
+    level['errors'] = dict(sorted(errors.items(), key=lambda item: -item[1])[:5])
+    return level
+
+
+def print_level(level):
+    print(f"\n{level['users']} users: {level['requests']} requests", flush=True)
+    for r in level['routes']:
+        print(f"  {r['route']:<36} {r['rps']:>8.2f} req/s  p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+              f"p99 {r['p99_ms']:>9.2f} ms  errors {r['error_rate']:>6.1%}")
+    for error, count in level['errors'].items():
+        print(f"  error x{count}: {error}")
+
+
+def print_curve(levels):
+    print(f"\n{'users':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    saturated, previous = None, None
+    for level in levels:
+        if not level['requests']:
+            print(f"{level['users']:>6}  no requests completed")
+            continue
+        print(f"{level['users']:>6} {level['rps']:>9.2f} {level['p50_ms']:>9.2f} {level['p95_ms']:>9.2f} "
+              f"{level['p99_ms']:>9.2f} {level['error_rate']:>7.1%}")
+        if saturated is None and previous and level['rps'] < previous['rps'] * SATURATION_GAIN:
+            saturated = previous
+        previous = level
+    if previous is None:
+        print("\nNo requests completed; see the errors above.")
+    elif saturated:
+        users = f"{saturated['users']} user{'s' if saturated['users'] != 1 else ''}"
+        print(f"\nThroughput stops growing after {users} (~{saturated['rps']:.0f} req/s); "
+              f"more users only wait longer.")
+    else:
+        print("\nThroughput still grew at the highest level; try more users.")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SESSIONS:
+            raise argparse.ArgumentTypeError(f"Unknown session '{name.strip()}'. Available: {', '.join(SESSIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a running instance of the app over HTTP.')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/')
+    parser.add_argument('--users', default='1,2,4,8,16', help='concurrency levels, comma separated')
+    parser.add_argument('--duration', type=float, default=30, help='seconds measured per level')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds per level before measuring')
+    parser.add_argument('--think', type=float, default=0, help='mean pause between a user\'s requests, in seconds')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('grading=5,reports=3,manage=2'),
+                        help='session weights, e.g. grading=5,reports=3,manage=2')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    levels = [int(users) for users in args.users.split(',')]
+
+    conn = pool.checkout()
+    try:
+        params = sample_parameters(conn.cursor())
+    finally:
+        conn.close()
+    probe = VirtualUser(args.url, params, random.Random(args.seed), args.timeout, 0)
+    if probe.request('route:index', 'GET', '/') is None:
+        sys.exit(f"No answer from {args.url}: {probe.samples[-1][3]}. Start the app first (python src/app.py).")
+
+    results = []
+    for users in levels:
+        level = run_level(args.url, params, users, args, args.seed + users)
+        print_level(level)
+        results.append(level)
+    print_curve(results)
+
+    run = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'version': git_version(), 'url': args.url,
+           'duration': args.duration, 'think': args.think, 'mix': args.mix, 'levels': results}
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    print(f"\nResults appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
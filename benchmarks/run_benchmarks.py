@@ -0,0 +1,241 @@
+"""
+    Query benchmark suite for the report types and form routes.
+
+    Drives src/app.py in-process through Flask's test client against the database in
+    config.ini (normally filled by generate_data.py), and records per case:
+        p50 / p95 / max latency in ms, and InnoDB rows read per request ("rows examined").
+
+    Run from the project root on a local MariaDB/MySQL that nothing else is using, since
+    rows examined is read from the server-wide Innodb_rows_read counter (with the SQLite
+    backend only latency is recorded and rows examined is left empty):
+        python benchmarks/run_benchmarks.py --iterations 20
+        python benchmarks/run_benchmarks.py --only reports   (just the report cases)
+    The report page cache is switched off unless --report-cache is given, so every iteration
+    runs the queries.
+
+    Each run is appended to benchmarks/results.jsonl (one JSON object per run) and compared
+    with the previous run in the same file so regressions stand out.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+from app import app, config, pool, report_cache  # noqa: E402
+from db_backend import backend_name  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+REGRESSION_RATIO = 1.25
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rows_read(cursor):
+    if backend_name(config) != 'mysql':
+        return None
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_rows_read'")
+    return int(cursor.fetchone()[1])
+
+
+def sample_parameters(cursor):
+    """Picks realistic inputs from the data that is actually loaded."""
+    cursor.execute("SELECT degree_name, degree_level FROM Degree")
+    degrees = cursor.fetchall()
+    cursor.execute("SELECT MIN(year_offered), MAX(year_offered) FROM Section")
+    min_year, max_year = cursor.fetchone()
+    if min_year is None:
+        sys.exit("No sections found; run benchmarks/generate_data.py first.")
+    cursor.execute("""SELECT E.course_code, E.section_num, E.semester, E.year_offered, E.degree_name, E.degree_level,
+                      T.instructor_id, E.obj_code
+                      FROM Evaluation E JOIN Teaches T ON T.course_code = E.course_code AND T.section_num = E.section_num
+                        AND T.semester = E.semester AND T.year_offered = E.year_offered
+                      WHERE E.year_offered = %s LIMIT 200""", (max_year,))
+    graded = cursor.fetchall()
+    if not graded:
+        sys.exit("No evaluations found for the latest year; run benchmarks/generate_data.py first.")
+    return {'degrees': degrees, 'min_year': int(min_year), 'max_year': int(max_year), 'graded': graded}
+
+
+def build_cases(params, rng):
+    """Returns [(name, method, path, data-factory)] covering every report type and form route."""
+    span_start = max(params['min_year'], params['max_year'] - 9)
+
+    def degree():
+        d = rng.choice(params['degrees'])
+        return f"{d[0]}|{d[1]}"
+
+    def graded():
+        return rng.choice(params['graded'])
+
+    cases = [
+        ('report:degree_details', 'POST', '/reports', lambda: {
+            'report_type': 'degree_details', 'degree_selection': degree(),
+            'start_year': span_start, 'end_year': params['max_year']}),
+        ('report:passing_rate', 'POST', '/reports', lambda: {
+            'report_type': 'passing_rate', 'semester': graded()[2], 'year': params['max_year'], 'percentage': 80}),
+        ('report:course_sections', 'POST', '/reports', lambda: {
+            'report_type': 'course_sections', 'course_code': graded()[0],
+            'start_sem': 'Spring', 'start_year': span_start, 'end_sem': 'Fall', 'end_year': params['max_year']}),
+        ('report:instructor_sections', 'POST', '/reports', lambda: {
+            'report_type': 'instructor_sections', 'instructor_id': graded()[6],
+            'start_sem': 'Spring', 'start_year': span_start, 'end_sem': 'Fall', 'end_year': params['max_year']}),
+        ('report:eval_status', 'POST', '/reports', lambda: {
+            'report_type': 'eval_status', 'semester': graded()[2], 'year': params['max_year']}),
+        ('report:outcome_trend', 'POST', '/reports', lambda: {
+            'report_type': 'outcome_trend', 'degree_selection': degree(), 'granularity': 'term',
+            'start_year': params['min_year'], 'end_year': params['max_year']}),
+        ('report:outcome_rollup', 'POST', '/reports', lambda: {
+            'report_type': 'outcome_rollup', 'dimension': 'course', 'obj_code': graded()[7],
+            'start_year': span_start, 'end_year': params['max_year']}),
+    ]
+
+    def selection():
+        g = graded()
+        return {'degree_selection': f"{g[4]}|{g[5]}", 'semester': g[2], 'year': g[3], 'instructor_id': g[6]}
+
+    def form_args():
+        g = graded()
+        return {'degree_str': f"{g[4]}|{g[5]}", 'course_code': g[0], 'section_num': g[1],
+                'semester': g[2], 'year': g[3]}
+
+    cases += [
+        ('route:evaluation_selection', 'POST', '/evaluation_selection', selection),
+        ('route:enter_evaluation_form GET', 'GET', '/enter_evaluation_form', form_args),
+        ('route:enter_evaluation_form POST', 'POST', '/enter_evaluation_form', form_args),
+        ('route:term_evaluations GET', 'GET', '/term_evaluations', lambda: {
+            key: value for key, value in selection().items() if key != 'degree_selection'}),
+        ('route:evaluation_progress', 'GET', '/evaluation_progress', lambda: {
+            'semester': graded()[2], 'year': graded()[3]}),
+        ('route:manage_data sections', 'GET', '/manage_data', lambda: {'tab': 'sections'}),
+    ]
+    return cases
+
+
+def evaluation_post_data(cursor, args):
+    # Re-submit the section's current grades and methods so the write path runs without changing the data
+    key = (args['course_code'], args['section_num'], args['semester'], args['year'], *args['degree_str'].split('|'))
+    where = "course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s AND degree_name=%s AND degree_level=%s"
+    data = dict(args)
+    cursor.execute(f"SELECT obj_code, method_name FROM Evaluation_Method WHERE {where}", key)
+    for obj_code, method in cursor.fetchall():
+        data.setdefault(f'methods_{obj_code}', []).append(method)
+    cursor.execute(f"SELECT obj_code, count_A, count_B, count_C, count_F, improvement FROM Evaluation WHERE {where}", key)
+    for obj_code, a, b, c, f, impr in cursor.fetchall():
+        data.update({f'count_A_{obj_code}': a, f'count_B_{obj_code}': b, f'count_C_{obj_code}': c,
+                     f'count_F_{obj_code}': f, f'improvement_{obj_code}': impr or ''})
+    return data
+
+
+def run_case(client, cursor, name, method, path, factory, iterations):
+    timings, reads, errors = [], [], 0
+    for _ in range(iterations):
+        data = factory()
+        if name == 'route:enter_evaluation_form POST':
+            data = evaluation_post_data(cursor, data)
+        before = rows_read(cursor)
+        start = time.perf_counter()
+        if method == 'GET':
+            response = client.get(path, query_string=data)
+        else:
+            response = client.post(path, data=data)
+        timings.append((time.perf_counter() - start) * 1000)
+        if before is not None:
+            reads.append(rows_read(cursor) - before)
+        if response.status_code >= 400:
+            errors += 1
+    return {'case': name, 'iterations': iterations, 'errors': errors,
+            'p50_ms': round(percentile(timings, 50), 2), 'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(max(timings), 2), 'rows_examined': int(percentile(reads, 50)) if reads else None}
+
+
+def table_sizes(cursor):
+    sizes = {}
+    for table in ('Degree', 'Course', 'Section', 'Evaluation', 'Evaluation_Method'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_run(path):
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark report and form routes against the configured database.')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--only', choices=['reports', 'routes'])
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--report-cache', action='store_true',
+                        help='keep the rendered report cache on (repeat iterations are then cache hits)')
+    args = parser.parse_args()
+    if not args.report_cache:
+        report_cache.ttl = 0
+
+    rng = random.Random(args.seed)
+    app.config['TESTING'] = True
+    client = app.test_client()
+    conn = pool.checkout()
+    cursor = conn.cursor()
+    try:
+        params = sample_parameters(cursor)
+        prefix = {'reports': 'report:', 'routes': 'route:'}.get(args.only, '')
+        cases = [c for c in build_cases(params, rng) if c[0].startswith(prefix)]
+        results = []
+        for name, method, path, factory in cases:
+            run_case(client, cursor, name, method, path, factory, args.warmup)
+            result = run_case(client, cursor, name, method, path, factory, args.iterations)
+            results.append(result)
+            print(f"{name:<36} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                  f"rows {result['rows_examined'] if result['rows_examined'] is not None else '-':>10}  "
+                  f"errors {result['errors']}", flush=True)
+        sizes = table_sizes(cursor)
+    finally:
+        conn.close()
+
+    run = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'version': git_version(),
+           'iterations': args.iterations, 'tables': sizes, 'results': results}
+
+    last = previous_run(args.output)
+    if last:
+        old = {r['case']: r for r in last['results']}
+        print(f"\nCompared with {last['version']} ({last['timestamp']}):")
+        for r in results:
+            if r['case'] in old and old[r['case']]['p50_ms'] > 0:
+                ratio = r['p50_ms'] / old[r['case']]['p50_ms']
+                flag = '  <-- REGRESSION' if ratio > REGRESSION_RATIO else ''
+                print(f"  {r['case']:<36} p50 x{ratio:.2f}{flag}")
+
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    print(f"\nResults appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+    In-memory column store of Evaluation grade counts for multi-year outcome reports.
+
+    Each term's evaluations are kept as parallel typed arrays, one per column. Course,
+    objective and degree are stored as integer codes into shared dictionaries, so a twenty-year
+    trend is a pass over a few million small integers instead of repeated scans of Evaluation.
+    Everything is loaded on first use; after that only the terms marked stale by a write are
+    reloaded (plus a full reload every `max_age` seconds for writes made outside the app).
+    Group-bys are vectorized with NumPy when it is installed, and plain loops otherwise.
+"""
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:   # optional; the pure-Python path gives the same results
+    np = None
+
+GRADES = ('A', 'B', 'C', 'F')
+DIMENSIONS = ('course', 'objective', 'degree')
+GROUPINGS = ('year', 'term') + DIMENSIONS
+PERCENTILES = (25, 50, 75)
+SEMESTER_NAMES = {1: 'Spring', 2: 'Summer', 3: 'Fall'}
+BATCH_SIZE = 5000
+
+
+class Dictionary:
+    """Value <-> small integer code. Codes never change once assigned."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class TermBlock:
+    """The graded evaluations of one term, one typed array per column."""
+
+    def __init__(self):
+        self.columns = {name: array('i') for name in DIMENSIONS + GRADES}
+
+    def __len__(self):
+        return len(self.columns['A'])
+
+
+def term_label(term):
+    return f"{SEMESTER_NAMES.get(term % 10, '?')} {term // 10}"
+
+
+def _percentile(ordered, pct):
+    # Linear interpolation between closest ranks, as numpy.percentile does by default
+    if not ordered:
+        return None
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class OutcomeStore:
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self.dictionaries = {name: Dictionary() for name in DIMENSIONS}
+        self._blocks = {}   # term_key -> TermBlock; replaced as a whole, never mutated in place
+        self._stale = set()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._stats = {'full_loads': 0, 'term_loads': 0, 'load_seconds': 0.0}
+
+    def mark_stale(self, *term_keys):
+        """Call after committing a write to Evaluation; those terms are reloaded on next use."""
+        with self._lock:
+            self._stale.update(term_keys)
+
+    def mark_all_stale(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self, cursor):
+        """Brings the store up to date using a plain (tuple) cursor; cheap when nothing changed."""
+        with self._lock:
+            started = time.perf_counter()
+            if self._loaded_at is None or time.time() - self._loaded_at > self.max_age:
+                self._stale.clear()
+                self._blocks = self._load(cursor, None)
+                self._loaded_at = time.time()
+                self._stats['full_loads'] += 1
+            elif self._stale:
+                terms = sorted(self._stale)
+                self._stale.clear()
+                blocks = dict(self._blocks)
+                for term in terms:
+                    blocks.pop(term, None)
+                blocks.update(self._load(cursor, terms))
+                self._blocks = blocks
+                self._stats['term_loads'] += len(terms)
+            else:
+                return
+            self._stats['load_seconds'] += time.perf_counter() - started
+
+    def _load(self, cursor, terms):
+        sql = """SELECT term_key, course_code, obj_code, degree_name, degree_level, count_A, count_B, count_C, count_F
+                 FROM {table} WHERE count_A + count_B + count_C + count_F > 0"""
+        params = ()
+        if terms:
+            sql += f" AND term_key IN ({', '.join(['%s'] * len(terms))})"
+            params = terms
+        # Archived evaluations still count toward the outcomes (archive_maintenance.py moves old years there)
+        cursor.execute(sql.format(table='Evaluation') + " UNION ALL " + sql.format(table='Evaluation_Archive'),
+                       tuple(params) * 2)
+
+        course, objective, degree = (self.dictionaries[name].encode for name in DIMENSIONS)
+        blocks = {}
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            for term, c_code, obj_code, d_name, d_level, a, b, c, f in rows:
+                block = blocks.get(term)
+                if block is None:
+                    block = blocks[term] = TermBlock()
+                cols = block.columns
+                cols['course'].append(course(c_code))
+                cols['objective'].append(objective(obj_code))
+                cols['degree'].append(degree(f"{d_name}|{d_level}"))
+                cols['A'].append(a)
+                cols['B'].append(b)
+                cols['C'].append(c)
+                cols['F'].append(f)
+        return blocks
+
+    def stats(self):
+        blocks = self._blocks
+        return dict(self._stats, terms=len(blocks), rows=sum(len(b) for b in blocks.values()),
+                    stale_terms=len(self._stale), numpy=np is not None)
+
+    # --- Queries
+    def _codes(self, filters):
+        """{dimension: code} for the filters given; None if a filter value was never seen."""
+        codes = {}
+        for name, value in filters.items():
+            if value:
+                code = self.dictionaries[name].codes.get(value)
+                if code is None:
+                    return None
+                codes[name] = code
+        return codes
+
+    def _label(self, by, key):
+        if by == 'year':
+            return str(key)
+        if by == 'term':
+            return term_label(key)
+        value = self.dictionaries[by].values[key]
+        if by == 'degree':
+            name, level = value.split('|')
+            return f"{name} ({level})"
+        return value
+
+    def group(self, by, start_term, end_term, **filters):
+        """
+            Outcome statistics per `by` group ('year', 'term', 'course', 'objective' or
+            'degree') over terms start_term..end_term, optionally narrowed by
+            course/objective/degree ('name|level'). Also returns the same statistics for
+            all matching rows together, as the rollup total.
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{by}'")
+        codes = self._codes(filters)
+        blocks = [(term, block) for term, block in sorted(self._blocks.items()) if start_term <= term <= end_term]
+        if codes is None or not blocks:
+            return [], None
+        if np is not None:
+            return self._group_numpy(by, blocks, codes)
+        return self._group_python(by, blocks, codes)
+
+    def _row(self, by, key, evaluations, sums, rates):
+        total = sum(sums)
+        row = {'key': key, 'label': self._label(by, key) if by else 'Total', 'evaluations': evaluations,
+               'students': total, 'pass_rate': (sums[0] + sums[1] + sums[2]) * 100.0 / total if total else None}
+        for grade, count in zip(GRADES, sums):
+            row[f'pct_{grade}'] = count * 100.0 / total if total else None
+        for pct, value in zip(PERCENTILES, rates):
+            row[f'p{pct}'] = value
+        return row
+
+    def _group_numpy(self, by, blocks, codes):
+        def column(name):
+            return np.concatenate([np.frombuffer(block.columns[name], dtype=np.intc) for _, block in blocks])
+
+        terms = np.concatenate([np.full(len(block), term, dtype=np.intc) for term, block in blocks])
+        mask = np.ones(len(terms), dtype=bool)
+        for name, code in codes.items():
+            mask &= column(name) == code
+        grades = [column(grade)[mask].astype(np.int64) for grade in GRADES]
+        if by == 'year':
+            keys = terms[mask] // 10
+        elif by == 'term':
+            keys = terms[mask]
+        else:
+            keys = column(by)[mask]
+        if not len(keys):
+            return [], None
+
+        total = grades[0] + grades[1] + grades[2] + grades[3]
+        rates = (grades[0] + grades[1] + grades[2]) * 100.0 / total
+        groups, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = [np.bincount(inverse, weights=g, minlength=len(groups)) for g in grades]
+        # Sort rates within each group once, then read each group's percentiles from its slice
+        ordered = rates[np.lexsort((rates, inverse))]
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        rows = []
+        for i, key in enumerate(groups):
+            chunk = ordered[bounds[i]:bounds[i + 1]]
+            rows.append(self._row(by, int(key), int(counts[i]), [int(s[i]) for s in sums],
+                                  [float(v) for v in np.percentile(chunk, PERCENTILES)]))
+        overall = self._row(None, None, int(len(keys)), [int(g.sum()) for g in grades],
+                            [float(v) for v in np.percentile(rates, PERCENTILES)])
+        return rows, overall
+
+    def _group_python(self, by, blocks, codes):
+        groups = {}   # key -> [evaluations, A, B, C, F, rates]
+        every = [0, 0, 0, 0, 0, []]
+        for term, block in blocks:
+            cols = block.columns
+            filter_cols = [(cols[name], code) for name, code in codes.items()]
+            key_col = None if by in ('year', 'term') else cols[by]
+            fixed_key = term // 10 if by == 'year' else term
+            a_col, b_col, c_col, f_col = (cols[grade] for grade in GRADES)
+            for i in range(len(block)):
+                if any(col[i] != code for col, code in filter_cols):
+                    continue
+                a, b, c, f = a_col[i], b_col[i], c_col[i], f_col[i]
+                rate = (a + b + c) * 100.0 / (a + b + c + f)
+                key = fixed_key if key_col is None else key_col[i]
+                for acc in (groups.setdefault(key, [0, 0, 0, 0, 0, []]), every):
+                    acc[0] += 1
+                    acc[1] += a
+                    acc[2] += b
+                    acc[3] += c
+                    acc[4] += f
+                    acc[5].append(rate)
+        if not groups:
+            return [], None
+
+        def percentiles(rates):
+            rates.sort()
+            return [_percentile(rates, pct) for pct in PERCENTILES]
+
+        rows = [self._row(by, key, acc[0], acc[1:5], percentiles(acc[5])) for key, acc in sorted(groups.items())]
+        return rows, self._row(None, None, every[0], every[1:5], percentiles(every[5]))
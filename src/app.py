@@ -1,9 +1,26 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-import mysql.connector
-from mysql.connector import errorcode
+from flask import Flask, render_template, request, redirect, url_for, flash, g, jsonify, Response, session, \
+    before_render_template, send_file, template_rendered
+from markupsafe import Markup, escape
 import configparser
+import io
+import json
 import os
+import time
 from datetime import datetime
+from db_backend import DB_ERRORS, ER_DUP_ENTRY, connect_factory, replica_factories
+from db_pool import ConnectionPool, PoolTimeout
+from db_router import ReplicaRouter
+from ref_cache import ReferenceCache
+from report_cache import ReportCache, report_key
+from export import EXPORT_FORMATS, stream_rows
+from json_api import decode_cursor, encode_cursor, keyset, order_by, page_body, page_limit
+from evaluation_store import refresh_evaluation_progress, write_evaluations
+from bulk_import import IMPORTERS, run_import
+from bulk_archive import ACTIONS, Scope, count_scope, retire_sections, run_archive
+from instrumentation import InstrumentedConnection, Metrics, RequestStats, render_gauges
+from parallel import ParallelQueries, QueryTimeout, fetch_all, fetch_one
+from analytics import OutcomeStore
+from report_jobs import JobRejected, JobRunner
 
 app = Flask(__name__)
 app.secret_key = 'super_secret_key'
@@ -13,18 +30,219 @@ config = configparser.ConfigParser()
 config.read('config.ini')
 
 
+def make_pool(connect):
+    return ConnectionPool(
+        connect,
+        size=config.getint('pool', 'size', fallback=5),
+        max_overflow=config.getint('pool', 'max_overflow', fallback=5),
+        timeout=config.getfloat('pool', 'timeout', fallback=10),
+        recycle=config.getint('pool', 'recycle', fallback=3600),
+        pre_ping=config.getboolean('pool', 'pre_ping', fallback=True)
+    )
+
+
+pool = make_pool(connect_factory(config))
+
+# Optional read replicas, used by the views marked with @replica_reads
+router = ReplicaRouter(pool, [(host, make_pool(connect)) for host, connect in replica_factories(config)],
+                       max_lag=config.getfloat('replicas', 'max_lag', fallback=5),
+                       check_interval=config.getfloat('replicas', 'check_interval', fallback=5))
+
+
+parallel = ParallelQueries(pool, workers=config.getint('reports', 'workers', fallback=16))
+
+outcomes = OutcomeStore(max_age=config.getint('analytics', 'max_age', fallback=3600))
+
+metrics = Metrics(
+    slow_query_ms=config.getint('instrumentation', 'slow_query_ms', fallback=200),
+    slow_log_path=config.get('instrumentation', 'slow_query_log', fallback='slow_queries.log')
+)
+
+
+def replica_reads(*methods):
+    """Marks a view whose requests by `methods` (default GET) only read, so they may use a read replica."""
+    def mark(view):
+        view.replica_methods = set(methods or ('GET',)) | {'HEAD'}
+        return view
+    return mark
+
+
+def request_replica():
+    """The replica this request reads from, chosen on first use; None for the primary."""
+    if 'replica' not in g:
+        g.replica, g.replica_as_of = None, None
+        if router.replicas:
+            view = app.view_functions.get(request.endpoint)
+            if request.method in getattr(view, 'replica_methods', ()):
+                # A browser that wrote recently waits for a replica that has its write
+                g.replica = router.read_replica(session.get('wrote_at', 0.0))
+                g.replica_as_of = g.replica.caught_up_to if g.replica else None
+            else:
+                g.wrote = True
+    return g.replica
+
+
+def read_as_of():
+    # Every write committed before this time is visible to this request's reads
+    return g.replica_as_of if request_replica() is not None else time.time()
+
+
+def read_pool():
+    replica = request_replica()
+    if replica is not None:
+        try:
+            # One checkout up front, so the report queries are not all sent to a replica that is down
+            replica.pool.checkout().close()
+        except DB_ERRORS + (PoolTimeout,) as err:
+            router.mark_down(replica, err)
+            g.replica = None
+            return pool
+    return replica.pool if replica is not None else pool
+
+
+def checkout_for_request():
+    replica = request_replica()
+    if replica is not None:
+        try:
+            return replica.pool.checkout()
+        except DB_ERRORS + (PoolTimeout,) as err:
+            # Down since its last check; the rest of this request reads from the primary
+            router.mark_down(replica, err)
+            g.replica = None
+    return pool.checkout()
+
+
 def get_db_connection():
-    try:
-        conn = mysql.connector.connect(
-            host=config['mysql']['host'],
-            user=config['mysql']['user'],
-            password=config['mysql']['password'],
-            database=config['mysql']['database']
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(f"Error connecting to DB: {err}")
-        return None
+    # One pooled connection per request; conn.close() hands it back to the pool
+    conn = g.get('db')
+    if conn is None or conn.closed:
+        try:
+            g.db = checkout_for_request()
+        except DB_ERRORS + (PoolTimeout,) as err:
+            print(f"Error connecting to DB: {err}")
+            return None
+    stats = g.get('stats')
+    return InstrumentedConnection(g.db, stats) if stats is not None else g.db
+
+
+def primary_connection():
+    # For reads that fill a store shared by every user, which must not lag behind a write
+    if request_replica() is None:
+        return get_db_connection()
+    stats = g.get('stats')
+    conn = pool.checkout()
+    return InstrumentedConnection(conn, stats) if stats is not None else conn
+
+
+ref_cache = ReferenceCache(ttl=config.getint('cache', 'ttl', fallback=300))
+report_cache = ReportCache(ttl=config.getint('cache', 'report_ttl', fallback=300),
+                           max_bytes=config.getint('cache', 'report_max_mb', fallback=32) * 1024 * 1024)
+
+# Dropdown lists shared by the forms and reports: name -> (query, tables it reads)
+REFERENCE_QUERIES = {
+    'active_degrees': ("SELECT * FROM Degree WHERE status='Active'", ('Degree',)),
+    'degrees': ("SELECT * FROM Degree ORDER BY degree_name, degree_level", ('Degree',)),
+    'courses': ("SELECT course_code, course_name, status FROM Course ORDER BY course_code", ('Course',)),
+    'instructors': ("SELECT instructor_id, first_name, last_name, status FROM Instructor ORDER BY last_name",
+                    ('Instructor',)),
+    'active_instructors': ("SELECT * FROM Instructor WHERE status='Active'", ('Instructor',)),
+    'objectives': ("SELECT * FROM Objective", ('Objective',)),
+}
+
+
+def get_reference(name, cursor, as_of=None):
+    sql, tables = REFERENCE_QUERIES[name]
+
+    def load():
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+    return ref_cache.get(name, tables, load, as_of if as_of is not None else read_as_of())
+
+
+# How a reference list is shown in a <select>: style -> row -> (value, label)
+# Per style: (value, label) for a row, and the (class attribute, label suffix) that marks an inactive row
+ARCHIVED = (' class="text-muted bg-light"', ' (Archived)')
+OPTION_STYLES = {
+    'degree': (lambda d: (f"{d['degree_name']}|{d['degree_level']}", f"{d['degree_name']} ({d['degree_level']})"), None),
+    'degree_status': (lambda d: (f"{d['degree_name']}|{d['degree_level']}", f"{d['degree_name']} ({d['degree_level']})"),
+                      ('', ' - archived')),
+    'course': (lambda c: (c['course_code'], f"{c['course_code']} - {c['course_name']}"), None),
+    'course_status': (lambda c: (c['course_code'], f"{c['course_code']}: {c['course_name']}"), ARCHIVED),
+    'course_code': (lambda c: (c['course_code'], c['course_code']), None),
+    'instructor': (lambda i: (i['instructor_id'], f"{i['last_name']}, {i['first_name']}"), None),
+    'instructor_status': (lambda i: (i['instructor_id'], f"{i['last_name']}, {i['first_name']}"), ARCHIVED),
+    'objective': (lambda o: (o['obj_code'], f"{o['obj_code']} - {o['title']}"), None),
+    'objective_code': (lambda o: (o['obj_code'], o['obj_code']), None),
+}
+
+
+def render_options(rows, style):
+    option, inactive = OPTION_STYLES[style]
+    parts = []
+    for row in rows:
+        value, label = option(row)
+        attrs, suffix = inactive if inactive and row.get('status') == 'Inactive' else ('', '')
+        parts.append(f'<option value="{escape(value)}"{attrs}>{escape(label)}{suffix}</option>')
+    return ''.join(parts)
+
+
+@app.template_global()
+def options(reference, rows, style, selected=None):
+    """
+        The <option> tags for a reference list, as `{{ options('courses', courses, 'course') }}`.
+        With thousands of courses this is most of a form's render time, so the HTML is cached
+        with the list in ref_cache and dropped whenever the list is; `selected` is marked on
+        the cached HTML afterwards. `rows` is only rendered directly if the list is not cached.
+    """
+    html = ref_cache.fragment(reference, ('options', style), lambda cached: render_options(cached, style))
+    if html is None:
+        html = render_options(rows, style)
+    if selected:
+        attr = f'value="{escape(selected)}"'
+        html = html.replace(attr, attr + ' selected', 1)
+    return Markup(html)
+
+
+@app.before_request
+def start_request_stats():
+    g.stats = RequestStats(request.url_rule.rule if request.url_rule else 'unmatched')
+
+
+@app.after_request
+def remember_write(response):
+    # Until a replica has caught up past this request's writes, its browser reads from the primary
+    if g.get('wrote'):
+        session['wrote_at'] = time.time()
+    return response
+
+
+@app.teardown_request
+def finish_request_stats(exc):
+    stats = g.pop('stats', None)
+    if stats is not None:
+        metrics.finish(stats)
+
+
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    started, stats = g.pop('render_started', None), g.get('stats')
+    if started is not None and stats is not None:
+        stats.render_seconds += time.perf_counter() - started
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
 
 
 def safe_int(value, default):
@@ -34,6 +252,22 @@ def safe_int(value, default):
         return default
 
 
+TERM_ORDER = {'Spring': 1, 'Summer': 2, 'Fall': 3}
+
+
+def term_key(semester, year, default_sem='Spring'):
+    # Same encoding as the generated term_key column: year * 10 + 1/2/3
+    return year * 10 + TERM_ORDER.get(semester, TERM_ORDER[default_sem])
+
+
+def entry_status(actual, expected):
+    if actual == 0:
+        return 'Not Entered'
+    if actual < expected:
+        return 'Partially Entered'
+    return 'Entered'
+
+
 # --- ROUTES ---
 
 @app.route('/')
@@ -41,22 +275,121 @@ def index():
     return render_template('index.html')
 
 
+@app.route('/pool_stats')
+def pool_stats():
+    return jsonify(pool.stats())
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(ref_cache.stats())
+
+
+@app.route('/replica_stats')
+def replica_stats():
+    return jsonify(router.stats())
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    lines = metrics.render() + render_gauges('app_db_pool', pool.stats()) + render_gauges('app_ref_cache',
+                                                                                            ref_cache.stats())
+    lines += render_gauges('app_outcome_store', outcomes.stats()) + render_gauges('app_report_cache',
+                                                                                  report_cache.stats())
+    lines += jobs.render() + render_gauges('app_report_jobs', jobs.stats())
+    lines += render_gauges('app_db_replicas', router.stats())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
 # --- MANAGE DATA ---
+PAGE_SIZE = 50
+
+
 @app.route('/manage_data')
+@replica_reads()
 def manage_data():
+    # One tab is loaded per request, a page at a time, seeking past the last key shown (keyset pagination)
+    tab = request.args.get('tab', 'instructors')
+    after = request.args.get('after')
+    filters = {
+        'status': request.args.get('status', ''),
+        'prefix': request.args.get('prefix', '').strip(),
+        'start_sem': request.args.get('start_sem', ''),
+        'start_year': request.args.get('start_year', ''),
+        'end_sem': request.args.get('end_sem', ''),
+        'end_year': request.args.get('end_year', ''),
+    }
+    where, params = [], []
+
+    if tab in ('instructors', 'degrees', 'courses') and filters['status'] in ('Active', 'Inactive'):
+        where.append("status = %s")
+        params.append(filters['status'])
+    if tab in ('courses', 'sections') and filters['prefix']:
+        where.append("course_code LIKE %s")
+        params.append(filters['prefix'].replace('%', r'\%').replace('_', r'\_') + '%')
+
+    active_filters = {key: value for key, value in filters.items() if value}
+    try:
+        if tab == 'degrees':
+            if after:
+                where.append("(degree_name > %s OR (degree_name = %s AND degree_level > %s))")
+                name, level = after.split('|')
+                params.extend([name, name, level])
+            sql, order = "SELECT * FROM Degree", "ORDER BY degree_name, degree_level"
+        elif tab == 'courses':
+            if after:
+                where.append("course_code > %s")
+                params.append(after)
+            sql, order = "SELECT * FROM Course", "ORDER BY course_code"
+        elif tab == 'sections':
+            if filters['start_year']:
+                where.append("term_key >= %s")
+                params.append(term_key(filters['start_sem'], safe_int(filters['start_year'], 0)))
+            if filters['end_year']:
+                where.append("term_key <= %s")
+                params.append(term_key(filters['end_sem'], safe_int(filters['end_year'], 0), 'Fall'))
+            if after:
+                a_term, a_code, a_sec = after.split('|')
+                where.append("(term_key < %s OR (term_key = %s AND (course_code < %s OR (course_code = %s AND section_num < %s))))")
+                params.extend([a_term, a_term, a_code, a_code, a_sec])
+            # All keys descending so the seek and the sort both walk idx_section_term backwards
+            sql, order = "SELECT * FROM Section", "ORDER BY term_key DESC, course_code DESC, section_num DESC"
+        else:
+            tab = 'instructors'
+            if after:
+                where.append("instructor_id > %s")
+                params.append(after)
+            sql, order = "SELECT * FROM Instructor", "ORDER BY instructor_id"
+    except ValueError:
+        # A hand-edited or truncated ?after= does not split into the tab's keys
+        flash('Error: That page link is no longer valid.', 'danger')
+        return render_template('manage_data.html', tab=tab, rows=[], filters=filters, next_url=None,
+                               first_url=url_for('manage_data', tab=tab, **active_filters))
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Degree")
-    degrees = cursor.fetchall()
-    cursor.execute("SELECT * FROM Course")
-    courses = cursor.fetchall()
-    cursor.execute("SELECT * FROM Instructor")
-    instructors = cursor.fetchall()
-    cursor.execute("SELECT * FROM Section ORDER BY year_offered DESC, semester")
-    sections = cursor.fetchall()
+    cursor.execute(f"{sql} {order} LIMIT %s", params + [PAGE_SIZE + 1])
+    rows = cursor.fetchall()
     conn.close()
-    return render_template('manage_data.html', degrees=degrees, courses=courses, instructors=instructors,
-                           sections=sections)
+
+    next_url = None
+    if len(rows) > PAGE_SIZE:
+        rows = rows[:PAGE_SIZE]
+        last = rows[-1]
+        if tab == 'degrees':
+            next_after = f"{last['degree_name']}|{last['degree_level']}"
+        elif tab == 'courses':
+            next_after = last['course_code']
+        elif tab == 'sections':
+            next_after = f"{last['term_key']}|{last['course_code']}|{last['section_num']}"
+        else:
+            next_after = last['instructor_id']
+        next_url = url_for('manage_data', tab=tab, after=next_after, **active_filters)
+
+    return render_template('manage_data.html', tab=tab, rows=rows, filters=filters, next_url=next_url,
+                           first_url=url_for('manage_data', tab=tab, **active_filters) if after else None)
 
 
 @app.route('/delete_item/<item_type>/<id>')
@@ -65,8 +398,10 @@ def delete_item(item_type, id):
     cursor = conn.cursor()
     try:
         if item_type == 'instructor':
-            cursor.execute("SELECT COUNT(*) FROM Teaches WHERE instructor_id = %s", (id,))
-            if cursor.fetchone()[0] > 0:
+            # Archived sections still show in the reports, so they count as history too
+            cursor.execute("""SELECT EXISTS (SELECT 1 FROM Teaches WHERE instructor_id = %s)
+                                     OR EXISTS (SELECT 1 FROM Teaches_Archive WHERE instructor_id = %s)""", (id, id))
+            if cursor.fetchone()[0]:
                 cursor.execute("UPDATE Instructor SET status = 'Inactive' WHERE instructor_id = %s", (id,))
                 flash(f'Instructor {id} archived (History preserved).', 'info')
             else:
@@ -75,10 +410,11 @@ def delete_item(item_type, id):
 
         elif item_type == 'degree':
             name, level = id.split('|')
-            cursor.execute("""SELECT (SELECT COUNT(*) FROM Degree_Course WHERE degree_name=%s AND degree_level=%s) + 
-                                     (SELECT COUNT(*) FROM Degree_Objective WHERE degree_name=%s AND degree_level=%s)""",
+            # EXISTS stops at the first mapping instead of counting them all
+            cursor.execute("""SELECT EXISTS (SELECT 1 FROM Degree_Course WHERE degree_name=%s AND degree_level=%s)
+                                     OR EXISTS (SELECT 1 FROM Degree_Objective WHERE degree_name=%s AND degree_level=%s)""",
                            (name, level, name, level))
-            if cursor.fetchone()[0] > 0:
+            if cursor.fetchone()[0]:
                 cursor.execute("UPDATE Degree SET status = 'Inactive' WHERE degree_name=%s AND degree_level=%s",
                                (name, level))
                 flash(f'Degree {name} archived.', 'info')
@@ -87,21 +423,24 @@ def delete_item(item_type, id):
                 flash(f'Degree {name} permanently deleted.', 'warning')
 
         elif item_type == 'course':
-            cursor.execute("""SELECT (SELECT COUNT(*) FROM Section WHERE course_code=%s) + 
-                                     (SELECT COUNT(*) FROM Degree_Course WHERE course_code=%s)""", (id, id))
-            if cursor.fetchone()[0] > 0:
+            cursor.execute("""SELECT EXISTS (SELECT 1 FROM Section WHERE course_code=%s)
+                                     OR EXISTS (SELECT 1 FROM Section_Archive WHERE course_code=%s)
+                                     OR EXISTS (SELECT 1 FROM Degree_Course WHERE course_code=%s)""", (id, id, id))
+            if cursor.fetchone()[0]:
                 cursor.execute("UPDATE Course SET status = 'Inactive' WHERE course_code=%s", (id,))
                 flash(f'Course {id} archived.', 'info')
             else:
                 cursor.execute("DELETE FROM Course WHERE course_code=%s", (id,))
                 flash(f'Course {id} permanently deleted.', 'warning')
         conn.commit()
-    except mysql.connector.Error as err:
+        report_cache.bump()
+        ref_cache.invalidate(item_type.capitalize())
+    except DB_ERRORS as err:
         conn.rollback()
         flash(f'Database Error: {err.msg}', 'danger')
     finally:
         conn.close()
-    return redirect(url_for('manage_data'))
+    return redirect(url_for('manage_data', tab=f'{item_type}s'))
 
 
 @app.route('/reactivate_item/<item_type>/<id>')
@@ -118,12 +457,14 @@ def reactivate_item(item_type, id):
         elif item_type == 'course':
             cursor.execute("UPDATE Course SET status = 'Active' WHERE course_code=%s", (id,))
         conn.commit()
+        report_cache.bump()
+        ref_cache.invalidate(item_type.capitalize())
         flash(f'{item_type.capitalize()} restored to Active status.', 'success')
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         flash(f'Error: {err.msg}', 'danger')
     finally:
         conn.close()
-    return redirect(url_for('manage_data'))
+    return redirect(url_for('manage_data', tab=f'{item_type}s'))
 
 
 @app.route('/delete_section/<c_code>/<sec_num>/<sem>/<year>')
@@ -131,29 +472,21 @@ def delete_section(c_code, sec_num, sem, year):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "DELETE FROM Evaluation WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
-            (c_code, sec_num, sem, year))
-        cursor.execute(
-            "DELETE FROM Evaluation_Method WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
-            (c_code, sec_num, sem, year))
-        cursor.execute(
-            "DELETE FROM Teaches WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
-            (c_code, sec_num, sem, year))
-        cursor.execute(
-            "DELETE FROM Section WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
-            (c_code, sec_num, sem, year))
+        retire_sections(cursor, 'purge', [(c_code, sec_num, sem, year)])
         conn.commit()
+        report_cache.bump()
+        outcomes.mark_stale(term_key(sem, safe_int(year, 0)))
         flash('Section deleted.', 'warning')
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         conn.rollback()
         flash(f'Error: {err.msg}', 'danger')
     finally:
         conn.close()
-    return redirect(url_for('manage_data'))
+    return redirect(url_for('manage_data', tab='sections'))
 
 
 @app.route('/edit_instructor/<id>', methods=['GET', 'POST'])
+@replica_reads()
 def edit_instructor(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -164,9 +497,11 @@ def edit_instructor(id):
                 (request.form['first_name'], request.form['last_name'], request.form['email'], request.form['phone'],
                  id))
             conn.commit()
+            report_cache.bump()
+            ref_cache.invalidate('Instructor')
             flash('Instructor updated!', 'success')
-            return redirect(url_for('manage_data'))
-        except mysql.connector.Error as err:
+            return redirect(url_for('manage_data', tab='instructors'))
+        except DB_ERRORS as err:
             flash(f'Error: {err.msg}', 'danger')
     cursor.execute("SELECT * FROM Instructor WHERE instructor_id=%s", (id,))
     instructor = cursor.fetchone()
@@ -175,6 +510,7 @@ def edit_instructor(id):
 
 
 @app.route('/edit_section/<c_code>/<sec_num>/<sem>/<year>', methods=['GET', 'POST'])
+@replica_reads()
 def edit_section(c_code, sec_num, sem, year):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -184,9 +520,10 @@ def edit_section(c_code, sec_num, sem, year):
                 "UPDATE Section SET num_enrollments=%s WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
                 (request.form['enrollments'], c_code, sec_num, sem, year))
             conn.commit()
+            report_cache.bump()
             flash('Section updated!', 'success')
-            return redirect(url_for('manage_data'))
-        except mysql.connector.Error as err:
+            return redirect(url_for('manage_data', tab='sections'))
+        except DB_ERRORS as err:
             flash(f'Error: {err.msg}', 'danger')
     cursor.execute("SELECT * FROM Section WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s",
                    (c_code, sec_num, sem, year))
@@ -215,9 +552,11 @@ def add_degree():
                         "INSERT INTO Degree (degree_name, degree_level, description, status) VALUES (%s, %s, %s, 'Active')",
                         (name, level, desc))
                     conn.commit()
+                    report_cache.bump()
+                    ref_cache.invalidate('Degree')
                     flash('Degree added!', 'success')
                     return redirect(url_for('index'))
-            except mysql.connector.Error as err:
+            except DB_ERRORS as err:
                 flash(f'Database Error: {err.msg}', 'danger')
             finally:
                 conn.close()
@@ -225,6 +564,7 @@ def add_degree():
 
 
 @app.route('/add_course', methods=['GET', 'POST'])
+@replica_reads()
 def add_course():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -237,24 +577,25 @@ def add_course():
             try:
                 cursor.execute("INSERT INTO Course (course_code, course_name, status) VALUES (%s, %s, 'Active')",
                                (c_code, c_name))
-            except mysql.connector.Error as err:
-                if err.errno != errorcode.ER_DUP_ENTRY: raise err
+            except DB_ERRORS as err:
+                if err.errno != ER_DUP_ENTRY: raise err
 
             cursor.execute(
                 "INSERT INTO Degree_Course (degree_name, degree_level, course_code, is_core) VALUES (%s, %s, %s, %s)",
                 (deg_name, deg_level, c_code, is_core))
             conn.commit()
+            report_cache.bump()
+            ref_cache.invalidate('Course')
             flash(f'Course {c_code} linked to {deg_name}!', 'success')
             return redirect(url_for('index'))
-        except mysql.connector.Error as err:
+        except DB_ERRORS as err:
             conn.rollback()
-            if err.errno == errorcode.ER_DUP_ENTRY:
+            if err.errno == ER_DUP_ENTRY:
                 flash(f'Error: Course {c_code} is ALREADY linked to {deg_name}.', 'danger')
             else:
                 flash(f'Error: {err.msg}', 'danger')
 
-    cursor.execute("SELECT degree_name, degree_level FROM Degree WHERE status = 'Active'")
-    degrees = cursor.fetchall()
+    degrees = get_reference('active_degrees', cursor)
     conn.close()
     return render_template('add_course.html', degrees=degrees)
 
@@ -271,10 +612,12 @@ def add_instructor():
                     (request.form['instructor_id'], request.form['first_name'], request.form['middle_name'],
                      request.form['last_name'], request.form['email'], request.form['phone']))
                 conn.commit()
+                report_cache.bump()
+                ref_cache.invalidate('Instructor')
                 flash(f'Instructor added!', 'success')
                 return redirect(url_for('index'))
-            except mysql.connector.Error as err:
-                if err.errno == errorcode.ER_DUP_ENTRY:
+            except DB_ERRORS as err:
+                if err.errno == ER_DUP_ENTRY:
                     flash(f'Error: Instructor ID "{request.form["instructor_id"]}" is already assigned.', 'danger')
                 else:
                     flash(f'Error: {err.msg}', 'danger')
@@ -284,6 +627,7 @@ def add_instructor():
 
 
 @app.route('/add_section', methods=['GET', 'POST'])
+@replica_reads()
 def add_section():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -332,26 +676,95 @@ def add_section():
             cursor.execute(
                 "INSERT INTO Teaches (course_code, section_num, semester, year_offered, instructor_id) VALUES (%s, %s, %s, %s, %s)",
                 (c_code, sec_num, sem, year, inst_id))
+            refresh_evaluation_progress(cursor, [(c_code, sec_num, sem, year)])
             conn.commit()
+            report_cache.bump()
             flash(f'Section {sec_num} added successfully!', 'success')
             return redirect(url_for('index'))
-        except mysql.connector.Error as err:
+        except DB_ERRORS as err:
             conn.rollback()
-            if err.errno == errorcode.ER_DUP_ENTRY:
+            if err.errno == ER_DUP_ENTRY:
                 flash(f'Error: Section {sec_num} for {c_code} in {sem} {year} already exists!', 'danger')
             else:
                 flash(f'Error: {err.msg}', 'danger')
 
-    cursor.execute("SELECT course_code, course_name, status FROM Course ORDER BY course_code")
-    courses = cursor.fetchall()
-    cursor.execute("SELECT instructor_id, first_name, last_name, status FROM Instructor ORDER BY last_name")
-    instructors = cursor.fetchall()
+    courses = get_reference('courses', cursor)
+    instructors = get_reference('instructors', cursor)
     conn.close()
     return render_template('add_section.html', courses=courses, instructors=instructors)
 
 
+@app.route('/bulk_import', methods=['GET', 'POST'])
+def bulk_import():
+    report = None
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+        if kind not in IMPORTERS or not upload or not upload.filename:
+            flash('Error: Choose what to import and a CSV file.', 'danger')
+            return redirect(url_for('bulk_import'))
+        conn = get_db_connection()
+        try:
+            report = run_import(conn, kind, io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+        finally:
+            conn.close()
+        if report.imported:
+            report_cache.bump()
+        if kind == 'instructors':
+            ref_cache.invalidate('Instructor')
+        elif kind == 'evaluations':
+            outcomes.mark_all_stale()
+        flash(f'{report.imported} of {report.rows} rows imported.', 'success' if not report.errors else 'warning')
+    return render_template('bulk_import.html', report=report, kinds=IMPORTERS)
+
+
+@app.route('/bulk_archive', methods=['GET', 'POST'])
+@replica_reads()
+def bulk_archive():
+    # Preview counts what is in scope; run works through it for a few seconds per request,
+    # and Continue picks up where the last request stopped
+    form = request.form
+    counts = report = scope = None
+    if request.method == 'POST':
+        start_year, end_year = safe_int(form.get('start_year'), 0), safe_int(form.get('end_year'), 0)
+        try:
+            scope = Scope(term_key(form.get('start_sem'), start_year) if start_year else None,
+                          term_key(form.get('end_sem'), end_year, 'Fall') if end_year else None,
+                          form.get('course_code'), form.get('degree_selection'))
+        except ValueError as err:
+            flash(f'Error: {err}', 'danger')
+            return redirect(url_for('bulk_archive'))
+        conn = get_db_connection()
+        try:
+            counts = count_scope(conn.cursor(), scope)
+            if form.get('step') == 'run' and form.get('action') in ACTIONS:
+                report = run_archive(conn, form.get('action'), scope,
+                                     chunk_size=config.getint('archive', 'chunk_size', fallback=100),
+                                     time_budget=config.getfloat('archive', 'time_budget', fallback=5),
+                                     totals=counts)
+        except DB_ERRORS as err:
+            conn.rollback()
+            flash(f'Database Error: {err.msg}. Completed chunks are kept; run again to continue.', 'danger')
+        finally:
+            conn.close()
+        if report is not None and report.chunks:
+            report_cache.bump()
+            outcomes.mark_stale(*report.terms)
+        if report is not None and report.finished:
+            flash(f"{report.action.capitalize()} finished: nothing is left in scope "
+                  f"({report.sections} sections in this last step).", 'success')
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    degrees, courses = get_reference('degrees', cursor), get_reference('courses', cursor)
+    conn.close()
+    return render_template('bulk_archive.html', degrees=degrees, courses=courses, form=form, counts=counts,
+                           report=report, scope=scope)
+
+
 # --- MAPPING & EVALUATION ---
 @app.route('/manage_objectives', methods=['GET', 'POST'])
+@replica_reads()
 def manage_objectives():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -362,8 +775,10 @@ def manage_objectives():
                 cursor.execute("INSERT INTO Objective (obj_code, title, description) VALUES (%s, %s, %s)",
                                (request.form['obj_code'], request.form['title'], request.form['description']))
                 conn.commit()
+                report_cache.bump()
+                ref_cache.invalidate('Objective')
                 flash('Objective created!', 'success')
-            except mysql.connector.Error as err:
+            except DB_ERRORS as err:
                 flash(f'Error: {err.msg}', 'danger')
         elif action == 'link_obj_degree':
             d_data = request.form['degree_selection'].split('|')
@@ -371,18 +786,18 @@ def manage_objectives():
                 cursor.execute("INSERT INTO Degree_Objective (degree_name, degree_level, obj_code) VALUES (%s, %s, %s)",
                                (d_data[0], d_data[1], request.form['obj_code_selection']))
                 conn.commit()
+                report_cache.bump()
                 flash('Linked Objective!', 'success')
-            except mysql.connector.Error as err:
+            except DB_ERRORS as err:
                 flash(f'Error: {err.msg}', 'danger')
-    cursor.execute("SELECT * FROM Degree WHERE status='Active'")
-    degrees = cursor.fetchall()
-    cursor.execute("SELECT * FROM Objective")
-    objectives = cursor.fetchall()
+    degrees = get_reference('active_degrees', cursor)
+    objectives = get_reference('objectives', cursor)
     conn.close()
     return render_template('manage_objectives.html', degrees=degrees, objectives=objectives)
 
 
 @app.route('/map_course_objective', methods=['GET', 'POST'])
+@replica_reads()
 def map_course_objective():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -393,9 +808,12 @@ def map_course_objective():
             cursor.execute(
                 "INSERT INTO Course_Objective (degree_name, degree_level, course_code, obj_code) VALUES (%s, %s, %s, %s)",
                 (d_name, d_level, request.form['course_code'], request.form['obj_code']))
+            # Every section of the course now expects one more objective for this degree
+            refresh_evaluation_progress(cursor, course_code=request.form['course_code'], degree=(d_name, d_level))
             conn.commit()
+            report_cache.bump()
             flash('Mapped successfully!', 'success')
-        except mysql.connector.Error as err:
+        except DB_ERRORS as err:
             flash(f'Error: {err.msg}', 'danger')
         return redirect(url_for('map_course_objective', degree=d_str))
     selected_degree = request.args.get('degree')
@@ -410,14 +828,24 @@ def map_course_objective():
             "SELECT O.obj_code, O.title FROM Degree_Objective DO JOIN Objective O ON DO.obj_code=O.obj_code WHERE DO.degree_name=%s AND DO.degree_level=%s",
             (d_name, d_level))
         degree_objs = cursor.fetchall()
-    cursor.execute("SELECT degree_name, degree_level FROM Degree WHERE status='Active'")
-    all_degrees = cursor.fetchall()
+    all_degrees = get_reference('active_degrees', cursor)
     conn.close()
     return render_template('map_course_objective.html', all_degrees=all_degrees, selected_degree=selected_degree,
                            courses=degree_courses, objectives=degree_objs)
 
 
+def selection_query(form, after=None, limit=None):
+    # An instructor's sections in one term, with how many of the degree's objectives are graded (from Evaluation_Progress).
+    # Only sections that can still be graded: archived ones are left out (Report 5 lists them)
+    d_name, d_level = form.get('degree_selection').split('|')
+    return listing("SELECT S.course_code, S.section_num, C.course_name, COALESCE(P.entered, 0) as eval_count, COALESCE(P.expected, 0) as expected_count FROM Teaches T JOIN Section S ON T.course_code=S.course_code AND T.section_num=S.section_num AND T.semester=S.semester AND T.year_offered=S.year_offered JOIN Course C ON S.course_code=C.course_code LEFT JOIN Evaluation_Progress P ON P.course_code=S.course_code AND P.section_num=S.section_num AND P.semester=S.semester AND P.year_offered=S.year_offered AND P.degree_name=%s AND P.degree_level=%s",
+                   ["T.instructor_id=%s", "S.semester=%s", "S.year_offered=%s"],
+                   (d_name, d_level, form.get('instructor_id'), form.get('semester'), form.get('year')),
+                   ('S.course_code', 'S.section_num'), after, limit, descending=False)
+
+
 @app.route('/evaluation_selection', methods=['GET', 'POST'])
+@replica_reads('GET', 'POST')
 def evaluation_selection():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -425,21 +853,24 @@ def evaluation_selection():
     if request.method == 'POST':
         d_str, sem, yr, inst_id = request.form['degree_selection'], request.form['semester'], request.form['year'], \
         request.form['instructor_id']
-        d_name, d_level = d_str.split('|')
         context = {'degree_str': d_str, 'semester': sem, 'year': yr, 'instructor_id': inst_id}
-        sql = """SELECT S.course_code, S.section_num, C.course_name, (SELECT COUNT(*) FROM Evaluation E WHERE E.course_code = S.course_code AND E.section_num = S.section_num AND E.semester = S.semester AND E.year_offered = S.year_offered AND E.degree_name = %s AND E.degree_level = %s) as eval_count FROM Teaches T JOIN Section S ON T.course_code=S.course_code AND T.section_num=S.section_num AND T.semester=S.semester AND T.year_offered=S.year_offered JOIN Course C ON S.course_code=C.course_code WHERE T.instructor_id=%s AND S.semester=%s AND S.year_offered=%s"""
-        cursor.execute(sql, (d_name, d_level, inst_id, sem, yr))
+        cursor.execute(*selection_query(request.form))
         sections_found = cursor.fetchall()
-    cursor.execute("SELECT * FROM Degree WHERE status='Active'")
-    degrees = cursor.fetchall()
-    cursor.execute("SELECT * FROM Instructor WHERE status='Active'")
-    instructors = cursor.fetchall()
+        if not sections_found:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM Teaches_Archive WHERE instructor_id=%s AND term_key=%s) AS archived",
+                           (inst_id, term_key(sem, safe_int(yr, 0))))
+            if cursor.fetchone()['archived']:
+                flash(f'The sections of {sem} {yr} have been archived and can no longer be graded; '
+                      'Report 5 (Evaluation Status) still shows them.', 'info')
+    degrees = get_reference('active_degrees', cursor)
+    instructors = get_reference('active_instructors', cursor)
     conn.close()
     return render_template('evaluation_selection.html', degrees=degrees, instructors=instructors,
                            sections=sections_found, context=context)
 
 
 @app.route('/enter_evaluation_form', methods=['GET', 'POST'])
+@replica_reads()
 def enter_evaluation_form():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -467,56 +898,60 @@ def enter_evaluation_form():
                 return redirect(url_for('index'))
             limit = section_data['num_enrollments']
 
-            objectives_submitted = set(
-                [key.replace('count_A_', '') for key in request.form if key.startswith('count_A_')])
+            objectives_submitted = sorted(
+                set([key.replace('count_A_', '') for key in request.form if key.startswith('count_A_')]))
 
-            # --- MODIFIED ERROR MESSAGE HERE ---
+            counts = {}
             for obj_code in objectives_submitted:
-                total = int(request.form.get(f'count_A_{obj_code}') or 0) + \
-                        int(request.form.get(f'count_B_{obj_code}') or 0) + \
-                        int(request.form.get(f'count_C_{obj_code}') or 0) + \
-                        int(request.form.get(f'count_F_{obj_code}') or 0)
+                counts[obj_code] = [int(request.form.get(f'count_{grade}_{obj_code}') or 0) for grade in 'ABCF']
+                total = sum(counts[obj_code])
 
+                error = None
+                if min(counts[obj_code]) < 0:
+                    error = "Counts cannot be negative."
                 # Logic: Allow 0 (partial) or match limit (complete). Block otherwise.
-                if total != 0 and total != limit:
-                    # Message Updated: Removed "OR empty (0)"
-                    flash(f"Error for {obj_code}: Total ({total}) must be exactly {limit}.", "danger")
+                elif total != 0 and total != limit:
+                    error = f"Total ({total}) must be exactly {limit}."
+                if error:
+                    flash(f"Error for {obj_code}: {error}", "danger")
                     conn.close()
                     return redirect(
                         url_for('enter_evaluation_form', degree_str=d_str, course_code=c_code, section_num=sec_num,
                                 semester=sem, year=yr))
 
+            # Resolve every duplicate-target degree for all objectives in one query
+            target_map = {obj_code: [(d_name, d_level)] for obj_code in objectives_submitted}
+            if duplicate and objectives_submitted:
+                placeholders = ', '.join(['%s'] * len(objectives_submitted))
+                cursor.execute(
+                    f"SELECT obj_code, degree_name, degree_level FROM Course_Objective WHERE course_code=%s AND obj_code IN ({placeholders})",
+                    [c_code] + objectives_submitted)
+                for o in cursor.fetchall():
+                    if (o['degree_name'], o['degree_level']) not in target_map[o['obj_code']]:
+                        target_map[o['obj_code']].append((o['degree_name'], o['degree_level']))
+
+            eval_rows, method_rows = [], []
             for obj_code in objectives_submitted:
-                cA, cB, cC, cF = request.form[f'count_A_{obj_code}'], request.form[f'count_B_{obj_code}'], request.form[
-                    f'count_C_{obj_code}'], request.form[f'count_F_{obj_code}']
-                impr = request.form[f'improvement_{obj_code}']
+                cA, cB, cC, cF = counts[obj_code]
+                impr = request.form.get(f'improvement_{obj_code}', '')
                 selected_methods = request.form.getlist(f'methods_{obj_code}')
                 other_text = request.form.get(f'method_other_{obj_code}')
                 if other_text: selected_methods.extend([m.strip() for m in other_text.split(',') if m.strip()])
+                selected_methods = list(dict.fromkeys(selected_methods))
 
-                target_degrees = [(d_name, d_level)]
-                if duplicate:
-                    cursor.execute(
-                        "SELECT degree_name, degree_level FROM Course_Objective WHERE course_code=%s AND obj_code=%s",
-                        (c_code, obj_code))
-                    for o in cursor.fetchall():
-                        if (o['degree_name'], o['degree_level']) not in target_degrees: target_degrees.append(
-                            (o['degree_name'], o['degree_level']))
-
-                for (t_name, t_level) in target_degrees:
-                    cursor.execute(
-                        "REPLACE INTO Evaluation (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code, count_A, count_B, count_C, count_F, improvement) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
-                        (c_code, sec_num, sem, yr, t_name, t_level, obj_code, cA, cB, cC, cF, impr))
-                    cursor.execute(
-                        "DELETE FROM Evaluation_Method WHERE course_code=%s AND section_num=%s AND semester=%s AND year_offered=%s AND degree_name=%s AND degree_level=%s AND obj_code=%s",
-                        (c_code, sec_num, sem, yr, t_name, t_level, obj_code))
+                for (t_name, t_level) in target_map[obj_code]:
+                    eval_rows.append((c_code, sec_num, sem, yr, t_name, t_level, obj_code, cA, cB, cC, cF, impr))
                     for m in selected_methods:
-                        cursor.execute("INSERT INTO Evaluation_Method VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                                       (c_code, sec_num, sem, yr, t_name, t_level, obj_code, m))
+                        method_rows.append((c_code, sec_num, sem, yr, t_name, t_level, obj_code, m))
+
+            write_evaluations(cursor, eval_rows, method_rows)
             conn.commit()
+            report_cache.bump()
+            outcomes.mark_stale(term_key(sem, safe_int(yr, 0)))
             flash('Evaluation saved!', 'success')
             return redirect(url_for('index'))
-        except mysql.connector.Error as err:
+        except DB_ERRORS as err:
+            conn.rollback()
             flash(f'Database Error: {err.msg}', 'danger')
         except ValueError:
             flash('Error: Grades must be numbers.', 'danger')
@@ -541,108 +976,724 @@ def enter_evaluation_form():
                            info={'d_str': d_str, 'c_code': c_code, 'sec': sec_num, 'sem': sem, 'yr': yr})
 
 
+def load_term_grid(cursor, inst_id, t_key):
+    """
+        Every section an instructor teaches in a term, each with one row per expected
+        (degree, objective) and its saved evaluation and methods, in three queries.
+    """
+    teaches = "FROM Teaches T JOIN Section S ON S.course_code=T.course_code AND S.section_num=T.section_num AND S.semester=T.semester AND S.year_offered=T.year_offered"
+    cursor.execute(f"SELECT S.course_code, S.section_num, S.semester, S.year_offered, S.num_enrollments, C.course_name {teaches} JOIN Course C ON C.course_code=S.course_code WHERE T.instructor_id=%s AND T.term_key=%s ORDER BY S.course_code, S.section_num",
+                   (inst_id, t_key))
+    sections = {(row['course_code'], row['section_num']): dict(row, rows=[]) for row in cursor.fetchall()}
+    cursor.execute(f"""SELECT S.course_code, S.section_num, S.semester, S.year_offered, CO.degree_name, CO.degree_level, CO.obj_code, O.title,
+                       E.count_A, E.count_B, E.count_C, E.count_F, E.improvement
+                       {teaches} JOIN Course_Objective CO ON CO.course_code=S.course_code
+                       JOIN Objective O ON O.obj_code=CO.obj_code
+                       LEFT JOIN Evaluation E ON E.course_code=S.course_code AND E.section_num=S.section_num AND E.semester=S.semester
+                         AND E.year_offered=S.year_offered AND E.degree_name=CO.degree_name AND E.degree_level=CO.degree_level
+                         AND E.obj_code=CO.obj_code
+                       WHERE T.instructor_id=%s AND T.term_key=%s
+                       ORDER BY S.course_code, S.section_num, CO.degree_name, CO.degree_level, CO.obj_code""",
+                   (inst_id, t_key))
+    cells = {}
+    for row in cursor.fetchall():
+        row['key'] = '|'.join(str(row[field]) for field in ('course_code', 'section_num', 'degree_name', 'degree_level', 'obj_code'))
+        row['methods'] = []
+        sections[(row['course_code'], row['section_num'])]['rows'].append(row)
+        cells[row['key']] = row
+    cursor.execute(f"""SELECT EM.course_code, EM.section_num, EM.degree_name, EM.degree_level, EM.obj_code, EM.method_name
+                       {teaches} JOIN Evaluation_Method EM ON EM.course_code=S.course_code AND EM.section_num=S.section_num
+                         AND EM.semester=S.semester AND EM.year_offered=S.year_offered
+                       WHERE T.instructor_id=%s AND T.term_key=%s ORDER BY EM.method_name""", (inst_id, t_key))
+    for row in cursor.fetchall():
+        cell = cells.get('|'.join(str(row[field]) for field in ('course_code', 'section_num', 'degree_name', 'degree_level', 'obj_code')))
+        if cell is not None:
+            cell['methods'].append(row['method_name'])
+    return list(sections.values()), cells
+
+
+def read_term_grid(form, cells, sections):
+    """
+        Validates a submitted grid against the loaded one; returns (eval_rows, method_rows,
+        errors). Only rows with something entered, or with a saved evaluation, are written.
+    """
+    limits = {(sec['course_code'], sec['section_num']): sec['num_enrollments'] for sec in sections}
+    eval_rows, method_rows, errors = [], [], []
+    for i in range(safe_int(form.get('row_count'), 0)):
+        cell = cells.get(form.get(f'key_{i}'))
+        if cell is None:
+            errors.append(f"Row {i + 1} is not one of this instructor's objectives for the term.")
+            continue
+        label = f"{cell['course_code']}-{cell['section_num']} {cell['degree_name']} ({cell['degree_level']}) {cell['obj_code']}"
+        try:
+            counts = [int(form.get(f'count_{grade}_{i}') or 0) for grade in 'ABCF']
+        except ValueError:
+            errors.append(f"{label}: grades must be numbers.")
+            continue
+        limit = limits[(cell['course_code'], cell['section_num'])]
+        total = sum(counts)
+        if min(counts) < 0:
+            errors.append(f"{label}: counts cannot be negative.")
+        elif total != 0 and total != limit:
+            errors.append(f"{label}: total ({total}) must be exactly {limit}.")
+        methods = list(dict.fromkeys(m.strip() for m in form.get(f'methods_{i}', '').split(',') if m.strip()))
+        improvement = form.get(f'improvement_{i}', '').strip()
+        if not (total or methods or improvement or cell['count_A'] is not None):
+            continue
+        key = (cell['course_code'], cell['section_num'], cell['semester'], cell['year_offered'],
+               cell['degree_name'], cell['degree_level'], cell['obj_code'])
+        eval_rows.append(key + tuple(counts) + (improvement,))
+        method_rows.extend(key + (m,) for m in methods)
+    return eval_rows, method_rows, errors
+
+
+@app.route('/term_evaluations', methods=['GET', 'POST'])
+@replica_reads()
+def term_evaluations():
+    # Batch entry: all of an instructor's sections, degrees and objectives for one term on one page
+    inst_id, sem = request.values.get('instructor_id'), request.values.get('semester')
+    yr = safe_int(request.values.get('year'), 0)
+    if not inst_id or sem not in TERM_ORDER or not yr:
+        flash('Error: Choose an instructor and a term.', 'danger')
+        return redirect(url_for('evaluation_selection'))
+    t_key = term_key(sem, yr)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT instructor_id, first_name, last_name FROM Instructor WHERE instructor_id=%s", (inst_id,))
+    instructor = cursor.fetchone()
+    sections, cells = load_term_grid(cursor, inst_id, t_key)
+    for sec in sections:
+        sec['semester'], sec['year_offered'] = sem, yr
+    submitted = None
+
+    if request.method == 'POST':
+        eval_rows, method_rows, errors = read_term_grid(request.form, cells, sections)
+        if errors:
+            for message in errors[:10]:
+                flash(f'Error: {message}', 'danger')
+            if len(errors) > 10:
+                flash(f'... and {len(errors) - 10} more errors.', 'danger')
+            flash('Nothing was saved.', 'danger')
+            submitted = request.form   # re-show what was typed rather than the saved values
+        else:
+            try:
+                write_evaluations(cursor, eval_rows, method_rows)
+                conn.commit()
+                report_cache.bump()
+                outcomes.mark_stale(t_key)
+                flash(f'{len(eval_rows)} evaluations saved across {len(sections)} sections.', 'success')
+                conn.close()
+                return redirect(url_for('term_evaluations', instructor_id=inst_id, semester=sem, year=yr))
+            except DB_ERRORS as err:
+                conn.rollback()
+                flash(f'Database Error: {err.msg}', 'danger')
+                submitted = request.form
+    conn.close()
+    return render_template('term_evaluations.html', instructor=instructor, sections=sections, submitted=submitted,
+                           info={'instructor_id': inst_id, 'semester': sem, 'year': yr})
+
+
+@app.route('/evaluation_progress')
+@replica_reads()
+def evaluation_progress():
+    # Term-wide entry progress: per-degree totals, then the (section, degree) pairs still missing grades, a page at a time
+    form = {field: request.args.get(field, '') for field in ('semester', 'year', 'degree_selection', 'refresh')}
+    active_filters = {key: value for key, value in form.items() if value}
+    after = request.args.get('after')
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    degrees = get_reference('active_degrees', cursor)
+    totals, rows, next_url = [], [], None
+    if form['semester'] in TERM_ORDER and safe_int(form['year'], 0):
+        t_key = term_key(form['semester'], safe_int(form['year'], 0))
+        cursor.execute("""SELECT degree_name, degree_level, COUNT(*) as sections, SUM(entered >= expected) as complete,
+                          SUM(expected) as expected, SUM(entered) as entered, SUM(improvements) as improvements,
+                          MAX(updated_at) as updated_at
+                          FROM Evaluation_Progress WHERE term_key = %s
+                          GROUP BY degree_name, degree_level ORDER BY degree_name, degree_level""", (t_key,))
+        totals = cursor.fetchall()
+        where, params = ["P.term_key = %s", "P.entered < P.expected"], [t_key]
+        if form['degree_selection']:
+            where.append("P.degree_name = %s AND P.degree_level = %s")
+            params.extend(form['degree_selection'].split('|'))
+        keys = ('P.course_code', 'P.section_num', 'P.degree_name', 'P.degree_level')
+        try:
+            cursor.execute(*listing("""SELECT P.course_code, P.section_num, P.degree_name, P.degree_level, P.expected,
+                                       P.entered, P.updated_at, T.instructor_id, I.first_name, I.last_name
+                                       FROM Evaluation_Progress P
+                                       LEFT JOIN Teaches T ON T.course_code = P.course_code AND T.section_num = P.section_num
+                                         AND T.semester = P.semester AND T.year_offered = P.year_offered
+                                       LEFT JOIN Instructor I ON I.instructor_id = T.instructor_id""",
+                                    where, params, keys, decode_cursor(after), PAGE_SIZE + 1, descending=False))
+            rows = cursor.fetchall()
+        except ValueError:
+            flash('Error: That page link is no longer valid.', 'danger')
+        if len(rows) > PAGE_SIZE:
+            rows = rows[:PAGE_SIZE]
+            last = rows[-1]
+            next_url = url_for('evaluation_progress', after=encode_cursor(
+                (last['course_code'], last['section_num'], last['degree_name'], last['degree_level'])), **active_filters)
+    conn.close()
+    return render_template('evaluation_progress.html', degrees=degrees, form=form, totals=totals, rows=rows,
+                           next_url=next_url, refresh=safe_int(form['refresh'], 0),
+                           first_url=url_for('evaluation_progress', **active_filters) if after else None)
+
+
 # --- REPORTS ---
+def term_range(form):
+    start_sem, start_year = form.get('start_sem'), safe_int(form.get('start_year'), 2020)
+    end_sem, end_year = form.get('end_sem'), safe_int(form.get('end_year'), 2030)
+    return term_key(start_sem, start_year), term_key(end_sem, end_year, 'Fall')
+
+
+# A listing row's term key, from its year_offered and semester columns
+ROW_TERM = "year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END"
+
+
+def listing(sql, where, params, keys, after=None, limit=None, descending=True, group_by='', archive=None):
+    """
+        Assembles a report listing ordered by a unique key, optionally seeking past `after`
+        (keyset pagination). With `archive` = (sql over the *_Archive tables, extra WHERE
+        clauses and params for them, the keys as expressions over the output columns[, its
+        own GROUP BY]) the archived rows are merged in: each side is filtered, sorted and
+        limited on its own indexes, and only the two short lists are sorted together.
+    """
+    where, params = list(where), list(params)
+    if after is not None:
+        seek, seek_params = keyset(keys, after, descending)
+        where.append(seek)
+        params.extend(seek_params)
+    tail, tail_params = '', []
+    if limit:
+        tail, tail_params = " LIMIT %s", [limit]
+    if archive is None:
+        sql += " WHERE " + " AND ".join(where) + group_by + order_by(keys, descending) + tail
+        return sql, tuple(params + tail_params)
+
+    archive_sql, archive_where, archive_params, merged_keys, *archive_group_by = archive
+    # Without a limit the sides are not sorted, since only the merged order counts
+    side_order = order_by(keys, descending) + tail if limit else ''
+    hot = sql + " WHERE " + " AND ".join(where) + group_by + side_order
+    cold = (archive_sql + " WHERE " + " AND ".join(where + list(archive_where))
+            + (archive_group_by[0] if archive_group_by else group_by) + side_order)
+    sql = (f"SELECT * FROM (SELECT * FROM ({hot}) H UNION ALL SELECT * FROM ({cold}) A) U"
+           + order_by(merged_keys, descending) + tail)
+    hot_params = params + tail_params
+    cold_params = params + list(archive_params) + tail_params
+    return sql, tuple(hot_params + cold_params + tail_params)
+
+
+# Archived sections have no Evaluation_Progress rows; the same counts are taken from the
+# archive tables as evaluation_store.PROGRESS_SELECT takes them (P is the Course_Objective row)
+ARCHIVED_PROGRESS_SQL = """SELECT S.course_code, S.section_num, C.course_name,
+                   P.degree_name, P.degree_level,
+                   COUNT(P.obj_code) as expected_evals,
+                   COALESCE(SUM(E.count_A + E.count_B + E.count_C + E.count_F > 0), 0) as actual_evals,
+                   COALESCE(SUM(E.improvement IS NOT NULL AND E.improvement <> ''), 0) as impr_count
+                   FROM Section_Archive S JOIN Course C ON S.course_code = C.course_code
+                   LEFT JOIN Course_Objective P ON P.course_code = S.course_code
+                   LEFT JOIN Evaluation_Archive E ON E.course_code = S.course_code
+                     AND E.section_num = S.section_num AND E.semester = S.semester
+                     AND E.year_offered = S.year_offered AND E.degree_name = P.degree_name
+                     AND E.degree_level = P.degree_level AND E.obj_code = P.obj_code"""
+ARCHIVED_PROGRESS_GROUP_BY = " GROUP BY S.course_code, S.section_num, C.course_name, P.degree_name, P.degree_level"
+
+
+def report_query(report_type, form, after=None, limit=None):
+    """
+        Returns (sql, params) for the main row listing of a report type, shared by the
+        HTML page, the streaming export and the JSON API. For degree_details this is the
+        section list. `after` (a row's REPORT_CURSORS key) and `limit` select one page.
+    """
+    if report_type == 'degree_details':
+        d_name, d_level = form.get('degree_selection').split('|')
+        start_year, end_year = safe_int(form.get('start_year'), 2020), safe_int(form.get('end_year'), 2030)
+        sql = "SELECT S.year_offered, S.semester, S.course_code, S.section_num, C.course_name FROM Degree_Course DC JOIN {section} S ON DC.course_code=S.course_code JOIN Course C ON S.course_code=C.course_code"
+        return listing(sql.format(section='Section'),
+                       ["DC.degree_name=%s", "DC.degree_level=%s", "S.term_key BETWEEN %s AND %s"],
+                       (d_name, d_level, term_key('Spring', start_year), term_key('Fall', end_year)),
+                       ('S.term_key', 'S.course_code', 'S.section_num'), after, limit,
+                       archive=(sql.format(section='Section_Archive'), ["S.year_offered BETWEEN %s AND %s"],
+                                (start_year, end_year), (ROW_TERM, 'course_code', 'section_num')))
+
+    if report_type == 'passing_rate':
+        threshold = float(form.get('percentage', 0))
+        scope = form.get('scope', 'term')
+        # Each branch is a range scan on one of the Evaluation_Summary pass_rate indexes
+        sql_pass = """SELECT degree_name, degree_level, course_code, section_num, semester, year_offered, obj_code,
+                      passed, total, pass_rate, methods FROM Evaluation_Summary"""
+        keys = ('pass_rate', 'course_code', 'section_num', 'year_offered', 'semester', 'degree_name', 'degree_level',
+                'obj_code')
+        archive = (sql_pass + "_Archive", [], (), keys)
+        if scope == 'all':
+            return listing(sql_pass, ["pass_rate >= %s"], (threshold,), keys, after, limit, archive=archive)
+        if scope == 'degree':
+            d_name, d_level = form.get('degree_selection').split('|')
+            return listing(sql_pass, ["degree_name=%s", "degree_level=%s", "pass_rate >= %s"],
+                           (d_name, d_level, threshold), keys, after, limit, archive=archive)
+        return listing(sql_pass, ["year_offered=%s", "semester=%s", "pass_rate >= %s"],
+                       (form.get('year'), form.get('semester'), threshold), keys, after, limit, archive=archive)
+
+    if report_type == 'course_sections':
+        start_val, end_val = term_range(form)
+        sql = "SELECT S.course_code, S.section_num, S.semester, S.year_offered, S.num_enrollments, I.last_name, I.first_name FROM {section} S LEFT JOIN {teaches} T ON S.course_code=T.course_code AND S.section_num=T.section_num AND S.semester=T.semester AND S.year_offered=T.year_offered LEFT JOIN Instructor I ON T.instructor_id=I.instructor_id"
+        return listing(sql.format(section='Section', teaches='Teaches'),
+                       ["S.course_code=%s", "S.term_key BETWEEN %s AND %s"], (form.get('course_code'), start_val, end_val),
+                       ('S.term_key', 'S.section_num'), after, limit,
+                       archive=(sql.format(section='Section_Archive', teaches='Teaches_Archive'),
+                                ["S.year_offered BETWEEN %s AND %s"], (start_val // 10, end_val // 10),
+                                (ROW_TERM, 'section_num')))
+
+    if report_type == 'instructor_sections':
+        start_val, end_val = term_range(form)
+        sql = "SELECT S.year_offered, S.semester, S.course_code, S.section_num, S.num_enrollments, C.course_name FROM {teaches} T JOIN {section} S ON T.course_code=S.course_code AND T.section_num=S.section_num AND T.semester=S.semester AND T.year_offered=S.year_offered JOIN Course C ON S.course_code=C.course_code"
+        return listing(sql.format(section='Section', teaches='Teaches'),
+                       ["T.instructor_id=%s", "T.term_key BETWEEN %s AND %s"], (form.get('instructor_id'), start_val, end_val),
+                       ('T.term_key', 'T.course_code', 'T.section_num'), after, limit,
+                       archive=(sql.format(section='Section_Archive', teaches='Teaches_Archive'),
+                                ["T.year_offered BETWEEN %s AND %s"], (start_val // 10, end_val // 10),
+                                (ROW_TERM, 'course_code', 'section_num')))
+
+    if report_type == 'eval_status':
+        # One Evaluation_Progress row per (section, degree), joined by primary key; a section whose
+        # course has no objectives mapped yet still shows up, with a NULL degree
+        year = safe_int(form.get('year'), 0)
+        return listing("""SELECT S.course_code, S.section_num, C.course_name,
+                   P.degree_name, P.degree_level,
+                   COALESCE(P.expected, 0) as expected_evals,
+                   COALESCE(P.entered, 0) as actual_evals,
+                   COALESCE(P.improvements, 0) as impr_count
+                   FROM Section S JOIN Course C ON S.course_code = C.course_code
+                   LEFT JOIN Evaluation_Progress P ON P.course_code = S.course_code
+                     AND P.section_num = S.section_num
+                     AND P.semester = S.semester
+                     AND P.year_offered = S.year_offered""",
+                       ["S.term_key = %s"], (term_key(form.get('semester'), year),),
+                       ('S.course_code', 'S.section_num', 'P.degree_name', 'P.degree_level'), after, limit,
+                       descending=False, archive=(ARCHIVED_PROGRESS_SQL, ["S.year_offered = %s"], (year,),
+                                                  ('course_code', 'section_num', 'degree_name', 'degree_level'),
+                                                  ARCHIVED_PROGRESS_GROUP_BY))
+
+    return None
+
+
+# Rows per page of the passing-rate listing on the reports page; exports and jobs return them all
+REPORT_PAGE_SIZE = config.getint('reports', 'page_size', fallback=200)
+
+# Sort key of a listing row, in the order of the keys in report_query
+REPORT_CURSORS = {
+    'degree_details': lambda r: (term_key(r['semester'], r['year_offered']), r['course_code'], r['section_num']),
+    'passing_rate': lambda r: (r['pass_rate'], r['course_code'], r['section_num'], r['year_offered'], r['semester'],
+                               r['degree_name'], r['degree_level'], r['obj_code']),
+    'course_sections': lambda r: (term_key(r['semester'], r['year_offered']), r['section_num']),
+    'instructor_sections': lambda r: (term_key(r['semester'], r['year_offered']), r['course_code'], r['section_num']),
+    'eval_status': lambda r: (r['course_code'], r['section_num'], r['degree_name'], r['degree_level']),
+}
+
+
+def fold_eval_status(rows):
+    # Collapse the per-(section, degree) rows of the eval_status query into one row per section
+    section_map = {}
+    for row in rows:
+        key = (row['course_code'], row['section_num'])
+        if key not in section_map:
+            section_map[key] = {'course_code': row['course_code'], 'section_num': row['section_num'],
+                                'course_name': row['course_name'], 'actual_evals': 0, 'expected_evals': 0,
+                                'impr_count': 0, 'degrees': []}
+        sec = section_map[key]
+        for field in ('actual_evals', 'expected_evals', 'impr_count'):
+            sec[field] += int(row[field])
+        if row['degree_name']:
+            sec['degrees'].append({'degree_name': row['degree_name'], 'degree_level': row['degree_level'],
+                                   'actual_evals': int(row['actual_evals']),
+                                   'expected_evals': int(row['expected_evals']),
+                                   'status': entry_status(int(row['actual_evals']), int(row['expected_evals']))})
+    results = list(section_map.values())
+    for sec in results:
+        sec['status'] = entry_status(sec['actual_evals'], sec['expected_evals'])
+    return results
+
+
+REPORT_DROPDOWNS = (('degrees', 'active_degrees'), ('all_courses', 'courses'), ('all_instructors', 'instructors'),
+                    ('all_objectives', 'objectives'))
+OUTCOME_REPORTS = ('outcome_trend', 'outcome_rollup')
+
+
+def outcome_report(report_type, form):
+    """Multi-year outcome statistics from the in-memory store: (search term, {'by', 'rows', 'total'})."""
+    start_year, end_year = safe_int(form.get('start_year'), 2020), safe_int(form.get('end_year'), 2030)
+    filters = {'course': form.get('course_code') or None, 'objective': form.get('obj_code') or None,
+               'degree': form.get('degree_selection') or None}
+    if report_type == 'outcome_trend':
+        by = 'term' if form.get('granularity') == 'term' else 'year'
+    else:
+        by = form.get('dimension') if form.get('dimension') in ('course', 'objective', 'degree') else 'objective'
+    rows, total = outcomes.group(by, term_key('Spring', start_year), term_key('Fall', end_year), **filters)
+    if by not in ('year', 'term'):
+        rows.sort(key=lambda r: r['label'])
+
+    narrowed = [value.replace('|', ' ') for value in filters.values() if value]
+    title = 'Outcome trend by ' + by if report_type == 'outcome_trend' else 'Outcomes by ' + by
+    search_term = f"{title}, {start_year}-{end_year}" + (f" ({', '.join(narrowed)})" if narrowed else '')
+    return search_term, {'by': by, 'rows': rows, 'total': total}
+
+
+def reference_task(name):
+    # Runs on another thread, so the request's read time is taken now
+    as_of = read_as_of()
+    return lambda cursor: get_reference(name, cursor, as_of)
+
+
 @app.route('/reports', methods=['GET', 'POST'])
+@replica_reads('GET', 'POST')
 def reports():
+    # Report forms submit by GET so the page can be revalidated; POST is still accepted
+    form = request.values
+    key = report_key(form.get('report_type'), form)
+    # With flash messages waiting the page must be rendered so they are shown (and consumed)
+    cacheable = not session.get('_flashes')
+    cached = report_cache.get(key) if cacheable else None
+    if cached is not None:
+        return report_response(*cached)
+
+    version, as_of = report_cache.version, read_as_of()
+    body, complete = render_reports(form)
+    if not (cacheable and complete):
+        return body
+    return report_response(body, *report_cache.put(key, version, body, as_of))
+
+
+def report_response(body, etag, last_modified):
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Browsers keep the page but check back every time; an unchanged page is answered with a 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def render_reports(form):
+    """The rendered reports page for `form`, and whether it is complete enough to cache."""
+    results, report_type, search_term, complete = [], None, "", True
+    next_url = first_url = None
+    # Everything the page needs is independent, so it is gathered in parallel on separate connections
+    out, tasks = {}, {}
+    for key, name in REPORT_DROPDOWNS:
+        cached = ref_cache.peek(name)
+        if cached is not None:
+            out[key] = cached
+        else:
+            tasks[key] = reference_task(name)
+
+    try:
+        if form.get('report_type'):
+            report_type = form.get('report_type')
+            query = report_query(report_type, form)
+
+            if report_type == 'degree_details':
+                d_name, d_level = form.get('degree_selection').split('|')
+                search_term = f"{d_name} ({d_level})"
+                tasks['courses'] = fetch_all(
+                    "SELECT C.course_code, C.course_name, DC.is_core FROM Degree_Course DC JOIN Course C ON DC.course_code=C.course_code WHERE DC.degree_name=%s AND DC.degree_level=%s ORDER BY DC.is_core DESC, C.course_code ASC",
+                    (d_name, d_level))
+                tasks['objectives'] = fetch_all(
+                    "SELECT DO.obj_code, O.title FROM Degree_Objective DO JOIN Objective O ON DO.obj_code=O.obj_code WHERE DO.degree_name=%s AND DO.degree_level=%s",
+                    (d_name, d_level))
+                tasks['sections'] = fetch_all(*query)
+                tasks['obj_map'] = fetch_all(
+                    "SELECT CO.obj_code, O.title, CO.course_code, C.course_name FROM Course_Objective CO JOIN Objective O ON CO.obj_code=O.obj_code JOIN Course C ON CO.course_code=C.course_code WHERE CO.degree_name=%s AND CO.degree_level=%s ORDER BY CO.obj_code",
+                    (d_name, d_level))
+
+            elif report_type == 'passing_rate':
+                # A page at a time, since all terms can be far more rows than a page can show
+                try:
+                    query = report_query(report_type, form, decode_cursor(form.get('after')), REPORT_PAGE_SIZE + 1)
+                except ValueError:
+                    flash('Error: That page link is no longer valid.', 'danger')
+                    query = report_query(report_type, form, None, REPORT_PAGE_SIZE + 1)
+                    complete = False
+                threshold = float(form.get('percentage', 0))
+                scope = form.get('scope', 'term')
+                if scope == 'all':
+                    search_term = f"All terms (> {threshold}%)"
+                elif scope == 'degree':
+                    d_name, d_level = form.get('degree_selection').split('|')
+                    search_term = f"{d_name} ({d_level}), all terms (> {threshold}%)"
+                else:
+                    search_term = f"{form.get('semester')} {form.get('year')} (> {threshold}%)"
+                tasks['rows'] = fetch_all(*query)
+
+            elif report_type == 'course_sections':
+                search_term = f"Course {form.get('course_code')} ({form.get('start_sem')} {safe_int(form.get('start_year'), 2020)} - {form.get('end_sem')} {safe_int(form.get('end_year'), 2030)})"
+                tasks['rows'] = fetch_all(*query)
+
+            elif report_type == 'instructor_sections':
+                tasks['inst_data'] = fetch_one("SELECT first_name, last_name FROM Instructor WHERE instructor_id=%s",
+                                               (form.get('instructor_id'),))
+                tasks['rows'] = fetch_all(*query)
+
+            elif report_type == 'eval_status':
+                search_term = f"Evaluation Status: {form.get('semester')} {form.get('year')}"
+                tasks['rows'] = fetch_all(*query)
+
+            elif report_type in OUTCOME_REPORTS:
+                # Answered from memory; only terms written since the last report are read from the database
+                conn = primary_connection()
+                outcomes.refresh(conn.cursor())
+                conn.close()
+                search_term, out['outcome'] = outcome_report(report_type, form)
+    except (ValueError, AttributeError):
+        # A missing degree or a threshold that is not a number, from a hand-edited or bookmarked link
+        flash('Error: Some of the report options are missing or invalid.', 'danger')
+        report_type, search_term, complete = None, "", False
+        tasks = {key: task for key, task in tasks.items() if key in dict(REPORT_DROPDOWNS)}
+
+    try:
+        out.update(parallel.run(tasks, limit=config.getint('reports', 'max_parallel', fallback=4),
+                                timeout=config.getfloat('reports', 'timeout', fallback=30), stats=g.get('stats'),
+                                pool=read_pool()))
+    except QueryTimeout as err:
+        flash(f'Error: {err}. Try a smaller range, or Run in Background to get the full listing as a file.', 'danger')
+        report_type, complete = None, False
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        for key, name in REPORT_DROPDOWNS:
+            if key not in out:
+                out[key] = get_reference(name, cursor)
+        conn.close()
+
+    if report_type == 'degree_details':
+        results = {key: out[key] for key in ('courses', 'objectives', 'sections', 'obj_map')}
+    elif report_type == 'instructor_sections':
+        inst_data = out['inst_data']
+        search_term = f"Instructor {inst_data['first_name']} {inst_data['last_name']} ({form.get('start_sem')} {safe_int(form.get('start_year'), 2020)} - {form.get('end_sem')} {safe_int(form.get('end_year'), 2030)})" if inst_data else "History"
+        results = out['rows']
+    elif report_type == 'eval_status':
+        results = fold_eval_status(out['rows'])
+    elif report_type in OUTCOME_REPORTS:
+        results = out['outcome']
+    elif report_type == 'passing_rate':
+        results = out['rows'][:REPORT_PAGE_SIZE]
+        params = {name: value for name, value in form.items() if name != 'after'}
+        if len(out['rows']) > REPORT_PAGE_SIZE:
+            next_url = url_for('reports', after=encode_cursor(REPORT_CURSORS[report_type](results[-1])), **params)
+        if form.get('after'):
+            first_url = url_for('reports', **params)
+    elif 'rows' in out:
+        results = out['rows']
+
+    body = render_template('reports.html', degrees=out['degrees'], all_courses=out['all_courses'],
+                           all_instructors=out['all_instructors'], all_objectives=out['all_objectives'],
+                           results=results, report_type=report_type,
+                           search_term=search_term, next_url=next_url, first_url=first_url)
+    return body, complete
+
+
+@app.route('/reports/export', methods=['GET', 'POST'])
+def export_report():
+    report_type = request.values.get('report_type')
+    fmt = request.values.get('format', 'csv')
+    try:
+        query = report_query(report_type, request.values)
+    except (ValueError, AttributeError):
+        query = None
+    if query is None or fmt not in EXPORT_FORMATS:
+        flash('Error: Unknown report or export format.', 'danger')
+        return redirect(url_for('reports'))
+    compress = request.values.get('gzip') == '1'
+    # Own connection and an unbuffered cursor: rows are pulled from the server as they are written out.
+    # The query runs before the response starts, so a failure can still be reported on the page.
+    try:
+        conn = router.checkout_read(session.get('wrote_at', 0.0))
+    except DB_ERRORS + (PoolTimeout,) as err:
+        flash(f'Database Error: {err}', 'danger')
+        return redirect(url_for('reports'))
+    try:
+        cursor = conn.cursor()
+        cursor.execute(*query)
+    except DB_ERRORS as err:
+        conn.close()
+        flash(f'Database Error: {err}', 'danger')
+        return redirect(url_for('reports'))
+
+    def generate():
+        try:
+            yield from stream_rows(cursor, fmt, compress)
+        finally:
+            conn.close()
+
+    filename = f"{report_type}.{EXPORT_FORMATS[fmt][1]}"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(generate(), mimetype=EXPORT_FORMATS[fmt][0], headers=headers)
+
+
+# --- BACKGROUND JOBS ---
+# Full report listings run off the request path and are downloaded from /jobs when ready
+jobs = JobRunner(pool, report_query,
+                 artifact_dir=config.get('jobs', 'artifact_dir', fallback='report_jobs'),
+                 workers=config.getint('jobs', 'workers', fallback=2),
+                 per_user=config.getint('jobs', 'per_user', fallback=2),
+                 max_queue=config.getint('jobs', 'max_queue', fallback=50),
+                 timeout=config.getint('jobs', 'timeout', fallback=1800),
+                 keep_hours=config.getint('jobs', 'keep_hours', fallback=24),
+                 read_checkout=router.checkout_read)
+
+
+def job_owner():
+    # There are no logins, so jobs belong to the browser session that submitted them
+    if 'job_owner' not in session:
+        session['job_owner'] = os.urandom(8).hex()
+    return session['job_owner']
+
+
+def job_view(job):
+    view = dict(job)
+    for field in ('submitted_at', 'started_at', 'finished_at'):
+        view[field] = datetime.fromtimestamp(job[field]).strftime('%Y-%m-%d %H:%M:%S') if job[field] else None
+    view['waited'] = job['started_at'] - job['submitted_at'] if job['started_at'] else None
+    view['ran'] = job['finished_at'] - job['started_at'] if job['started_at'] and job['finished_at'] else None
+    view['params'] = json.loads(job['params'])
+    return view
+
+
+@app.route('/jobs', methods=['GET', 'POST'])
+def submit_job():
     conn = get_db_connection()
+    if request.method == 'POST':
+        params = {name: value for name, value in request.form.items() if name not in ('report_type', 'format')}
+        try:
+            jobs.submit(conn, job_owner(), request.form.get('report_type'), params, request.form.get('format', 'csv'))
+            flash('Report queued. It runs in the background; download it here when it is done.', 'success')
+        except JobRejected as err:
+            flash(f'Error: {err}', 'danger')
+        except DB_ERRORS as err:
+            conn.rollback()
+            flash(f'Database Error: {err.msg}', 'danger')
+        conn.close()
+        return redirect(url_for('submit_job'))
     cursor = conn.cursor(dictionary=True)
-    results, report_type, search_term = [], None, ""
+    rows = [job_view(job) for job in jobs.jobs_for(cursor, job_owner())]
+    conn.close()
+    return render_template('jobs.html', jobs=rows, active=any(job['status'] in ('queued', 'running') for job in rows))
 
-    if request.method == 'POST':
-        report_type = request.form.get('report_type')
 
-        if report_type == 'degree_details':
-            d_name, d_level = request.form.get('degree_selection').split('|')
-            start_year, end_year = safe_int(request.form.get('start_year'), 2020), safe_int(
-                request.form.get('end_year'), 2030)
-            search_term = f"{d_name} ({d_level})"
-            cursor.execute(
-                "SELECT C.course_code, C.course_name, DC.is_core FROM Degree_Course DC JOIN Course C ON DC.course_code=C.course_code WHERE DC.degree_name=%s AND DC.degree_level=%s ORDER BY DC.is_core DESC, C.course_code ASC",
-                (d_name, d_level))
-            courses = cursor.fetchall()
-            cursor.execute(
-                "SELECT DO.obj_code, O.title FROM Degree_Objective DO JOIN Objective O ON DO.obj_code=O.obj_code WHERE DO.degree_name=%s AND DO.degree_level=%s",
-                (d_name, d_level))
-            objs = cursor.fetchall()
-            cursor.execute(
-                "SELECT S.year_offered, S.semester, S.course_code, S.section_num, C.course_name FROM Degree_Course DC JOIN Section S ON DC.course_code=S.course_code JOIN Course C ON S.course_code=C.course_code WHERE DC.degree_name=%s AND DC.degree_level=%s AND S.year_offered BETWEEN %s AND %s ORDER BY S.year_offered DESC, CASE S.semester WHEN 'Fall' THEN 3 WHEN 'Summer' THEN 2 WHEN 'Spring' THEN 1 END DESC",
-                (d_name, d_level, start_year, end_year))
-            sections = cursor.fetchall()
-            cursor.execute(
-                "SELECT CO.obj_code, O.title, CO.course_code, C.course_name FROM Course_Objective CO JOIN Objective O ON CO.obj_code=O.obj_code JOIN Course C ON CO.course_code=C.course_code WHERE CO.degree_name=%s AND CO.degree_level=%s ORDER BY CO.obj_code",
-                (d_name, d_level))
-            results = {'courses': courses, 'objectives': objs, 'sections': sections, 'obj_map': cursor.fetchall()}
-
-        elif report_type == 'passing_rate':
-            semester, year, threshold = request.form.get('semester'), request.form.get('year'), float(
-                request.form.get('percentage', 0))
-            search_term = f"{semester} {year} (> {threshold}%)"
-            sql_pass = """SELECT E.degree_name, E.degree_level, E.course_code, E.section_num, E.obj_code, 
-                          (E.count_A+E.count_B+E.count_C) as passed, (E.count_A+E.count_B+E.count_C+E.count_F) as total, 
-                          ((E.count_A+E.count_B+E.count_C)/NULLIF((E.count_A+E.count_B+E.count_C+E.count_F),0))*100 as pass_rate,
-                          (SELECT GROUP_CONCAT(method_name SEPARATOR ', ') FROM Evaluation_Method EM WHERE EM.course_code=E.course_code AND EM.section_num=E.section_num AND EM.semester=E.semester AND EM.year_offered=E.year_offered AND EM.degree_name=E.degree_name AND EM.degree_level=E.degree_level AND EM.obj_code=E.obj_code) as methods
-                          FROM Evaluation E WHERE E.semester=%s AND E.year_offered=%s HAVING pass_rate >= %s"""
-            cursor.execute(sql_pass, (semester, year, threshold))
-            results = cursor.fetchall()
-
-        elif report_type == 'course_sections':
-            c_code = request.form.get('course_code')
-            start_sem, start_year = request.form.get('start_sem'), safe_int(request.form.get('start_year'), 2020)
-            end_sem, end_year = request.form.get('end_sem'), safe_int(request.form.get('end_year'), 2030)
-            term_map = {'Spring': 1, 'Summer': 2, 'Fall': 3}
-            start_val, end_val = start_year * 10 + term_map.get(start_sem, 1), end_year * 10 + term_map.get(end_sem, 3)
-            search_term = f"Course {c_code} ({start_sem} {start_year} - {end_sem} {end_year})"
-            cursor.execute(
-                "SELECT S.course_code, S.section_num, S.semester, S.year_offered, S.num_enrollments, I.last_name, I.first_name FROM Section S LEFT JOIN Teaches T ON S.course_code=T.course_code AND S.section_num=T.section_num AND S.semester=T.semester AND S.year_offered=T.year_offered LEFT JOIN Instructor I ON T.instructor_id=I.instructor_id WHERE S.course_code=%s AND (S.year_offered * 10 + CASE S.semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) >= %s AND (S.year_offered * 10 + CASE S.semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) <= %s ORDER BY S.year_offered DESC, CASE S.semester WHEN 'Fall' THEN 3 WHEN 'Summer' THEN 2 WHEN 'Spring' THEN 1 END DESC",
-                (c_code, start_val, end_val))
-            results = cursor.fetchall()
-
-        elif report_type == 'instructor_sections':
-            inst_id = request.form.get('instructor_id')
-            start_sem, start_year = request.form.get('start_sem'), safe_int(request.form.get('start_year'), 2020)
-            end_sem, end_year = request.form.get('end_sem'), safe_int(request.form.get('end_year'), 2030)
-            term_map = {'Spring': 1, 'Summer': 2, 'Fall': 3}
-            start_val, end_val = start_year * 10 + term_map.get(start_sem, 1), end_year * 10 + term_map.get(end_sem, 3)
-            cursor.execute("SELECT first_name, last_name FROM Instructor WHERE instructor_id=%s", (inst_id,))
-            inst_data = cursor.fetchone()
-            search_term = f"Instructor {inst_data['first_name']} {inst_data['last_name']} ({start_sem} {start_year} - {end_sem} {end_year})" if inst_data else "History"
-            cursor.execute(
-                "SELECT S.year_offered, S.semester, S.course_code, S.section_num, S.num_enrollments, C.course_name FROM Teaches T JOIN Section S ON T.course_code=S.course_code AND T.section_num=S.section_num AND T.semester=S.semester AND T.year_offered=S.year_offered JOIN Course C ON S.course_code=C.course_code WHERE T.instructor_id=%s AND (S.year_offered * 10 + CASE S.semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) >= %s AND (S.year_offered * 10 + CASE S.semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) <= %s ORDER BY S.year_offered DESC, CASE S.semester WHEN 'Fall' THEN 3 WHEN 'Summer' THEN 2 WHEN 'Spring' THEN 1 END DESC",
-                (inst_id, start_val, end_val))
-            results = cursor.fetchall()
-
-        elif report_type == 'eval_status':
-            semester, year = request.form.get('semester'), request.form.get('year')
-            search_term = f"Evaluation Status: {semester} {year}"
-            cursor.execute("""SELECT S.course_code, S.section_num, C.course_name, 
-                              (SELECT COUNT(*) FROM Evaluation E 
-                               WHERE E.course_code = S.course_code 
-                               AND E.section_num = S.section_num 
-                               AND E.semester = S.semester 
-                               AND E.year_offered = S.year_offered 
-                               AND (E.count_A + E.count_B + E.count_C + E.count_F) > 0) as actual_evals, 
-                              (SELECT COUNT(*) FROM Course_Objective CO 
-                               WHERE CO.course_code = S.course_code) as expected_evals, 
-                              (SELECT COUNT(*) FROM Evaluation E 
-                               WHERE E.course_code = S.course_code 
-                               AND E.section_num = S.section_num 
-                               AND E.semester = S.semester 
-                               AND E.year_offered = S.year_offered 
-                               AND E.improvement IS NOT NULL AND E.improvement <> '') as impr_count 
-                              FROM Section S JOIN Course C ON S.course_code = C.course_code 
-                              WHERE S.semester = %s AND S.year_offered = %s 
-                              ORDER BY S.course_code, S.section_num""", (semester, year))
-            results = cursor.fetchall()
-
-    cursor.execute("SELECT * FROM Degree WHERE status='Active'")
-    degrees = cursor.fetchall()
-    cursor.execute("SELECT course_code, course_name FROM Course ORDER BY course_code")
-    all_courses = cursor.fetchall()
-    cursor.execute("SELECT instructor_id, first_name, last_name FROM Instructor ORDER BY last_name")
-    all_instructors = cursor.fetchall()
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    # For scripts polling a job: its state as JSON
+    conn = get_db_connection()
+    job = jobs.get(conn.cursor(dictionary=True), job_owner(), job_id)
+    conn.close()
+    if job is None:
+        return api_error("No such job", 404)
+    view = job_view(job)
+    if job['status'] == 'done':
+        view['download'] = url_for('download_job', job_id=job_id)
+    return jsonify(view)
+
+
+@app.route('/jobs/<job_id>/download')
+def download_job(job_id):
+    conn = get_db_connection()
+    job = jobs.get(conn.cursor(dictionary=True), job_owner(), job_id)
     conn.close()
-    return render_template('reports.html', degrees=degrees, all_courses=all_courses, all_instructors=all_instructors,
-                           results=results, report_type=report_type, search_term=search_term)
+    if job is None or job['status'] != 'done' or not os.path.exists(jobs.artifact_path(job)):
+        flash('Error: That report is not available (it may have expired).', 'danger')
+        return redirect(url_for('submit_job'))
+    mimetype, extension = EXPORT_FORMATS[job['export_format']]
+    # Stored gzip-compressed; sent as-is with Content-Encoding, like an export with gzip=1
+    response = send_file(jobs.artifact_path(job), mimetype=mimetype, as_attachment=True,
+                         download_name=f"{job['report_type']}.{extension}")
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    conn = get_db_connection()
+    try:
+        if jobs.cancel(conn, job_owner(), job_id):
+            flash('Job cancelled.', 'info')
+        else:
+            flash('Error: That job has already finished.', 'danger')
+    except DB_ERRORS as err:
+        conn.rollback()
+        flash(f'Database Error: {err.msg}', 'danger')
+    finally:
+        conn.close()
+    return redirect(url_for('submit_job'))
+
+
+# --- JSON API ---
+# Read-only listings for dashboards: same parameters as the report forms, plus
+#   cursor  next_cursor of the previous page     limit   rows per page
+#   fields  comma-separated columns to return
+API_PAGE_SIZE = config.getint('api', 'page_size', fallback=100)
+API_MAX_PAGE_SIZE = config.getint('api', 'max_page_size', fallback=1000)
+
+
+def api_error(message, status=400):
+    return jsonify(error=message), status
+
+
+def api_listing(name, query_for, row_key):
+    args = request.args
+    try:
+        limit = page_limit(args.get('limit'), API_PAGE_SIZE, API_MAX_PAGE_SIZE)
+        # One row more than the page shows whether another page follows
+        query = query_for(args, decode_cursor(args.get('cursor')), limit + 1)
+    except ValueError as err:
+        return api_error(f"Bad parameters for {name}: {err}")
+    except AttributeError:
+        return api_error(f"Missing parameters for {name}")
+    conn = get_db_connection()
+    if conn is None:
+        return api_error("Database unavailable", 503)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(*query)
+        rows = cursor.fetchall()
+        columns = cursor.column_names
+    except DB_ERRORS as err:
+        return api_error(f"Database Error: {err.msg}")
+    finally:
+        conn.close()
+    try:
+        body = page_body(columns, rows, limit, row_key, args.get('fields'), report=name)
+    except ValueError as err:
+        return api_error(str(err))
+    return Response(body, mimetype='application/json')
+
+
+@app.route('/api/reports/<report_type>')
+@replica_reads()
+def api_report(report_type):
+    if report_type in OUTCOME_REPORTS:
+        # Already aggregated in memory and one row per group, so returned whole
+        conn = primary_connection()
+        outcomes.refresh(conn.cursor())
+        conn.close()
+        title, outcome = outcome_report(report_type, request.args)
+        rows = outcome['rows'] + ([outcome['total']] if outcome['total'] else [])
+        columns = list(rows[0]) if rows else ['key', 'label']
+        try:
+            body = page_body(columns, rows, fields=request.args.get('fields'), report=report_type, title=title,
+                             by=outcome['by'])
+        except ValueError as err:
+            return api_error(str(err))
+        return Response(body, mimetype='application/json')
+    if report_type not in REPORT_CURSORS:
+        return api_error(f"Unknown report '{report_type}'", 404)
+    return api_listing(report_type, lambda args, after, limit: report_query(report_type, args, after, limit),
+                       REPORT_CURSORS[report_type])
+
+
+@app.route('/api/evaluation_selection')
+@replica_reads()
+def api_evaluation_selection():
+    return api_listing('evaluation_selection', selection_query, lambda r: (r['course_code'], r['section_num']))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,117 @@
+"""
+    Term rollover: keeps the hot Section / Teaches / Evaluation tables to the last few years.
+
+    Sections of the years before the last `keep_years` are moved, with their evaluations, to
+    the *_Archive tables (bulk_archive.run_archive, a chunk at a time), where the reports
+    still read them. On MySQL the archive tables are also partitioned by year_offered, one
+    partition per year plus p_future, so a report for a few terms only opens those years.
+    The hot tables keep their foreign keys, which InnoDB does not allow on partitioned
+    tables; keeping them short does the same job for them.
+
+    Run it once a year (or from cron; a run with nothing to do changes nothing):
+    Usage: python archive_maintenance.py [--keep-years N] [--dry-run] [--config config.ini]
+"""
+import argparse
+import configparser
+import sys
+from datetime import date
+
+from bulk_archive import CHUNK_SIZE, Scope, count_scope, run_archive, term_key
+from db_backend import DB_ERRORS, backend_name, connect_factory
+
+ARCHIVE_TABLES = ('Section_Archive', 'Teaches_Archive', 'Evaluation_Archive', 'Evaluation_Method_Archive',
+                  'Evaluation_Summary_Archive')
+FUTURE_PARTITION = 'p_future'
+
+
+def partition_bounds(cursor, table):
+    """{partition: first year it does not hold (None for MAXVALUE)}; empty if `table` is not partitioned."""
+    cursor.execute("""SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL""",
+                   (table,))
+    return {name: None if bound == 'MAXVALUE' else int(bound) for name, bound in cursor.fetchall()}
+
+
+def partition_statements(cursor, table, first_year, last_year):
+    """The DDL that gives `table` a partition for each year up to last_year; [] if it has them."""
+    bounds = partition_bounds(cursor, table)
+    split = [bound for bound in bounds.values() if bound is not None]
+    start = max(split) if split else first_year
+    years = [f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in range(start, last_year + 1)]
+    future = f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE"
+    if not bounds:
+        # The first partition also takes any older years
+        return [f"ALTER TABLE {table} PARTITION BY RANGE (year_offered) ({', '.join(years + [future])})"]
+    if not years:
+        return []
+    return [f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(years + [future])})"]
+
+
+def oldest_year(cursor, default):
+    years = []
+    for table in ('Section', 'Section_Archive'):
+        cursor.execute(f"SELECT MIN(year_offered) FROM {table}")
+        years.append(cursor.fetchone()[0])
+    return min([year for year in years if year is not None], default=default)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move closed years to the archive tables and keep their partitions.')
+    parser.add_argument('--keep-years', type=int, help='years kept in the hot tables, this one included')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='show what would be moved and run, change nothing')
+    parser.add_argument('--config', default='config.ini')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    keep_years = args.keep_years or config.getint('archive', 'keep_years', fallback=5)
+    this_year = date.today().year
+    first_hot_year = this_year - keep_years + 1
+    scope = Scope(end_term=term_key('Fall', first_hot_year - 1))
+
+    conn = connect_factory(config)()
+    try:
+        cursor = conn.cursor()
+        statements = []
+        if backend_name(config) == 'mysql':
+            first_year = oldest_year(cursor, first_hot_year - 1)
+            for table in ARCHIVE_TABLES:
+                statements += partition_statements(cursor, table, first_year, this_year)
+        else:
+            print("SQLite has no table partitions; the archive tables are read through their term_key indexes.")
+
+        totals = count_scope(cursor, scope)
+        print(f"Keeping {first_hot_year}-{this_year} in the hot tables. To archive ({scope.describe()}): "
+              f"{totals['sections']} sections; "
+              + ', '.join(f"{table} {count}" for table, count in totals.items() if table != 'sections'))
+        for sql in statements:
+            print(f"{'Would run' if args.dry_run else 'Running'}: {sql}", flush=True)
+            if not args.dry_run:
+                try:
+                    cursor.execute(sql)
+                except DB_ERRORS as err:
+                    print(f"Could not partition: {err.msg}")
+                    return 1
+        if args.dry_run or not totals['sections']:
+            return 0
+
+        def progress(report):
+            print(f"  chunk {report.chunks}: {report.sections} of {totals['sections']} sections archived "
+                  f"({report.seconds:.1f}s)", flush=True)
+
+        try:
+            report = run_archive(conn, 'archive', scope, args.chunk_size, totals=totals, progress=progress)
+        except DB_ERRORS as err:
+            print(f"Stopped by a database error: {err.msg}. Completed chunks are kept; run again to resume.")
+            return 1
+    finally:
+        conn.close()
+
+    print(f"Archived {report.sections} sections in {report.chunks} chunks: "
+          + ', '.join(f"{table} {count}" for table, count in report.rows.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
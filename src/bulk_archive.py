@@ -0,0 +1,273 @@
+"""
+    Bulk archive and purge of old sections and evaluations.
+
+    A scope is a term range, optionally narrowed to one course and/or one degree. Without a
+    degree, whole sections go: their evaluations, teaching assignments and the sections
+    themselves. With a degree, only that degree's evaluations of the sections go, since
+    other degrees may share the sections. `archive` copies the rows into the *_Archive
+    tables before deleting them, and reports keep reading them there; `purge` only deletes.
+
+    Work is done CHUNK_SIZE sections at a time, one short transaction per chunk, so no
+    large range of Evaluation stays locked. Finished chunks are gone from the scope, so an
+    interrupted run is resumed by starting it again with the same scope.
+
+    Usage: python bulk_archive.py {archive,purge} [--from "Fall 2010"] [--to "Spring 2015"]
+                                  [--course CODE] [--degree "Name|BS"] [--chunk-size N] [--dry-run]
+"""
+import argparse
+import configparser
+import sys
+import time
+
+from db_backend import DB_ERRORS, connect_factory
+from evaluation_store import refresh_evaluation_progress
+
+ACTIONS = ('archive', 'purge')
+CHUNK_SIZE = 100
+TERM_ORDER = {'Spring': 1, 'Summer': 2, 'Fall': 3}
+SECTION_KEY = "course_code, section_num, semester, year_offered"
+EVALUATION_KEY = SECTION_KEY + ", degree_name, degree_level, obj_code"
+
+# table -> columns copied to its archive table (generated term_key is left out)
+ARCHIVED_COLUMNS = {
+    'Section': SECTION_KEY + ", num_enrollments",
+    'Teaches': SECTION_KEY + ", instructor_id",
+    'Evaluation': EVALUATION_KEY + ", count_A, count_B, count_C, count_F, improvement",
+    'Evaluation_Method': EVALUATION_KEY + ", method_name",
+    'Evaluation_Summary': EVALUATION_KEY + ", passed, total, pass_rate, methods",
+}
+# Children first, so nothing is left for a cascade to find. Evaluation_Progress is derived
+# and not archived; a degree-only scope recomputes it instead of deleting it.
+EVALUATION_TABLES = ('Evaluation_Summary', 'Evaluation_Method', 'Evaluation')
+SECTION_TABLES = EVALUATION_TABLES + ('Evaluation_Progress', 'Teaches', 'Section')
+
+
+def term_key(semester, year):
+    return year * 10 + TERM_ORDER[semester]
+
+
+def parse_term(text):
+    """'Fall 2010' -> term key; ValueError if it is not '<semester> <year>'."""
+    try:
+        semester, year = text.split()
+        return term_key(semester.capitalize(), int(year))
+    except (ValueError, KeyError):
+        raise ValueError(f"Expected a term like 'Fall 2010', got '{text}'.")
+
+
+def term_name(key):
+    semester = {order: name for name, order in TERM_ORDER.items()}[key % 10]
+    return f"{semester} {key // 10}"
+
+
+class Scope:
+    def __init__(self, start_term=None, end_term=None, course_code=None, degree=None):
+        if not (start_term or end_term or course_code or degree):
+            raise ValueError("Choose a term range, a course or a degree.")
+        self.start_term = start_term
+        self.end_term = end_term
+        self.course_code = course_code or None
+        self.degree = tuple(degree.split('|')) if degree else None
+
+    def tables(self):
+        return EVALUATION_TABLES if self.degree else SECTION_TABLES
+
+    def where(self, alias=''):
+        # Filter on any table with term_key and course_code columns (Section, Teaches, Evaluation)
+        clauses, params = [], []
+        if self.start_term:
+            clauses.append(f"{alias}term_key >= %s")
+            params.append(self.start_term)
+        if self.end_term:
+            clauses.append(f"{alias}term_key <= %s")
+            params.append(self.end_term)
+        if self.course_code:
+            clauses.append(f"{alias}course_code = %s")
+            params.append(self.course_code)
+        if self.degree:
+            clauses.append(f"{alias}degree_name = %s AND {alias}degree_level = %s")
+            params.extend(self.degree)
+        return " AND ".join(clauses), params
+
+    def describe(self):
+        parts = []
+        if self.start_term or self.end_term:
+            parts.append(f"{term_name(self.start_term) if self.start_term else 'the first term'} to "
+                         f"{term_name(self.end_term) if self.end_term else 'the last term'}")
+        if self.course_code:
+            parts.append(f"course {self.course_code}")
+        if self.degree:
+            parts.append(f"evaluations for {self.degree[0]} ({self.degree[1]})")
+        return ', '.join(parts)
+
+
+class ArchiveReport:
+    def __init__(self, action, scope, totals=None):
+        self.action = action
+        self.scope = scope
+        self.totals = totals or {}   # rows in scope before this run, from count_scope
+        self.rows = dict.fromkeys(scope.tables(), 0)
+        self.sections = 0
+        self.chunks = 0
+        self.terms = set()
+        self.finished = False
+        self.seconds = 0.0
+
+    def remaining(self, table):
+        return max(0, self.totals.get(table, 0) - self.rows.get(table, 0))
+
+
+def count_scope(cursor, scope):
+    """{table: rows in scope} for a dry run, plus 'sections' (sections touched)."""
+    where, params = scope.where('E.')
+    counts = {}
+    # Evaluation_Method and Evaluation_Summary have no term_key; they are counted through their Evaluation row
+    for table in EVALUATION_TABLES:
+        if table == 'Evaluation':
+            cursor.execute(f"SELECT COUNT(*) FROM Evaluation E WHERE {where}", params)
+        else:
+            cursor.execute(f"""SELECT COUNT(*) FROM {table} X JOIN Evaluation E
+                               ON E.course_code = X.course_code AND E.section_num = X.section_num
+                               AND E.semester = X.semester AND E.year_offered = X.year_offered
+                               AND E.degree_name = X.degree_name AND E.degree_level = X.degree_level
+                               AND E.obj_code = X.obj_code WHERE {where}""", params)
+        counts[table] = cursor.fetchone()[0]
+    if scope.degree:
+        cursor.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT {SECTION_KEY} FROM Evaluation E WHERE {where}) D",
+                       params)
+        counts['sections'] = cursor.fetchone()[0]
+    else:
+        # Teaches is counted through Section, whose term_key is indexed on its own
+        section_where, section_params = scope.where('S.')
+        cursor.execute(f"""SELECT COUNT(*) FROM Teaches T JOIN Section S
+                           ON S.course_code = T.course_code AND S.section_num = T.section_num
+                           AND S.semester = T.semester AND S.year_offered = T.year_offered WHERE {section_where}""",
+                       section_params)
+        counts['Teaches'] = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COUNT(*) FROM Section S WHERE {section_where}", section_params)
+        counts['Section'] = counts['sections'] = cursor.fetchone()[0]
+    return counts
+
+
+def next_chunk(cursor, scope, size):
+    # Processed rows leave the scope, so the next chunk is always the first one left
+    where, params = scope.where()
+    table = 'Evaluation' if scope.degree else 'Section'
+    cursor.execute(f"""SELECT DISTINCT {SECTION_KEY}, term_key FROM {table} WHERE {where}
+                       ORDER BY term_key, course_code, section_num LIMIT %s""", params + [size])
+    return [tuple(row[:4]) for row in cursor.fetchall()]
+
+
+def retire_sections(cursor, action, keys, degree=None):
+    """
+        Archives or purges the given sections (or only `degree`'s evaluations of them) in the
+        caller's transaction. Returns {table: rows deleted}.
+    """
+    if not keys:
+        return {}
+    group = '(' + ', '.join(['%s'] * 4) + ')'
+    where = f"({SECTION_KEY}) IN ({', '.join([group] * len(keys))})"
+    params = [value for key in keys for value in key]
+    if degree:
+        where += " AND degree_name = %s AND degree_level = %s"
+        params += list(degree)
+
+    tables = EVALUATION_TABLES if degree else SECTION_TABLES
+    if action == 'archive':
+        for table in tables:
+            if table in ARCHIVED_COLUMNS:
+                columns = ARCHIVED_COLUMNS[table]
+                cursor.execute(f"REPLACE INTO {table}_Archive ({columns}) SELECT {columns} FROM {table} WHERE {where}",
+                               params)
+    deleted = {}
+    for table in tables:
+        cursor.execute(f"DELETE FROM {table} WHERE {where}", params)
+        deleted[table] = cursor.rowcount
+    if degree:
+        refresh_evaluation_progress(cursor, keys, degree=degree)
+    return deleted
+
+
+def run_archive(conn, action, scope, chunk_size=CHUNK_SIZE, time_budget=None, totals=None, progress=None):
+    """
+        Works through the scope a chunk at a time, committing after each, until nothing is
+        left or `time_budget` seconds have passed (report.finished tells which). A failed
+        chunk is rolled back and the error raised; earlier chunks stay done.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action '{action}'")
+    report = ArchiveReport(action, scope, totals)
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    while True:
+        keys = next_chunk(cursor, scope, chunk_size)
+        if not keys:
+            report.finished = True
+            break
+        try:
+            deleted = retire_sections(cursor, action, keys, scope.degree)
+            conn.commit()
+        except DB_ERRORS:
+            conn.rollback()
+            raise
+        for table, count in deleted.items():
+            report.rows[table] += count
+        report.sections += len(keys)
+        report.chunks += 1
+        report.terms.update(term_key(key[2], int(key[3])) for key in keys)
+        report.seconds = time.perf_counter() - started
+        if progress:
+            progress(report)
+        if time_budget is not None and report.seconds >= time_budget:
+            break
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive or purge old sections and evaluations in chunks.')
+    parser.add_argument('action', choices=ACTIONS)
+    parser.add_argument('--from', dest='start', help="first term, e.g. 'Fall 2010'")
+    parser.add_argument('--to', dest='end', help="last term, e.g. 'Spring 2015'")
+    parser.add_argument('--course', help='only sections of this course')
+    parser.add_argument('--degree', help="only this degree's evaluations, as 'Name|Level'")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='count the rows in scope and change nothing')
+    parser.add_argument('--config', default='config.ini')
+    args = parser.parse_args()
+
+    try:
+        scope = Scope(parse_term(args.start) if args.start else None, parse_term(args.end) if args.end else None,
+                      args.course, args.degree)
+    except ValueError as err:
+        parser.error(str(err))
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    conn = connect_factory(config)()
+    try:
+        totals = count_scope(conn.cursor(), scope)
+        print(f"In scope ({scope.describe()}): {totals['sections']} sections; "
+              + ', '.join(f"{table} {count}" for table, count in totals.items() if table != 'sections'))
+        if args.dry_run:
+            return 0
+
+        def progress(report):
+            print(f"  chunk {report.chunks}: {report.sections} of {totals['sections']} sections done, "
+                  f"{report.remaining('Evaluation')} evaluations left ({report.seconds:.1f}s)", flush=True)
+
+        try:
+            report = run_archive(conn, args.action, scope, args.chunk_size, totals=totals, progress=progress)
+        except DB_ERRORS as err:
+            print(f"Stopped by a database error: {err.msg}. Completed chunks are kept; run again to resume.")
+            return 1
+    finally:
+        conn.close()
+
+    print(f"{'Archived' if args.action == 'archive' else 'Purged'} {report.sections} sections in {report.chunks} "
+          f"chunks: " + ', '.join(f"{table} {count}" for table, count in report.rows.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+    Bulk CSV import for sections, instructors and evaluations.
+
+    Rows are read as a stream, validated a chunk at a time with the same rules as the
+    data entry forms, and written with multi-row inserts in one transaction per chunk.
+    A bad row is reported with its line number and does not stop the rest of the file.
+
+    Usage: python bulk_import.py {sections,instructors,evaluations} file.csv [--chunk-size N]
+"""
+import argparse
+import configparser
+import csv
+import sys
+from datetime import datetime
+
+from db_backend import DB_ERRORS, connect_factory
+from evaluation_store import refresh_evaluation_progress, write_evaluations
+
+CHUNK_SIZE = 500
+SEMESTERS = ('Spring', 'Summer', 'Fall')
+DEGREE_LEVELS = ('BA', 'BS', 'MS', 'PhD', 'Cert')
+
+
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.imported = 0
+        self.errors = []   # (line number, message)
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+
+def _required(row, *fields):
+    values = []
+    for field in fields:
+        value = (row.get(field) or '').strip()
+        if not value:
+            raise ValueError(f"{field} is required.")
+        values.append(value)
+    return values
+
+
+def _required_int(row, *fields):
+    values = []
+    for field, value in zip(fields, _required(row, *fields)):
+        try:
+            values.append(int(value))
+        except ValueError:
+            raise ValueError(f"{field} must be a number.")
+    return values
+
+
+def _int(row, field):
+    # Blank is 0; only for the grade counts, where a blank cell means none
+    try:
+        return int((row.get(field) or '').strip() or 0)
+    except ValueError:
+        raise ValueError(f"{field} must be a number.")
+
+
+def _in_clause(keys):
+    width = len(keys[0])
+    group = '(' + ', '.join(['%s'] * width) + ')'
+    return ', '.join([group] * len(keys)), [value for key in keys for value in key]
+
+
+# --- Sections ---
+def parse_section(row):
+    c_code, sem, inst_id = _required(row, 'course_code', 'semester', 'instructor_id')
+    sec_int, year, enroll = _required_int(row, 'section_num', 'year', 'enrollments')
+    if sem not in SEMESTERS:
+        raise ValueError(f"Unknown semester '{sem}'.")
+    if enroll <= 0:
+        raise ValueError("Enrollment must be greater than 0.")
+    if sec_int == 0:
+        raise ValueError("Section number cannot be 000.")
+    return (c_code, sec_int, sem, year, enroll, inst_id)
+
+
+def validate_sections(cursor, records):
+    ids = sorted(set(rec[5] for _, rec in records))
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT instructor_id, status, last_name FROM Instructor WHERE instructor_id IN ({placeholders})",
+                   ids)
+    instructors = {row['instructor_id']: row for row in cursor.fetchall()}
+    current_year = datetime.now().year
+
+    results = []
+    for line, rec in records:
+        inst = instructors.get(rec[5])
+        if inst is None:
+            results.append((line, rec, f"Instructor {rec[5]} not found."))
+        elif inst['status'] == 'Inactive' and rec[3] >= current_year:
+            results.append((line, rec, f"{inst['last_name']} is Archived and cannot teach future classes ({rec[3]})."))
+        else:
+            results.append((line, rec, None))
+    return results
+
+
+def write_sections(cursor, records):
+    cursor.executemany(
+        "INSERT INTO Section (course_code, section_num, semester, year_offered, num_enrollments) VALUES (%s, %s, %s, %s, %s)",
+        [rec[:5] for rec in records])
+    cursor.executemany(
+        "INSERT INTO Teaches (course_code, section_num, semester, year_offered, instructor_id) VALUES (%s, %s, %s, %s, %s)",
+        [rec[:4] + (rec[5],) for rec in records])
+    refresh_evaluation_progress(cursor, [rec[:4] for rec in records])
+
+
+# --- Instructors ---
+def parse_instructor(row):
+    inst_id, first, last, email = _required(row, 'instructor_id', 'first_name', 'last_name', 'email')
+    return (inst_id, first, (row.get('middle_name') or '').strip(), last, email, (row.get('phone') or '').strip())
+
+
+def validate_instructors(cursor, records):
+    # Uniqueness of id and email is left to the database; a clash is reported per row on write
+    return [(line, rec, None) for line, rec in records]
+
+
+def write_instructors(cursor, records):
+    cursor.executemany(
+        "INSERT INTO Instructor (instructor_id, first_name, middle_name, last_name, email_id, phone_number, status) VALUES (%s, %s, %s, %s, %s, %s, 'Active')",
+        records)
+
+
+# --- Evaluations ---
+def parse_evaluation(row):
+    d_name, d_level, c_code, sem, obj_code = _required(row, 'degree_name', 'degree_level', 'course_code',
+                                                       'semester', 'obj_code')
+    if sem not in SEMESTERS:
+        raise ValueError(f"Unknown semester '{sem}'.")
+    if d_level not in DEGREE_LEVELS:
+        raise ValueError(f"Unknown degree level '{d_level}'.")
+    sec_int, year = _required_int(row, 'section_num', 'year')
+    counts = tuple(_int(row, f'count_{grade}') for grade in 'ABCF')
+    if min(counts) < 0:
+        raise ValueError("Grade counts cannot be negative.")
+    methods = list(dict.fromkeys(m.strip() for m in (row.get('methods') or '').split(';') if m.strip()))
+    return {'key': (c_code, sec_int, sem, year, d_name, d_level, obj_code),
+            'counts': counts, 'improvement': (row.get('improvement') or '').strip(), 'methods': methods}
+
+
+def validate_evaluations(cursor, records):
+    sections = sorted(set(rec['key'][:4] for _, rec in records))
+    placeholders, params = _in_clause(sections)
+    cursor.execute(
+        f"SELECT course_code, section_num, semester, year_offered, num_enrollments FROM Section WHERE (course_code, section_num, semester, year_offered) IN ({placeholders})",
+        params)
+    limits = {(row['course_code'], int(row['section_num']), row['semester'], int(row['year_offered'])):
+              row['num_enrollments'] for row in cursor.fetchall()}
+
+    results = []
+    for line, rec in records:
+        limit = limits.get(rec['key'][:4])
+        total = sum(rec['counts'])
+        if limit is None:
+            results.append((line, rec, "Section not found."))
+        elif total != 0 and total != limit:
+            # Same rule as the form: 0 (not yet graded) or exactly the enrollment
+            results.append((line, rec, f"Total ({total}) must be exactly {limit}."))
+        else:
+            results.append((line, rec, None))
+    return results
+
+
+def write_evaluations_chunk(cursor, records):
+    latest = {}
+    for rec in records:
+        latest[rec['key']] = rec   # a later row for the same evaluation replaces an earlier one
+    eval_rows = [rec['key'] + rec['counts'] + (rec['improvement'],) for rec in latest.values()]
+    method_rows = [rec['key'] + (m,) for rec in latest.values() for m in rec['methods']]
+    write_evaluations(cursor, eval_rows, method_rows)
+
+
+IMPORTERS = {
+    'sections': (('course_code', 'section_num', 'semester', 'year', 'enrollments', 'instructor_id'),
+                 parse_section, validate_sections, write_sections),
+    'instructors': (('instructor_id', 'first_name', 'last_name', 'email'),
+                    parse_instructor, validate_instructors, write_instructors),
+    'evaluations': (('degree_name', 'degree_level', 'course_code', 'section_num', 'semester', 'year', 'obj_code',
+                     'count_A', 'count_B', 'count_C', 'count_F'),
+                    parse_evaluation, validate_evaluations, write_evaluations_chunk),
+}
+
+
+def _import_chunk(conn, kind, chunk, report):
+    _, parse, validate, write = IMPORTERS[kind]
+    cursor = conn.cursor(dictionary=True)
+
+    parsed = []
+    for line, row in chunk:
+        try:
+            parsed.append((line, parse(row)))
+        except ValueError as err:
+            report.error(line, str(err))
+    if not parsed:
+        return
+
+    valid = []
+    for line, rec, message in validate(cursor, parsed):
+        if message:
+            report.error(line, message)
+        else:
+            valid.append((line, rec))
+    if not valid:
+        return
+
+    try:
+        write(cursor, [rec for _, rec in valid])
+        conn.commit()
+        report.imported += len(valid)
+    except DB_ERRORS:
+        # Something in the chunk clashed (duplicate key, missing parent row); retry row by row to find it
+        conn.rollback()
+        for line, rec in valid:
+            try:
+                write(cursor, [rec])
+                conn.commit()
+                report.imported += 1
+            except DB_ERRORS as err:
+                conn.rollback()
+                report.error(line, err.msg)
+
+
+def run_import(conn, kind, lines, chunk_size=CHUNK_SIZE):
+    """
+        Imports CSV text (any iterable of lines, e.g. an open file) into the given kind of table.
+        Returns an ImportReport; the file is never rejected as a whole for bad rows.
+    """
+    report = ImportReport(kind)
+    columns = IMPORTERS[kind][0]
+    reader = csv.DictReader(lines)
+    missing = [col for col in columns if col not in (reader.fieldnames or [])]
+    if missing:
+        report.error(1, f"Missing columns: {', '.join(missing)}")
+        return report
+
+    chunk = []
+    for line, row in enumerate(reader, start=2):
+        report.rows += 1
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            _import_chunk(conn, kind, chunk, report)
+            chunk = []
+    if chunk:
+        _import_chunk(conn, kind, chunk, report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import CSV data into the program evaluation database.')
+    parser.add_argument('kind', choices=sorted(IMPORTERS))
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--config', default='config.ini')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    conn = connect_factory(config)()
+    try:
+        with open(args.path, newline='', encoding='utf-8-sig') as f:
+            report = run_import(conn, args.kind, f, args.chunk_size)
+    finally:
+        conn.close()
+
+    for line, message in report.errors:
+        print(f"Line {line}: {message}")
+    print(f"{report.imported} of {report.rows} {args.kind} rows imported, {len(report.errors)} errors.")
+    return 1 if report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
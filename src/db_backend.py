@@ -0,0 +1,267 @@
+"""
+    Storage backends, chosen in config.ini:
+
+        [database]
+        backend = mysql        ; or sqlite
+
+        [sqlite]
+        path = program_eval.db ; or :memory:
+        wal = true
+
+    connect_factory(config) returns a function that opens one new connection; the pool calls it.
+    The SQLite connection offers the part of the mysql.connector API the app uses (%s parameters,
+    dictionary cursors, column_names, err.msg / err.errno) and rewrites the few MySQL-only
+    statements it issues, so routes, reports and imports run unchanged on either backend.
+"""
+import itertools
+import os
+import re
+import sqlite3
+from functools import lru_cache
+
+try:
+    import mysql.connector
+except ImportError:   # not needed by SQLite-only deployments
+    mysql = None
+
+# mysql.connector.errorcode values, also set on SQLite errors so callers check one errno
+ER_DUP_ENTRY = 1062
+ER_BAD_NULL_ERROR = 1048
+ER_ROW_IS_REFERENCED_2 = 1451
+ER_NO_REFERENCED_ROW_2 = 1452
+ER_CHECK_CONSTRAINT_VIOLATED = 3819
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+
+
+class SQLiteError(Exception):
+    def __init__(self, msg, errno=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+
+
+# Catch this instead of mysql.connector.Error so both backends are covered
+DB_ERRORS = (mysql.connector.Error, SQLiteError) if mysql else (SQLiteError,)
+
+
+def _translate_error(err):
+    message = str(err)
+    errno = None
+    if isinstance(err, sqlite3.IntegrityError):
+        if message.startswith('UNIQUE constraint failed'):
+            errno, message = ER_DUP_ENTRY, f"Duplicate entry ({message})"
+        elif message.startswith('FOREIGN KEY constraint failed'):
+            errno = ER_NO_REFERENCED_ROW_2
+        elif message.startswith('NOT NULL constraint failed'):
+            errno = ER_BAD_NULL_ERROR
+        elif message.startswith('CHECK constraint failed'):
+            errno = ER_CHECK_CONSTRAINT_VIOLATED
+    return SQLiteError(message, errno)
+
+
+# --- MySQL -> SQLite statement rewriting
+_PLACEHOLDER_GROUP = r"\(\s*%s(?:\s*,\s*%s)*\s*\)"
+_ROW_IN = re.compile(
+    rf"(\((?:\s*[\w.]+\s*,)+\s*[\w.]+\s*\))\s+IN\s*\(\s*({_PLACEHOLDER_GROUP}(?:\s*,\s*{_PLACEHOLDER_GROUP})*)\s*\)",
+    re.I)
+# Longer OR chains would approach SQLite's expression depth limit (1000)
+_ROW_IN_MAX_OR = 200
+_GROUP_CONCAT = re.compile(
+    r"GROUP_CONCAT\(\s*(?P<expr>[^()]+?)(?:\s+ORDER\s+BY\s+(?P<order>[^()]+?))?\s+SEPARATOR\s+(?P<sep>'[^']*')\s*\)",
+    re.I)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.I)
+_LIKE_PARAM = re.compile(r"\bLIKE\s+%s", re.I)
+# ORDER BY inside an aggregate arrived in SQLite 3.44; older versions concatenate in scan order
+_ORDERED_AGGREGATES = sqlite3.sqlite_version_info >= (3, 44, 0)
+
+
+def _row_in(match):
+    # SQLite plans (a, b) IN (VALUES ...) as a full scan, but looks up each (a, b) = (?, ?)
+    # of an OR chain by primary key
+    columns, groups = match.group(1), re.findall(_PLACEHOLDER_GROUP, match.group(2))
+    if len(groups) > _ROW_IN_MAX_OR:
+        return f"{columns} IN (SELECT * FROM (VALUES {', '.join(groups)}))"
+    return '(' + ' OR '.join(f"{columns} = {group}" for group in groups) + ')'
+
+
+def _group_concat(match):
+    if match.group('order') and _ORDERED_AGGREGATES:
+        return f"GROUP_CONCAT({match.group('expr')}, {match.group('sep')} ORDER BY {match.group('order')})"
+    return f"GROUP_CONCAT({match.group('expr')}, {match.group('sep')})"
+
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """Rewrites one MySQL statement (as written in this app) into SQLite syntax."""
+    sql = _INSERT_IGNORE.sub('INSERT OR IGNORE', sql)
+    sql = _GROUP_CONCAT.sub(_group_concat, sql)
+    sql = _ROW_IN.sub(_row_in, sql)
+    match = _ON_DUPLICATE.search(sql)
+    if match:
+        assignments = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", sql[match.end():], flags=re.I)
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + assignments
+    # MySQL treats backslash as the LIKE escape character by default; SQLite needs it spelled out
+    sql = _LIKE_PARAM.sub(lambda m: "LIKE %s ESCAPE '\\'", sql)
+    return sql.replace('%s', '?')
+
+
+class SQLiteCursor:
+    def __init__(self, raw, dictionary=False):
+        self._cursor = raw.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def column_names(self):
+        return tuple(col[0] for col in self._cursor.description or ())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, sql, params=None):
+        try:
+            self._cursor.execute(translate_sql(sql), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise _translate_error(err) from err
+
+    def executemany(self, sql, seq_params):
+        try:
+            self._cursor.executemany(translate_sql(sql), [tuple(p) for p in seq_params])
+        except sqlite3.Error as err:
+            raise _translate_error(err) from err
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self, dictionary=False, buffered=False):
+        # sqlite3 cursors read lazily from local pages, so buffered needs no special handling
+        return SQLiteCursor(self._raw, dictionary)
+
+    def commit(self):
+        try:
+            self._raw.commit()
+        except sqlite3.Error as err:
+            raise _translate_error(err) from err
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False):
+        try:
+            self._raw.execute("SELECT 1")
+        except sqlite3.Error as err:
+            raise _translate_error(err) from err
+
+    def close(self):
+        self._raw.close()
+
+
+_memory_ids = itertools.count(1)
+
+
+def _sqlite_factory(config, migrate=True):
+    path = config.get('sqlite', 'path', fallback='program_eval.db')
+    busy_timeout = config.getfloat('sqlite', 'busy_timeout', fallback=30)
+    memory = path == ':memory:'
+    # A named shared-cache database lets every pooled connection see the same in-memory data
+    target = f"file:program_eval_{next(_memory_ids)}?mode=memory&cache=shared" if memory else path
+
+    def connect():
+        raw = sqlite3.connect(target, uri=memory, timeout=busy_timeout, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys = ON")
+        return SQLiteConnection(raw)
+
+    first = sqlite3.connect(target, uri=memory, timeout=busy_timeout, check_same_thread=False)
+    if not memory and config.getboolean('sqlite', 'wal', fallback=True):
+        first.execute("PRAGMA journal_mode = WAL")
+        first.execute("PRAGMA synchronous = NORMAL")
+    with open(SCHEMA_PATH) as f:
+        first.executescript(f.read())
+    # A single-node database has no separate deploy step, so it is migrated when opened
+    if migrate:
+        from migrations import migrate as run_migrations
+        run_migrations(SQLiteConnection(first), 'sqlite')
+    if memory:
+        connect.keeper = first   # the in-memory database lives as long as one connection is open
+    else:
+        first.close()
+    return connect
+
+
+def _mysql_factory(config, replica=None):
+    if mysql is None:
+        raise RuntimeError("backend = mysql needs mysql-connector-python (pip install mysql-connector-python)")
+    settings = {
+        'host': config['mysql']['host'],
+        'user': config['mysql']['user'],
+        'password': config['mysql']['password'],
+        'database': config['mysql']['database'],
+    }
+    if replica:
+        # Same database and, unless [replicas] says otherwise, the same account as the primary
+        host, _, port = replica.partition(':')
+        settings.update(host=host, user=config.get('replicas', 'user', fallback=settings['user']),
+                        password=config.get('replicas', 'password', fallback=settings['password']),
+                        connection_timeout=config.getint('replicas', 'connect_timeout', fallback=2))
+        if port:
+            settings['port'] = int(port)
+
+    def connect():
+        return mysql.connector.connect(**settings)
+    return connect
+
+
+BACKENDS = {'mysql': _mysql_factory, 'sqlite': _sqlite_factory}
+
+
+def backend_name(config):
+    return config.get('database', 'backend', fallback='mysql').strip().lower()
+
+
+def connect_factory(config, migrate=True):
+    """
+        Returns a no-argument function that opens a new connection to the configured database.
+        migrate=False leaves an SQLite database at the schema version it has (for migrations.py).
+    """
+    name = backend_name(config)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown database backend '{name}'; expected one of {', '.join(sorted(BACKENDS))}")
+    if name == 'sqlite':
+        return _sqlite_factory(config, migrate)
+    return BACKENDS[name](config)
+
+
+def replica_factories(config):
+    """[(host, connect)] for the read replicas listed in [replicas] hosts; empty when there are none."""
+    hosts = [host.strip() for host in config.get('replicas', 'hosts', fallback='').split(',') if host.strip()]
+    if hosts and backend_name(config) != 'mysql':
+        raise ValueError("Read replicas need backend = mysql")
+    return [(host, _mysql_factory(config, host)) for host in hosts]
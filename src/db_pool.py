@@ -0,0 +1,154 @@
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """
+        Thin wrapper handed to the routes. Everything is delegated to the real
+        connection except close(), which returns it to the pool instead.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def closed(self):
+        return self._raw is None
+
+    def close(self):
+        if self._raw is not None:
+            self._pool.release(self._raw)
+            self._raw = None
+
+
+class ConnectionPool:
+    """
+        Fixed-size connection pool with overflow.
+
+        - size:         connections kept open while idle
+        - max_overflow: extra connections opened under load, closed on release
+        - timeout:      seconds to wait for a free connection before PoolTimeout
+        - recycle:      connections older than this (seconds) are reopened
+        - pre_ping:     ping the server on checkout and reconnect if it is gone
+    """
+
+    def __init__(self, connect, size=5, max_overflow=5, timeout=10, recycle=3600, pre_ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = []          # list of (raw_conn, created_at)
+        self._created_at = {}    # id(raw_conn) -> created_at, for connections in use
+        self._total = 0
+        self._cond = threading.Condition()
+        self._stats = {'checkouts': 0, 'waits': 0, 'timeouts': 0, 'created': 0,
+                       'recycled': 0, 'ping_failures': 0, 'wait_time': 0.0}
+
+    def _open(self):
+        raw = self._connect()
+        self._stats['created'] += 1
+        return raw, time.time()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _checkout_raw(self):
+        with self._cond:
+            waited = False
+            start = time.time()
+            while True:
+                if self._idle:
+                    return self._idle.pop(), waited, start
+                if self._total < self.size + self.max_overflow:
+                    # Reserve the slot now, open the socket outside the lock
+                    self._total += 1
+                    return None, waited, start
+                remaining = self.timeout - (time.time() - start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No connection available after {self.timeout}s")
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+    def checkout(self):
+        entry, waited, start = self._checkout_raw()
+        try:
+            if entry is None:
+                raw, created = self._open()
+            else:
+                raw, created = entry
+                if self.recycle and time.time() - created > self.recycle:
+                    self._discard(raw)
+                    self._stats['recycled'] += 1
+                    raw, created = self._open()
+                elif self.pre_ping and not self._ping(raw):
+                    self._discard(raw)
+                    self._stats['ping_failures'] += 1
+                    raw, created = self._open()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created_at[id(raw)] = created
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['wait_time'] += time.time() - start
+        return PooledConnection(self, raw)
+
+    def _ping(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def release(self, raw):
+        # Never hand an open transaction to the next borrower
+        try:
+            raw.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            created = self._created_at.pop(id(raw), time.time())
+            if healthy and len(self._idle) < self.size:
+                self._idle.append((raw, created))
+            else:
+                self._total -= 1
+                self._discard(raw)
+            self._cond.notify()
+
+    def dispose(self):
+        with self._cond:
+            for raw, _ in self._idle:
+                self._discard(raw)
+            self._total -= len(self._idle)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({'size': self.size, 'max_overflow': self.max_overflow,
+                         'open': self._total, 'idle': len(self._idle),
+                         'in_use': self._total - len(self._idle)})
+        return data
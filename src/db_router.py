@@ -0,0 +1,135 @@
+"""
+    Read/write splitting across the primary and optional read replicas ([replicas] in config.ini).
+
+    Writes always go to the primary pool. Reads that may run on a replica ask the router for
+    one: it picks, round-robin, among the replicas whose last health check found them at
+    most `max_lag` seconds behind, and answers None (use the primary) while there are none.
+    A background thread checks each replica every `check_interval` seconds; a replica that
+    is down, has stopped replicating or lags too far is left out until a later check passes.
+
+    A check at time t that finds a replica L seconds behind means it holds every write
+    committed on the primary before t - L (less a second, the resolution of the lag, and
+    assuming the servers' clocks agree). That time is the replica's `caught_up_to`. Callers
+    pass the time of the write they must see as `since`, so a browser that has just written
+    reads from the primary until a replica has caught up past its write.
+"""
+import threading
+import time
+
+from db_backend import DB_ERRORS
+from db_pool import PoolTimeout
+
+
+def replica_lag(conn):
+    """Seconds the server behind `conn` is behind its primary, or None if it is not replicating."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SHOW REPLICA STATUS")
+    except DB_ERRORS:
+        cursor.execute("SHOW SLAVE STATUS")   # MySQL before 8.0.22, MariaDB before 10.5
+    rows = cursor.fetchall()
+    lags = [row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master')) for row in rows]
+    if not lags or None in lags:
+        return None
+    return max(lags)
+
+
+class Replica:
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = False   # until the first check passes
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.caught_up_to = 0.0
+
+
+class ReplicaRouter:
+    def __init__(self, primary, replicas=(), max_lag=5, check_interval=5):
+        self.primary = primary
+        self.replicas = [Replica(name, pool) for name, pool in replicas]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'replica_reads': 0, 'primary_reads': 0, 'sticky_reads': 0, 'fallbacks': 0}
+
+    def start(self):
+        """Starts the health checks on first use."""
+        with self._lock:
+            if self._thread is not None or not self.replicas:
+                return
+            self._thread = threading.Thread(target=self._watch, name='replica-check', daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        while True:
+            for replica in self.replicas:
+                self._check(replica)
+            time.sleep(self.check_interval)
+
+    def _check(self, replica):
+        checked_at = time.time()
+        try:
+            conn = replica.pool.checkout()
+            try:
+                lag = replica_lag(conn)
+            finally:
+                conn.close()
+            error = None if lag is not None else 'Not replicating'
+        except DB_ERRORS + (PoolTimeout,) as err:
+            lag, error = None, str(getattr(err, 'msg', err))
+        with self._lock:
+            if error and replica.healthy:
+                print(f"Read replica {replica.name} left out: {error}")
+            replica.lag, replica.error, replica.checked_at = lag, error, checked_at
+            replica.healthy = lag is not None and lag <= self.max_lag
+            if lag is not None:
+                replica.caught_up_to = max(replica.caught_up_to, checked_at - lag - 1)
+
+    def mark_down(self, replica, err):
+        """Leaves out a replica a request could not reach, until its next check passes."""
+        with self._lock:
+            replica.healthy = False
+            replica.error = str(getattr(err, 'msg', err))
+            self._stats['fallbacks'] += 1
+        print(f"Read replica {replica.name} left out: {replica.error}")
+
+    def read_replica(self, since=0.0):
+        """A healthy replica holding every write committed before `since`, or None for the primary."""
+        self.start()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            usable = [replica for replica in healthy if replica.caught_up_to >= since]
+            if not usable:
+                self._stats['primary_reads'] += 1
+                if healthy:
+                    self._stats['sticky_reads'] += 1
+                return None
+            self._stats['replica_reads'] += 1
+            self._turn = (self._turn + 1) % len(usable)
+            return usable[self._turn]
+
+    def checkout_read(self, since=0.0):
+        """A connection for reads only: from a replica if one is usable and reachable, else the primary."""
+        replica = self.read_replica(since)
+        if replica is not None:
+            try:
+                return replica.pool.checkout()
+            except DB_ERRORS + (PoolTimeout,) as err:
+                self.mark_down(replica, err)
+        return self.primary.checkout()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['replicas'] = len(self.replicas)
+            data['healthy'] = sum(replica.healthy for replica in self.replicas)
+            data['max_lag'] = self.max_lag
+            data['detail'] = [{'name': replica.name, 'healthy': replica.healthy, 'lag': replica.lag,
+                               'error': replica.error, 'checked_at': replica.checked_at,
+                               'caught_up_to': replica.caught_up_to, 'pool': replica.pool.stats()}
+                              for replica in self.replicas]
+        return data
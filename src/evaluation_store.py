@@ -0,0 +1,110 @@
+# Evaluation_Summary rows computed from Evaluation + Evaluation_Method; {where} narrows it down.
+# 100.0 and ROUND keep the pass rate exact on SQLite, whose integer division truncates.
+SUMMARY_SELECT = """SELECT E.course_code, E.section_num, E.semester, E.year_offered,
+                           E.degree_name, E.degree_level, E.obj_code,
+                           E.count_A + E.count_B + E.count_C,
+                           E.count_A + E.count_B + E.count_C + E.count_F,
+                           ROUND((E.count_A + E.count_B + E.count_C) * 100.0 / NULLIF(E.count_A + E.count_B + E.count_C + E.count_F, 0), 2),
+                           GROUP_CONCAT(EM.method_name ORDER BY EM.method_name SEPARATOR ', ')
+                    FROM Evaluation E
+                    LEFT JOIN Evaluation_Method EM ON EM.course_code = E.course_code
+                      AND EM.section_num = E.section_num AND EM.semester = E.semester
+                      AND EM.year_offered = E.year_offered AND EM.degree_name = E.degree_name
+                      AND EM.degree_level = E.degree_level AND EM.obj_code = E.obj_code
+                    {where}
+                    GROUP BY E.course_code, E.section_num, E.semester, E.year_offered,
+                             E.degree_name, E.degree_level, E.obj_code"""
+
+# Evaluation_Progress rows: per (section, degree), the objectives expected by Course_Objective,
+# how many have grades entered and how many have an improvement note.
+PROGRESS_COLUMNS = """course_code, section_num, semester, year_offered, degree_name, degree_level,
+                      expected, entered, improvements, updated_at"""
+PROGRESS_SELECT = """SELECT S.course_code, S.section_num, S.semester, S.year_offered, CO.degree_name, CO.degree_level,
+                            COUNT(*),
+                            COALESCE(SUM(E.count_A + E.count_B + E.count_C + E.count_F > 0), 0),
+                            COALESCE(SUM(E.improvement IS NOT NULL AND E.improvement <> ''), 0),
+                            CURRENT_TIMESTAMP
+                     FROM Section S JOIN Course_Objective CO ON CO.course_code = S.course_code
+                     LEFT JOIN Evaluation E ON E.course_code = S.course_code
+                       AND E.section_num = S.section_num AND E.semester = S.semester
+                       AND E.year_offered = S.year_offered AND E.degree_name = CO.degree_name
+                       AND E.degree_level = CO.degree_level AND E.obj_code = CO.obj_code
+                     {where}
+                     GROUP BY S.course_code, S.section_num, S.semester, S.year_offered, CO.degree_name, CO.degree_level"""
+
+
+def refresh_evaluation_summary(cursor, sections):
+    # Rebuild the Evaluation_Summary rows of the given (course, section, semester, year) keys in one statement
+    placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(sections))
+    cursor.execute("REPLACE INTO Evaluation_Summary " + SUMMARY_SELECT.format(
+        where=f"WHERE (E.course_code, E.section_num, E.semester, E.year_offered) IN ({placeholders})"),
+        [value for section in sections for value in section])
+
+
+def refresh_evaluation_progress(cursor, sections=None, course_code=None, degree=None):
+    """
+        Recomputes Evaluation_Progress for the given (course, section, semester, year) keys, or
+        for every section of `course_code` (optionally only `degree`, a (name, level) pair)
+        after its objective mapping changed. Runs in the caller's transaction.
+    """
+    clauses, params = [], []
+    if sections is not None:
+        if not sections:
+            return
+        clauses.append("({a}course_code, {a}section_num, {a}semester, {a}year_offered) IN ("
+                       + ', '.join(['(%s, %s, %s, %s)'] * len(sections)) + ")")
+        params += [value for section in sections for value in section]
+    if course_code:
+        clauses.append("{a}course_code = %s")
+        params.append(course_code)
+    where = ' AND '.join(clauses)
+    if degree:
+        where += " AND {d}degree_name = %s AND {d}degree_level = %s"
+        params += list(degree)
+    # Delete first: a section whose course lost its last objective for a degree has no row at all
+    cursor.execute("DELETE FROM Evaluation_Progress WHERE " + where.format(a='', d=''), params)
+    cursor.execute(f"INSERT INTO Evaluation_Progress ({PROGRESS_COLUMNS}) "
+                   + PROGRESS_SELECT.format(where="WHERE " + where.format(a='S.', d='CO.')), params)
+
+
+def rebuild_evaluation_summary(cursor):
+    # Recompute the whole table, e.g. after loading Evaluation rows directly
+    cursor.execute("DELETE FROM Evaluation_Summary")
+    cursor.execute("INSERT INTO Evaluation_Summary " + SUMMARY_SELECT.format(where=""))
+
+
+def rebuild_evaluation_progress(cursor):
+    cursor.execute("DELETE FROM Evaluation_Progress")
+    cursor.execute(f"INSERT INTO Evaluation_Progress ({PROGRESS_COLUMNS}) " + PROGRESS_SELECT.format(where=""))
+
+
+def write_evaluations(cursor, eval_rows, method_rows):
+    """
+        Saves a batch of evaluations with a fixed number of statements, however many
+        objectives, degrees or sections the batch covers. The caller commits.
+
+        eval_rows:   (course, section, semester, year, degree_name, degree_level, obj_code, A, B, C, F, improvement)
+        method_rows: (course, section, semester, year, degree_name, degree_level, obj_code, method_name)
+    """
+    if not eval_rows:
+        return
+    keys = [row[:7] for row in eval_rows]
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(keys))
+    cursor.execute(
+        f"DELETE FROM Evaluation_Method WHERE (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code) IN ({placeholders})",
+        [value for key in keys for value in key])
+    # Upsert rather than REPLACE so the row is not deleted (and its children cascaded) first
+    cursor.executemany(
+        """INSERT INTO Evaluation (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code,
+                                  count_A, count_B, count_C, count_F, improvement)
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+           ON DUPLICATE KEY UPDATE count_A=VALUES(count_A), count_B=VALUES(count_B), count_C=VALUES(count_C),
+                                   count_F=VALUES(count_F), improvement=VALUES(improvement)""",
+        eval_rows)
+    if method_rows:
+        cursor.executemany(
+            "INSERT INTO Evaluation_Method (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code, method_name) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            method_rows)
+    sections = list(dict.fromkeys(row[:4] for row in eval_rows))
+    refresh_evaluation_summary(cursor, sections)
+    refresh_evaluation_progress(cursor, sections)
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+BATCH_SIZE = 500
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def to_json(value):
+    # Compact separators; Decimal, date and bytes values as in the NDJSON export
+    return json.dumps(value, default=_json_default, separators=(',', ':'))
+
+
+def _encode_batches(cursor, fmt):
+    columns = list(cursor.column_names)
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        yield buf.getvalue()
+
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        if fmt == 'csv':
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerows(rows)
+            yield buf.getvalue()
+        else:
+            yield ''.join(to_json(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def stream_rows(cursor, fmt, compress=False):
+    """
+        Yields an executed cursor's result as CSV or NDJSON, BATCH_SIZE rows at a time,
+        optionally gzip-compressed on the fly. Memory use does not grow with the result size.
+    """
+    if not compress:
+        for chunk in _encode_batches(cursor, fmt):
+            yield chunk.encode('utf-8')
+        return
+
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in _encode_batches(cursor, fmt):
+        data = gz.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield gz.flush()
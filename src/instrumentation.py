@@ -0,0 +1,211 @@
+import logging
+import re
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+slow_log = logging.getLogger('slow_query')
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+                sep = ',' if labels else ''
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-1]}')
+                lines.append(f'{self.name}_sum{{{labels}}} {series[-2]:.6f}')
+                lines.append(f'{self.name}_count{{{labels}}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+                lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def normalize_sql(sql):
+    # Collapse whitespace; values are never in the text since every query binds %s parameters
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class RequestStats:
+    """Statements run while serving one request; turned into metrics at teardown."""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.statements = []   # dicts: sql, params, seconds, rows, error
+        self.render_seconds = 0.0
+        self.keep_args = False   # also keep parameter values (benchmarks/check_indexes.py); never logged
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._current = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _run(self, method, sql, params):
+        record = {'sql': sql, 'params': 0 if params is None else len(params), 'seconds': 0.0, 'rows': 0,
+                  'error': False}
+        if self._stats.keep_args:
+            record['args'] = params
+        self._stats.statements.append(record)
+        self._current = record
+        start = time.perf_counter()
+        try:
+            return method(sql, params) if params is not None else method(sql)
+        except Exception:
+            record['error'] = True
+            raise
+        finally:
+            record['seconds'] += time.perf_counter() - start
+
+    def execute(self, sql, params=None):
+        return self._run(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_params):
+        return self._run(self._cursor.executemany, sql, seq_params)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._current is not None:
+            self._current['seconds'] += time.perf_counter() - start
+            if isinstance(result, list):
+                self._current['rows'] += len(result)
+            elif result is not None:
+                self._current['rows'] += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size=1):
+        return self._fetch(self._cursor.fetchmany, size)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats)
+
+
+class Metrics:
+    """
+        Per-route request, SQL and render timings, kept as Prometheus histograms, plus a
+        slow-query log for statements over `slow_query_ms` (parameters are never logged).
+    """
+
+    def __init__(self, slow_query_ms=200, slow_log_path=None):
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        if slow_log_path and not slow_log.handlers:
+            handler = logging.FileHandler(slow_log_path)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_log.addHandler(handler)
+            slow_log.setLevel(logging.INFO)
+            slow_log.propagate = False
+
+        self.request_seconds = Histogram('app_request_duration_seconds', 'Time to serve a request.',
+                                         ('route',), LATENCY_BUCKETS)
+        self.db_seconds = Histogram('app_request_db_seconds', 'Time spent in SQL per request.',
+                                    ('route',), LATENCY_BUCKETS)
+        self.render_seconds = Histogram('app_request_render_seconds', 'Time spent rendering templates per request.',
+                                        ('route',), LATENCY_BUCKETS)
+        self.queries = Histogram('app_request_queries', 'SQL statements per request.', ('route',), COUNT_BUCKETS)
+        self.statement_seconds = Histogram('app_sql_statement_duration_seconds', 'Latency of one SQL statement.',
+                                           ('route', 'verb'), LATENCY_BUCKETS)
+        self.rows = Counter('app_sql_rows_returned_total', 'Rows fetched from SQL statements.', ('route',))
+        self.errors = Counter('app_sql_errors_total', 'SQL statements that raised an error.', ('route',))
+        self.slow = Counter('app_sql_slow_statements_total', 'Statements over the slow-query threshold.',
+                            ('route',))
+
+    def finish(self, stats):
+        route = stats.route
+        db_total = 0.0
+        for record in stats.statements:
+            verb = record['sql'].lstrip().split(None, 1)[0].upper() if record['sql'].strip() else '?'
+            self.statement_seconds.observe(record['seconds'], route, verb)
+            self.rows.inc(record['rows'], route)
+            db_total += record['seconds']
+            if record['error']:
+                self.errors.inc(1, route)
+            if record['seconds'] >= self.slow_query_seconds:
+                self.slow.inc(1, route)
+                slow_log.info("%.1fms route=%s rows=%d params=[%d redacted] %s", record['seconds'] * 1000, route,
+                              record['rows'], record['params'], normalize_sql(record['sql']))
+        self.request_seconds.observe(time.perf_counter() - stats.started, route)
+        self.db_seconds.observe(db_total, route)
+        self.render_seconds.observe(stats.render_seconds, route)
+        self.queries.observe(len(stats.statements), route)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_seconds, self.db_seconds, self.render_seconds, self.queries,
+                       self.statement_seconds, self.rows, self.errors, self.slow):
+            lines.extend(metric.render())
+        return lines
+
+
+def render_gauges(prefix, values):
+    # Plain numeric dicts (pool / cache stats) as untyped Prometheus samples
+    return [f"{prefix}_{key} {int(value) if isinstance(value, bool) else value}"
+            for key, value in sorted(values.items()) if isinstance(value, (int, float))]
@@ -0,0 +1,90 @@
+"""
+    Helpers for the read-only JSON API: keyset pagination and compact page encoding.
+
+    A page is {"columns": [...], "rows": [[...], ...], "next_cursor": token or null}, with the
+    column names sent once rather than on every row. The cursor is the sort key of the last
+    row returned, base64-encoded, so the next page seeks straight past it instead of
+    counting through an OFFSET.
+"""
+import base64
+import binascii
+import json
+
+from export import to_json
+
+
+def keyset(keys, after, descending=True):
+    """
+        WHERE fragment and params selecting the rows after the sort key `after`, for rows
+        ordered by `keys` (SQL expressions), all descending or all ascending.
+    """
+    values = list(after)
+    if len(values) != len(keys):
+        raise ValueError("Cursor does not match this listing")
+    # A NULL key part only occurs on the single row of its group (e.g. a section with no
+    # objectives), so the seek can stop at the part before it
+    if None in values:
+        keys, values = keys[:values.index(None)], values[:values.index(None)]
+    op = '<' if descending else '>'
+    sql, params = None, []
+    for key, value in reversed(list(zip(keys, values))):
+        if sql is None:
+            sql, params = f"{key} {op} %s", [value]
+        else:
+            sql, params = f"{key} {op} %s OR ({key} = %s AND ({sql}))", [value, value] + params
+    return f"({sql})", params
+
+
+def order_by(keys, descending=True):
+    direction = 'DESC' if descending else 'ASC'
+    return ' ORDER BY ' + ', '.join(f"{key} {direction}" for key in keys)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(to_json(list(values)).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """The key values in a cursor token, or None for the first page. Raises ValueError if malformed."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+def page_limit(value, default, maximum):
+    try:
+        limit = int(value) if value else default
+    except ValueError:
+        raise ValueError("limit must be a whole number")
+    return max(1, min(limit, maximum))
+
+
+def project(columns, fields):
+    """The requested subset of `columns`, in the order asked for; all of them if `fields` is empty."""
+    if not fields:
+        return list(columns)
+    wanted = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in wanted if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(columns)}")
+    return wanted
+
+
+def page_body(columns, rows, limit=None, row_key=None, fields=None, **meta):
+    """
+        Encodes one page of dict rows. Callers fetch limit + 1 rows; the extra one only says
+        whether there is a next page, whose cursor is row_key() of the last row kept.
+    """
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(row_key(rows[-1]))
+    columns = project(columns, fields)
+    return to_json(dict(meta, columns=columns, rows=[[row[name] for name in columns] for row in rows],
+                        next_cursor=next_cursor))
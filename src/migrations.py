@@ -0,0 +1,336 @@
+"""
+    Versioned schema migrations.
+
+    The base tables come from Create_Tables.py (MySQL) or schema_sqlite.sql (SQLite). Each
+    migration below then brings a database forward one step, and its version is recorded in
+    Schema_Version so it only ever runs once. Steps check the catalog before changing
+    anything, so databases upgraded by hand before this runner existed are safe to migrate.
+
+    Usage: python migrations.py [--dry-run] [--to VERSION] [--status] [--config config.ini]
+"""
+import argparse
+import configparser
+import sys
+
+from db_backend import backend_name, connect_factory
+
+SCHEMA_VERSION_SQL = """CREATE TABLE IF NOT EXISTS Schema_Version (
+                            version     INT NOT NULL,
+                            description VARCHAR(200) NOT NULL,
+                            applied_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                            PRIMARY KEY (version)
+                        )"""
+
+TERM_EXPR = "year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END"
+
+
+class MigrationContext:
+    """What a migration step sees: catalog lookups, and run() which only records SQL in a dry run."""
+
+    def __init__(self, cursor, backend, dry_run=False):
+        self.cursor = cursor
+        self.backend = backend
+        self.dry_run = dry_run
+        self.statements = []
+
+    def run(self, sql, params=None):
+        self.statements.append(' '.join(sql.split()))
+        if not self.dry_run:
+            self.cursor.execute(sql, params)
+
+    def columns(self, table):
+        if self.backend == 'sqlite':
+            self.cursor.execute(f"PRAGMA table_xinfo({table})")
+            return [row[1] for row in self.cursor.fetchall()]
+        self.cursor.execute("""SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s""", (table,))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def indexes(self, table):
+        """{index name: [columns in order]}, including the primary key."""
+        if self.backend == 'sqlite':
+            self.cursor.execute(f"PRAGMA index_list({table})")
+            names = [row[1] for row in self.cursor.fetchall()]
+            result = {}
+            for name in names:
+                self.cursor.execute(f"PRAGMA index_info({name})")
+                result[name] = [row[2] for row in sorted(self.cursor.fetchall())]
+            return result
+        self.cursor.execute("""SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+                               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                               ORDER BY INDEX_NAME, SEQ_IN_INDEX""", (table,))
+        result = {}
+        for name, column in self.cursor.fetchall():
+            result.setdefault(name, []).append(column)
+        return result
+
+    def ensure_index(self, table, name, columns):
+        # Skip when any existing index (primary key, FK index, ...) already starts with these columns
+        for existing in self.indexes(table).values():
+            if existing[:len(columns)] == list(columns):
+                return
+        self.run(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+
+# --- Migrations: (version, description, step) in order; never edit one that has shipped
+def m001_term_keys(ctx):
+    # term_key (year * 10 + 1/2/3 for Spring/Summer/Fall) lets reports range-scan terms in order.
+    # Teaches and Evaluation get VIRTUAL columns: their term columns are cascaded from Section.
+    for table, kind in (('Section', 'STORED'), ('Teaches', 'VIRTUAL'), ('Evaluation', 'VIRTUAL')):
+        if 'term_key' not in ctx.columns(table):
+            ctx.run(f"ALTER TABLE {table} ADD COLUMN term_key INT AS ({TERM_EXPR}) {kind}")
+    ctx.ensure_index('Section', 'idx_section_course_term', ('course_code', 'term_key'))
+    ctx.ensure_index('Section', 'idx_section_term', ('term_key',))
+    ctx.ensure_index('Teaches', 'idx_teaches_instructor_term', ('instructor_id', 'term_key'))
+    ctx.ensure_index('Evaluation', 'idx_eval_term', ('term_key',))
+    # Summaries for evaluations entered before Evaluation_Summary existed (a frozen copy of
+    # evaluation_store.SUMMARY_SELECT, so later changes there do not alter this step)
+    ctx.run("""INSERT IGNORE INTO Evaluation_Summary
+               SELECT E.course_code, E.section_num, E.semester, E.year_offered,
+                      E.degree_name, E.degree_level, E.obj_code,
+                      E.count_A + E.count_B + E.count_C,
+                      E.count_A + E.count_B + E.count_C + E.count_F,
+                      ROUND((E.count_A + E.count_B + E.count_C) * 100.0 / NULLIF(E.count_A + E.count_B + E.count_C + E.count_F, 0), 2),
+                      GROUP_CONCAT(EM.method_name ORDER BY EM.method_name SEPARATOR ', ')
+               FROM Evaluation E
+               LEFT JOIN Evaluation_Method EM ON EM.course_code = E.course_code
+                 AND EM.section_num = E.section_num AND EM.semester = E.semester
+                 AND EM.year_offered = E.year_offered AND EM.degree_name = E.degree_name
+                 AND EM.degree_level = E.degree_level AND EM.obj_code = E.obj_code
+               GROUP BY E.course_code, E.section_num, E.semester, E.year_offered,
+                        E.degree_name, E.degree_level, E.obj_code""")
+
+
+def m002_status_columns(ctx):
+    # Soft delete: archived degrees, courses and instructors stay for historical reports
+    if ctx.backend == 'sqlite':
+        definition = "TEXT NOT NULL DEFAULT 'Active' CHECK (status IN ('Active','Inactive'))"
+    else:
+        definition = "ENUM('Active','Inactive') NOT NULL DEFAULT 'Active'"
+    for table in ('Degree', 'Course', 'Instructor'):
+        if 'status' not in ctx.columns(table):
+            ctx.run(f"ALTER TABLE {table} ADD COLUMN status {definition}")
+
+
+def m003_access_path_indexes(ctx):
+    # Lookups by a non-leading primary key column, and foreign keys whose cascades would
+    # otherwise scan the child table (InnoDB indexes those itself, SQLite does not)
+    ctx.ensure_index('Teaches', 'idx_teaches_instructor', ('instructor_id',))
+    ctx.ensure_index('Degree_Course', 'idx_dc_course', ('course_code',))
+    ctx.ensure_index('Degree_Objective', 'idx_do_obj', ('obj_code',))
+    ctx.ensure_index('Course_Objective', 'idx_co_course_obj', ('course_code', 'obj_code'))
+    ctx.ensure_index('Course_Objective', 'idx_co_degree_obj', ('degree_name', 'degree_level', 'obj_code'))
+    ctx.ensure_index('Evaluation', 'idx_eval_term_cols', ('year_offered', 'semester'))
+    ctx.ensure_index('Evaluation', 'idx_eval_co', ('degree_name', 'degree_level', 'course_code', 'obj_code'))
+
+
+def m004_archive_tables(ctx):
+    # Where bulk_archive.py moves retired sections and evaluations. No foreign keys, so archived
+    # rows outlive their parents; semester and degree_level are plain text on both backends.
+    section = """course_code VARCHAR(10) NOT NULL, section_num SMALLINT NOT NULL,
+                 semester VARCHAR(10) NOT NULL, year_offered SMALLINT NOT NULL"""
+    evaluation = section + """, degree_name VARCHAR(100) NOT NULL, degree_level VARCHAR(10) NOT NULL,
+                              obj_code VARCHAR(20) NOT NULL"""
+    section_key = "course_code, section_num, semester, year_offered"
+    evaluation_key = section_key + ", degree_name, degree_level, obj_code"
+    archived = "archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Section_Archive ({section}, num_enrollments INT NOT NULL DEFAULT 0,
+                {archived}, PRIMARY KEY ({section_key}))""")
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Teaches_Archive ({section}, instructor_id VARCHAR(10) NOT NULL,
+                {archived}, PRIMARY KEY ({section_key}))""")
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Evaluation_Archive ({evaluation},
+                count_A INT NOT NULL DEFAULT 0, count_B INT NOT NULL DEFAULT 0,
+                count_C INT NOT NULL DEFAULT 0, count_F INT NOT NULL DEFAULT 0, improvement TEXT,
+                {archived}, PRIMARY KEY ({evaluation_key}))""")
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Evaluation_Method_Archive ({evaluation}, method_name VARCHAR(150) NOT NULL,
+                {archived}, PRIMARY KEY ({evaluation_key}, method_name))""")
+
+
+def m005_evaluation_progress(ctx):
+    # Entry progress per (section, degree), kept current by evaluation_store so the selection
+    # page, the status report and the progress dashboard read it instead of counting Evaluation.
+    # The FK column types must match Section's; term_key is VIRTUAL since those columns cascade.
+    if ctx.backend == 'sqlite':
+        semester = "TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall'))"
+        level = "TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert'))"
+    else:
+        semester = "ENUM('Spring','Summer','Fall') NOT NULL"
+        level = "ENUM('BA','BS','MS','PhD','Cert') NOT NULL"
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Evaluation_Progress (
+                course_code VARCHAR(10) NOT NULL, section_num SMALLINT NOT NULL,
+                semester {semester}, year_offered SMALLINT NOT NULL,
+                degree_name VARCHAR(100) NOT NULL, degree_level {level},
+                expected INT NOT NULL DEFAULT 0, entered INT NOT NULL DEFAULT 0,
+                improvements INT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                term_key INT AS ({TERM_EXPR}) VIRTUAL,
+                PRIMARY KEY (course_code, section_num, semester, year_offered, degree_name, degree_level),
+                CONSTRAINT fk_progress_section FOREIGN KEY (course_code, section_num, semester, year_offered)
+                  REFERENCES Section(course_code, section_num, semester, year_offered)
+                  ON DELETE CASCADE ON UPDATE CASCADE)""")
+    ctx.ensure_index('Evaluation_Progress', 'idx_progress_term',
+                     ('term_key', 'course_code', 'section_num', 'degree_name', 'degree_level'))
+    ctx.run("DELETE FROM Evaluation_Progress")
+    # A frozen copy of evaluation_store.PROGRESS_SELECT
+    ctx.run("""INSERT INTO Evaluation_Progress (course_code, section_num, semester, year_offered, degree_name,
+                                                degree_level, expected, entered, improvements, updated_at)
+               SELECT S.course_code, S.section_num, S.semester, S.year_offered, CO.degree_name, CO.degree_level,
+                      COUNT(*),
+                      COALESCE(SUM(E.count_A + E.count_B + E.count_C + E.count_F > 0), 0),
+                      COALESCE(SUM(E.improvement IS NOT NULL AND E.improvement <> ''), 0),
+                      CURRENT_TIMESTAMP
+               FROM Section S JOIN Course_Objective CO ON CO.course_code = S.course_code
+               LEFT JOIN Evaluation E ON E.course_code = S.course_code
+                 AND E.section_num = S.section_num AND E.semester = S.semester
+                 AND E.year_offered = S.year_offered AND E.degree_name = CO.degree_name
+                 AND E.degree_level = CO.degree_level AND E.obj_code = CO.obj_code
+               GROUP BY S.course_code, S.section_num, S.semester, S.year_offered, CO.degree_name, CO.degree_level""")
+
+
+def m006_report_jobs(ctx):
+    # Background report jobs (report_jobs.py); times are Unix seconds so queue and run
+    # latency can be computed without date arithmetic that differs between backends
+    ctx.run("""CREATE TABLE IF NOT EXISTS Report_Job (
+                job_id VARCHAR(32) NOT NULL, owner VARCHAR(64) NOT NULL,
+                report_type VARCHAR(40) NOT NULL, params TEXT NOT NULL, export_format VARCHAR(10) NOT NULL,
+                status VARCHAR(10) NOT NULL DEFAULT 'queued',
+                submitted_at DOUBLE NOT NULL, started_at DOUBLE, finished_at DOUBLE,
+                row_count INT, bytes BIGINT, error TEXT,
+                PRIMARY KEY (job_id))""")
+    ctx.ensure_index('Report_Job', 'idx_job_owner', ('owner', 'submitted_at'))
+    ctx.ensure_index('Report_Job', 'idx_job_status', ('status', 'submitted_at'))
+    ctx.ensure_index('Report_Job', 'idx_job_finished', ('finished_at',))
+
+
+def m007_archive_reporting(ctx):
+    # Archived rows stay in the reports, which read the archive tables next to the hot ones, so
+    # those get the term_key columns and indexes the reports range-scan, and a copy of
+    # Evaluation_Summary for the pass-rate report. SQLite cannot add a STORED column.
+    kind = 'VIRTUAL' if ctx.backend == 'sqlite' else 'STORED'
+    for table in ('Section_Archive', 'Teaches_Archive', 'Evaluation_Archive'):
+        if 'term_key' not in ctx.columns(table):
+            ctx.run(f"ALTER TABLE {table} ADD COLUMN term_key INT AS ({TERM_EXPR}) {kind}")
+    ctx.ensure_index('Section_Archive', 'idx_section_archive_course_term', ('course_code', 'term_key'))
+    ctx.ensure_index('Section_Archive', 'idx_section_archive_term', ('term_key',))
+    ctx.ensure_index('Teaches_Archive', 'idx_teaches_archive_instructor_term', ('instructor_id', 'term_key'))
+    ctx.ensure_index('Evaluation_Archive', 'idx_eval_archive_term', ('term_key',))
+
+    evaluation_key = "course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code"
+    ctx.run(f"""CREATE TABLE IF NOT EXISTS Evaluation_Summary_Archive (
+                course_code VARCHAR(10) NOT NULL, section_num SMALLINT NOT NULL,
+                semester VARCHAR(10) NOT NULL, year_offered SMALLINT NOT NULL,
+                degree_name VARCHAR(100) NOT NULL, degree_level VARCHAR(10) NOT NULL, obj_code VARCHAR(20) NOT NULL,
+                passed INT NOT NULL DEFAULT 0, total INT NOT NULL DEFAULT 0, pass_rate DECIMAL(5,2), methods TEXT,
+                archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY ({evaluation_key}))""")
+    ctx.ensure_index('Evaluation_Summary_Archive', 'idx_summary_archive_term_rate', ('year_offered', 'semester', 'pass_rate'))
+    ctx.ensure_index('Evaluation_Summary_Archive', 'idx_summary_archive_degree_rate',
+                     ('degree_name', 'degree_level', 'pass_rate'))
+    ctx.ensure_index('Evaluation_Summary_Archive', 'idx_summary_archive_rate', ('pass_rate',))
+    # Summaries of the evaluations archived before this table existed (as in m001)
+    ctx.run(f"""INSERT IGNORE INTO Evaluation_Summary_Archive ({evaluation_key}, passed, total, pass_rate, methods)
+                SELECT E.course_code, E.section_num, E.semester, E.year_offered,
+                       E.degree_name, E.degree_level, E.obj_code,
+                       E.count_A + E.count_B + E.count_C,
+                       E.count_A + E.count_B + E.count_C + E.count_F,
+                       ROUND((E.count_A + E.count_B + E.count_C) * 100.0 / NULLIF(E.count_A + E.count_B + E.count_C + E.count_F, 0), 2),
+                       GROUP_CONCAT(EM.method_name ORDER BY EM.method_name SEPARATOR ', ')
+                FROM Evaluation_Archive E
+                LEFT JOIN Evaluation_Method_Archive EM ON EM.course_code = E.course_code
+                  AND EM.section_num = E.section_num AND EM.semester = E.semester
+                  AND EM.year_offered = E.year_offered AND EM.degree_name = E.degree_name
+                  AND EM.degree_level = E.degree_level AND EM.obj_code = E.obj_code
+                GROUP BY E.course_code, E.section_num, E.semester, E.year_offered,
+                         E.degree_name, E.degree_level, E.obj_code""")
+
+
+MIGRATIONS = [
+    (1, "term_key columns, report indexes and Evaluation_Summary backfill", m001_term_keys),
+    (2, "status columns on Degree, Course and Instructor", m002_status_columns),
+    (3, "secondary indexes for the app's lookups and cascades", m003_access_path_indexes),
+    (4, "archive tables for retired sections and evaluations", m004_archive_tables),
+    (5, "Evaluation_Progress table and backfill", m005_evaluation_progress),
+    (6, "Report_Job table for background report jobs", m006_report_jobs),
+    (7, "term keys on the archive tables and Evaluation_Summary_Archive", m007_archive_reporting),
+]
+
+
+def _table_exists(cursor, backend, table):
+    if backend == 'sqlite':
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    else:
+        cursor.execute("""SELECT COUNT(*) FROM information_schema.TABLES
+                          WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s""", (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def applied_versions(cursor, backend):
+    if not _table_exists(cursor, backend, 'Schema_Version'):
+        return set()
+    cursor.execute("SELECT version FROM Schema_Version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn, backend, target=None, dry_run=False):
+    """
+        Applies pending migrations up to `target` (default: all), each in its own transaction,
+        and returns [(version, description, statements)]. With dry_run nothing is changed and
+        the statements are the ones that would run. MySQL commits DDL implicitly, which is why
+        every step re-checks the catalog instead of relying on rollback.
+    """
+    cursor = conn.cursor()
+    if not dry_run:
+        cursor.execute(SCHEMA_VERSION_SQL)
+    done = applied_versions(cursor, backend)
+
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        ctx = MigrationContext(cursor, backend, dry_run)
+        try:
+            step(ctx)
+            if not dry_run:
+                cursor.execute("INSERT INTO Schema_Version (version, description) VALUES (%s, %s)",
+                               (version, description))
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((version, description, ctx.statements))
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply schema migrations to the configured database.')
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--to', type=int, dest='target', help='stop after this version')
+    parser.add_argument('--dry-run', action='store_true', help='print the SQL without changing anything')
+    parser.add_argument('--status', action='store_true', help='list migrations and whether they are applied')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    backend = backend_name(config)
+    # Opened without the automatic migration of SQLite databases, which would leave nothing to report
+    conn = connect_factory(config, migrate=False)()
+    try:
+        if args.status:
+            done = applied_versions(conn.cursor(), backend)
+            for version, description, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in done else 'pending':<8} {description}")
+            return 0
+        applied = migrate(conn, backend, args.target, args.dry_run)
+    finally:
+        conn.close()
+
+    for version, description, statements in applied:
+        print(f"{'Would apply' if args.dry_run else 'Applied'} {version}: {description}")
+        for sql in statements:
+            print(f"    {sql}")
+    if not applied:
+        print("Schema is up to date.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
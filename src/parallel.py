@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from instrumentation import InstrumentedConnection
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class ParallelQueries:
+    """
+        Runs independent read queries at the same time, each on its own pooled connection.
+
+        A task is a function taking a dictionary cursor and returning its result. One shared
+        thread pool serves all requests; `limit` caps how many tasks of a single call run
+        at once so one report cannot take every connection.
+    """
+
+    def __init__(self, pool, workers=16):
+        self._pool = pool
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-query')
+
+    def _run_one(self, task, stats, pool):
+        conn = pool.checkout()
+        try:
+            wrapped = InstrumentedConnection(conn, stats) if stats is not None else conn
+            return task(wrapped.cursor(dictionary=True, buffered=True))
+        finally:
+            conn.close()
+
+    def run(self, tasks, limit=4, timeout=30, stats=None, pool=None):
+        """
+            Runs {name: task} and returns {name: result}; raises QueryTimeout if not done in time.
+            Tasks borrow from `pool` if given (e.g. a read replica's), else from the pool set at construction.
+        """
+        queue = list(tasks.items())
+        running, results = {}, {}
+        deadline = time.monotonic() + timeout
+        try:
+            while queue or running:
+                while queue and len(running) < limit:
+                    name, task = queue.pop(0)
+                    running[self._executor.submit(self._run_one, task, stats, pool or self._pool)] = name
+                remaining = deadline - time.monotonic()
+                done, _ = wait(running, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise QueryTimeout(f"Report queries did not finish within {timeout}s")
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        finally:
+            # Queued tasks are dropped; ones already running finish and return their connection
+            for future in running:
+                future.cancel()
+        return results
+
+
+def fetch_all(sql, params=()):
+    def task(cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    return task
+
+
+def fetch_one(sql, params=()):
+    def task(cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    return task
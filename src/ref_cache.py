@@ -0,0 +1,91 @@
+import threading
+import time
+
+
+class ReferenceCache:
+    """
+        In-process cache for small lookup lists (degrees, courses, instructors, objectives).
+
+        Each entry remembers which tables it was read from so a write route can drop
+        exactly the entries it made stale; entries also expire after `ttl` seconds so
+        other worker processes pick up changes eventually. Fragments (e.g. the rendered
+        <option> list) are kept on the entry they were built from and go with it.
+
+        A list read from a read replica is passed with `as_of`, the time up to which the
+        replica is known to hold every write; it is only stored if that is after the last
+        invalidation, so a lagging replica cannot put back the list a write just dropped.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}   # key -> (value, tables, loaded_at, {variant: fragment})
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated_at = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'fragment_hits': 0, 'fragment_misses': 0}
+
+    def get(self, key, tables, loader, as_of=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] < self.ttl:
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        value = loader()
+        with self._lock:
+            # Don't store a list that a write may have made stale while it was loading
+            if generation == self._generation and (as_of is None or as_of >= self._invalidated_at):
+                self._entries[key] = (value, set(tables), now, {})
+        return value
+
+    def peek(self, key):
+        # Cached value if fresh, else None; lets callers skip borrowing a connection on a hit
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[2] < self.ttl:
+                self._stats['hits'] += 1
+                return entry[0]
+        return None
+
+    def fragment(self, key, variant, render):
+        """
+            render(value) of the cached list `key`, computed once per variant and kept until the
+            list itself is dropped or expires. None if the list is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[2] >= self.ttl:
+                return None
+            if variant in entry[3]:
+                self._stats['fragment_hits'] += 1
+                return entry[3][variant]
+            self._stats['fragment_misses'] += 1
+
+        value = render(entry[0])
+        with self._lock:
+            entry[3][variant] = value
+        return value
+
+    def invalidate(self, *tables):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[1] & set(tables)]
+            for key in stale:
+                del self._entries[key]
+            self._generation += 1
+            self._invalidated_at = time.time()
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['entries'] = len(self._entries)
+            data['ttl'] = self.ttl
+        return data
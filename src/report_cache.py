@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def report_key(report_type, params):
+    """Cache key for a report request: the type plus its non-empty parameters, in a fixed order."""
+    items = []
+    for name in sorted(params.keys()):
+        values = tuple(v.strip() for v in params.getlist(name) if v.strip())
+        if values and name != 'report_type':
+            items.append((name, values))
+    return (report_type or '', tuple(items))
+
+
+class ReportCache:
+    """
+        Rendered report pages, keyed by report_key().
+
+        Write routes call bump() after committing, which advances the data version and drops
+        every entry, and a page rendered while a write was in progress is not stored. Each
+        entry keeps an ETag (a hash of the page) and the time the data last changed, so a
+        revalidating browser can be answered with a 304 straight from memory. Entries also
+        expire after `ttl` seconds, since writes made by other worker processes do not bump
+        this counter; a ttl of 0 turns the cache off. A page rendered from a read replica
+        is stored only if the replica had caught up (`as_of`) past the last change.
+    """
+
+    def __init__(self, ttl=300, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (body, etag, last_modified, stored_at); oldest use first
+        self._bytes = 0
+        self._version = 0
+        self._changed_at = time.time()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bumps': 0, 'evictions': 0}
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def changed_at(self):
+        return self._changed_at
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._changed_at = time.time()
+            self._entries.clear()
+            self._bytes = 0
+            self._stats['bumps'] += 1
+
+    def get(self, key):
+        """(body, etag, last_modified) if a fresh page is cached, else None."""
+        if not self.ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[3] >= self.ttl:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[:3]
+
+    def put(self, key, version, body, as_of=None):
+        """Stores a page rendered from data at `version`; returns (etag, last_modified)."""
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:20]
+        last_modified = self._changed_at
+        if not self.ttl or len(body) > self.max_bytes:
+            return etag, last_modified
+        with self._lock:
+            if version != self._version or (as_of is not None and as_of < self._changed_at):
+                return etag, last_modified
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (body, etag, last_modified, time.time())
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+                self._stats['evictions'] += 1
+        return etag, last_modified
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['entries'] = len(self._entries)
+            data['bytes'] = self._bytes
+            data['version'] = self._version
+            data['ttl'] = self.ttl
+        return data
@@ -0,0 +1,270 @@
+"""
+    Background report jobs.
+
+    A long-range listing (the same rows as the CSV / NDJSON export) is submitted as a job,
+    run by a small pool of worker threads off the request path, and written to a
+    gzip-compressed artifact file that can be downloaded until it expires. Job state lives
+    in the Report_Job table, so the list survives a restart: queued jobs are picked up
+    again, and jobs left running longer than `timeout` are marked failed. Workers claim a
+    job with a conditional UPDATE, so processes sharing the table never run the same one.
+"""
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+
+from export import EXPORT_FORMATS, stream_rows
+from instrumentation import Counter, Histogram
+
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+JOB_COLUMNS = """job_id, report_type, params, export_format, status, submitted_at, started_at, finished_at,
+                 row_count, bytes, error"""
+
+
+class JobRejected(Exception):
+    pass
+
+
+class JobStopped(Exception):
+    pass
+
+
+class _CheckedCursor:
+    """Counts the rows read through it and stops the job between batches when asked to."""
+
+    def __init__(self, cursor, should_stop):
+        self._cursor = cursor
+        self._should_stop = should_stop
+        self.rows = 0
+
+    @property
+    def column_names(self):
+        return self._cursor.column_names
+
+    def fetchmany(self, size=1):
+        reason = self._should_stop()
+        if reason:
+            raise JobStopped(reason)
+        rows = self._cursor.fetchmany(size)
+        self.rows += len(rows)
+        return rows
+
+
+class JobRunner:
+    """
+        `build_query(report_type, params)` returns the (sql, params) of a report listing, or
+        None for an unknown type. Each user (an opaque owner id) may have at most `per_user`
+        jobs queued or running, and at most `max_queue` jobs wait at once in this process.
+        Job state is kept on `pool`; the listing itself is read through `read_checkout(since)`
+        if given (e.g. from a replica holding every write before `since`, the submit time).
+    """
+
+    def __init__(self, pool, build_query, artifact_dir, workers=2, per_user=2, max_queue=50, timeout=1800,
+                 keep_hours=24, read_checkout=None):
+        self._pool = pool
+        self._read_checkout = read_checkout or (lambda since: pool.checkout())
+        self._build_query = build_query
+        self.artifact_dir = os.path.abspath(artifact_dir)   # relative to the working directory, like the sqlite path
+        self.workers = workers
+        self.per_user = per_user
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.keep_seconds = keep_hours * 3600
+        self._queue = queue.Queue()
+        self._running = set()
+        self._cancelled = set()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.wait_seconds = Histogram('app_report_job_wait_seconds', 'Time a report job waited in the queue.',
+                                      ('report',), JOB_BUCKETS)
+        self.run_seconds = Histogram('app_report_job_run_seconds', 'Time to run a report job.',
+                                     ('report',), JOB_BUCKETS)
+        self.finished = Counter('app_report_jobs_total', 'Report jobs finished, by outcome.', ('report', 'status'))
+
+    def start(self):
+        """Starts the workers on first use, re-queueing jobs left over from the last run."""
+        with self._lock:
+            if self._threads:
+                return
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            for job_id in self._recover():
+                self._queue.put(job_id)
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'report-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _recover(self):
+        conn = self._pool.checkout()
+        try:
+            cursor = conn.cursor()
+            self._purge_expired(cursor, time.time())
+            cursor.execute("SELECT job_id FROM Report_Job WHERE status = 'queued' ORDER BY submitted_at")
+            job_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+        finally:
+            conn.close()
+        return job_ids
+
+    def _purge_expired(self, cursor, now):
+        # A job still marked running past its timeout was left behind by a process that stopped
+        # (this one's workers stop their own jobs in time), so it no longer holds a user's slot
+        cursor.execute("""UPDATE Report_Job SET status = 'failed', finished_at = %s, error = %s
+                          WHERE status = 'running' AND started_at < %s""",
+                       (now, 'Interrupted before it finished; submit it again.', now - self.timeout))
+        cursor.execute("SELECT job_id FROM Report_Job WHERE finished_at < %s", (now - self.keep_seconds,))
+        expired = [row[0] for row in cursor.fetchall()]
+        for job_id in expired:
+            self._remove_artifacts(job_id)
+        if expired:
+            cursor.execute(f"DELETE FROM Report_Job WHERE job_id IN ({', '.join(['%s'] * len(expired))})", expired)
+
+    def artifact_path(self, job):
+        return os.path.join(self.artifact_dir, f"{job['job_id']}.{EXPORT_FORMATS[job['export_format']][1]}.gz")
+
+    def _remove_artifacts(self, job_id):
+        for name in os.listdir(self.artifact_dir):
+            if name.startswith(job_id + '.'):
+                os.remove(os.path.join(self.artifact_dir, name))
+
+    # --- Called from requests, on the request's connection
+    def submit(self, conn, owner, report_type, params, export_format):
+        """Queues a job and returns its id; raises JobRejected with a message for the user."""
+        if export_format not in EXPORT_FORMATS:
+            raise JobRejected(f"Unknown export format '{export_format}'.")
+        try:
+            query = self._build_query(report_type, params)
+        except (ValueError, AttributeError):
+            query = None
+        if query is None:
+            raise JobRejected("Unknown report or missing parameters.")
+        if self._queue.qsize() >= self.max_queue:
+            raise JobRejected("The job queue is full; try again in a few minutes.")
+        self.start()
+
+        cursor = conn.cursor()
+        self._purge_expired(cursor, time.time())
+        cursor.execute("SELECT COUNT(*) FROM Report_Job WHERE owner = %s AND status IN ('queued', 'running')",
+                       (owner,))
+        if cursor.fetchone()[0] >= self.per_user:
+            raise JobRejected(f"You already have {self.per_user} jobs queued or running; "
+                              "wait for one to finish or cancel it.")
+        job_id = secrets.token_hex(8)
+        cursor.execute("""INSERT INTO Report_Job (job_id, owner, report_type, params, export_format, status, submitted_at)
+                          VALUES (%s, %s, %s, %s, %s, 'queued', %s)""",
+                       (job_id, owner, report_type, json.dumps(params), export_format, time.time()))
+        conn.commit()
+        self._queue.put(job_id)
+        return job_id
+
+    def jobs_for(self, cursor, owner, limit=50):
+        self.start()
+        cursor.execute(f"SELECT {JOB_COLUMNS} FROM Report_Job WHERE owner = %s ORDER BY submitted_at DESC LIMIT %s",
+                       (owner, limit))
+        return cursor.fetchall()
+
+    def get(self, cursor, owner, job_id):
+        cursor.execute(f"SELECT {JOB_COLUMNS} FROM Report_Job WHERE job_id = %s AND owner = %s", (job_id, owner))
+        return cursor.fetchone()
+
+    def cancel(self, conn, owner, job_id):
+        """Cancels a queued or running job; False if it had already finished."""
+        cursor = conn.cursor()
+        cursor.execute("""UPDATE Report_Job SET status = 'cancelled', finished_at = %s
+                          WHERE job_id = %s AND owner = %s AND status IN ('queued', 'running')""",
+                       (time.time(), job_id, owner))
+        conn.commit()
+        if cursor.rowcount != 1:
+            return False
+        # A running job notices between batches; a queued one is skipped when a worker reaches it
+        self._cancelled.add(job_id)
+        return True
+
+    def stats(self):
+        return {'queue_depth': self._queue.qsize(), 'running': len(self._running), 'workers': self.workers,
+                'per_user': self.per_user}
+
+    def render(self):
+        return self.wait_seconds.render() + self.run_seconds.render() + self.finished.render()
+
+    # --- Workers
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as err:   # a worker must outlive any one job
+                print(f"Report job {job_id} could not be run: {err}")
+            finally:
+                self._cancelled.discard(job_id)
+
+    def _update(self, sql, params):
+        conn = self._pool.checkout()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def _run(self, job_id):
+        started = time.time()
+        if self._update("UPDATE Report_Job SET status = 'running', started_at = %s WHERE job_id = %s AND status = 'queued'",
+                        (started, job_id)) != 1:
+            return   # cancelled while queued, or claimed by another process
+        conn = self._pool.checkout()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SELECT {JOB_COLUMNS} FROM Report_Job WHERE job_id = %s", (job_id,))
+            job = cursor.fetchone()
+        finally:
+            conn.close()
+        self.wait_seconds.observe(started - job['submitted_at'], job['report_type'])
+
+        def should_stop():
+            if job_id in self._cancelled:
+                return 'cancelled'
+            if time.time() - started > self.timeout:
+                return f"Stopped after {self.timeout}s; narrow the range and submit it again."
+            return None
+
+        path = self.artifact_path(job)
+        partial = path + '.part'
+        rows, status, error = None, 'done', None
+        self._running.add(job_id)
+        conn = self._read_checkout(job['submitted_at'])
+        try:
+            # Own connection and an unbuffered cursor, as for a streamed export
+            cursor = conn.cursor()
+            cursor.execute(*self._build_query(job['report_type'], json.loads(job['params'])))
+            checked = _CheckedCursor(cursor, should_stop)
+            with open(partial, 'wb') as out:
+                for chunk in stream_rows(checked, job['export_format'], compress=True):
+                    out.write(chunk)
+            os.replace(partial, path)
+            rows = checked.rows
+        except JobStopped as stop:
+            status, error = ('cancelled', None) if str(stop) == 'cancelled' else ('failed', str(stop))
+        except Exception as err:
+            status, error = 'failed', str(getattr(err, 'msg', err))
+        finally:
+            conn.close()
+            self._running.discard(job_id)
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        finished = time.time()
+        size = os.path.getsize(path) if status == 'done' else None
+        if status != 'cancelled':
+            # Only a job still marked running is finished here; a cancel that came in meanwhile wins
+            if self._update("""UPDATE Report_Job SET status = %s, finished_at = %s, row_count = %s, bytes = %s, error = %s
+                               WHERE job_id = %s AND status = 'running'""",
+                            (status, finished, rows, size, error, job_id)) != 1:
+                status = 'cancelled'
+        if status == 'cancelled' and os.path.exists(path):
+            os.remove(path)
+        self.run_seconds.observe(finished - started, job['report_type'])
+        self.finished.inc(1, job['report_type'], status)
@@ -0,0 +1,174 @@
+-- SQLite version of the schema built by Create_Tables.py, applied by db_backend on first connect
+-- before the migrations in migrations.py bring it up to date.
+-- ENUM columns become CHECK constraints and KEY clauses become separate indexes; everything
+-- else (keys, cascades, the generated term_key column) matches the MySQL tables.
+
+CREATE TABLE IF NOT EXISTS Degree (
+    degree_name  VARCHAR(100) NOT NULL,
+    degree_level TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    description  TEXT,
+    status       TEXT NOT NULL DEFAULT 'Active' CHECK (status IN ('Active','Inactive')),
+    PRIMARY KEY (degree_name, degree_level)
+);
+
+CREATE TABLE IF NOT EXISTS Course (
+    course_code  VARCHAR(10) NOT NULL,
+    course_name  VARCHAR(200) NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'Active' CHECK (status IN ('Active','Inactive')),
+    PRIMARY KEY (course_code),
+    CONSTRAINT uk_course_name UNIQUE (course_name)
+);
+
+CREATE TABLE IF NOT EXISTS Degree_Course (
+    degree_name  VARCHAR(100) NOT NULL,
+    degree_level TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    course_code  VARCHAR(10) NOT NULL,
+    is_core      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (degree_name, degree_level, course_code),
+    CONSTRAINT fk_dc_degree FOREIGN KEY (degree_name, degree_level)
+        REFERENCES Degree(degree_name, degree_level)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_dc_course FOREIGN KEY (course_code)
+        REFERENCES Course(course_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Instructor (
+    instructor_id VARCHAR(10) NOT NULL,
+    first_name    VARCHAR(50) NOT NULL,
+    middle_name   VARCHAR(50),
+    last_name     VARCHAR(50) NOT NULL,
+    email_id      VARCHAR(150) NOT NULL,
+    phone_number  VARCHAR(30),
+    status        TEXT NOT NULL DEFAULT 'Active' CHECK (status IN ('Active','Inactive')),
+    PRIMARY KEY (instructor_id),
+    CONSTRAINT uk_instructor_email UNIQUE (email_id)
+);
+
+CREATE TABLE IF NOT EXISTS Section (
+    course_code     VARCHAR(10) NOT NULL,
+    section_num     SMALLINT NOT NULL,
+    semester        TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall')),
+    year_offered    SMALLINT NOT NULL,
+    num_enrollments INT NOT NULL DEFAULT 0,
+    term_key        INT GENERATED ALWAYS AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) STORED,
+    PRIMARY KEY (course_code, section_num, semester, year_offered),
+    CONSTRAINT fk_section_course FOREIGN KEY (course_code)
+        REFERENCES Course(course_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_section_course_term ON Section (course_code, term_key);
+CREATE INDEX IF NOT EXISTS idx_section_term ON Section (term_key);
+
+CREATE TABLE IF NOT EXISTS Teaches (
+    course_code     VARCHAR(10) NOT NULL,
+    section_num     SMALLINT NOT NULL,
+    semester        TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall')),
+    year_offered    SMALLINT NOT NULL,
+    instructor_id   VARCHAR(10) NOT NULL,
+    term_key        INT GENERATED ALWAYS AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) VIRTUAL,
+    PRIMARY KEY (course_code, section_num, semester, year_offered),
+    CONSTRAINT fk_teaches_section FOREIGN KEY (course_code, section_num, semester, year_offered)
+        REFERENCES Section(course_code, section_num, semester, year_offered)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_teaches_instructor FOREIGN KEY (instructor_id)
+        REFERENCES Instructor(instructor_id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_teaches_instructor_term ON Teaches (instructor_id, term_key);
+
+CREATE TABLE IF NOT EXISTS Objective (
+    obj_code    VARCHAR(20) NOT NULL,
+    title       VARCHAR(120) NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (obj_code),
+    CONSTRAINT uk_obj_title UNIQUE (title)
+);
+
+CREATE TABLE IF NOT EXISTS Degree_Objective (
+    degree_name  VARCHAR(100) NOT NULL,
+    degree_level TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    obj_code     VARCHAR(20) NOT NULL,
+    PRIMARY KEY (degree_name, degree_level, obj_code),
+    CONSTRAINT fk_do_degree FOREIGN KEY (degree_name, degree_level)
+        REFERENCES Degree(degree_name, degree_level)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_do_obj FOREIGN KEY (obj_code)
+        REFERENCES Objective(obj_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Course_Objective (
+    degree_name  VARCHAR(100) NOT NULL,
+    degree_level TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    course_code  VARCHAR(10) NOT NULL,
+    obj_code     VARCHAR(20) NOT NULL,
+    PRIMARY KEY (degree_name, degree_level, course_code, obj_code),
+    CONSTRAINT fk_co_degree_course FOREIGN KEY (degree_name, degree_level, course_code)
+        REFERENCES Degree_Course(degree_name, degree_level, course_code)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_co_degree_obj FOREIGN KEY (degree_name, degree_level, obj_code)
+        REFERENCES Degree_Objective(degree_name, degree_level, obj_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_co_course_obj ON Course_Objective (course_code, obj_code);
+
+CREATE TABLE IF NOT EXISTS Evaluation (
+    course_code    VARCHAR(10) NOT NULL,
+    section_num    SMALLINT NOT NULL,
+    semester       TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall')),
+    year_offered   SMALLINT NOT NULL,
+    degree_name    VARCHAR(100) NOT NULL,
+    degree_level   TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    obj_code       VARCHAR(20) NOT NULL,
+    count_A        INT NOT NULL DEFAULT 0,
+    count_B        INT NOT NULL DEFAULT 0,
+    count_C        INT NOT NULL DEFAULT 0,
+    count_F        INT NOT NULL DEFAULT 0,
+    improvement    TEXT,
+    term_key       INT GENERATED ALWAYS AS (year_offered * 10 + CASE semester WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 END) VIRTUAL,
+    PRIMARY KEY (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code),
+    CONSTRAINT fk_eval_section FOREIGN KEY (course_code, section_num, semester, year_offered)
+        REFERENCES Section(course_code, section_num, semester, year_offered)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_eval_co FOREIGN KEY (degree_name, degree_level, course_code, obj_code)
+        REFERENCES Course_Objective(degree_name, degree_level, course_code, obj_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_eval_term ON Evaluation (term_key);
+
+CREATE TABLE IF NOT EXISTS Evaluation_Method (
+    course_code    VARCHAR(10) NOT NULL,
+    section_num    SMALLINT NOT NULL,
+    semester       TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall')),
+    year_offered   SMALLINT NOT NULL,
+    degree_name    VARCHAR(100) NOT NULL,
+    degree_level   TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    obj_code       VARCHAR(20) NOT NULL,
+    method_name    VARCHAR(150) NOT NULL,
+    PRIMARY KEY (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code, method_name),
+    CONSTRAINT fk_em_eval FOREIGN KEY (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code)
+        REFERENCES Evaluation(course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Evaluation_Summary (
+    course_code    VARCHAR(10) NOT NULL,
+    section_num    SMALLINT NOT NULL,
+    semester       TEXT NOT NULL CHECK (semester IN ('Spring','Summer','Fall')),
+    year_offered   SMALLINT NOT NULL,
+    degree_name    VARCHAR(100) NOT NULL,
+    degree_level   TEXT NOT NULL CHECK (degree_level IN ('BA','BS','MS','PhD','Cert')),
+    obj_code       VARCHAR(20) NOT NULL,
+    passed         INT NOT NULL DEFAULT 0,
+    total          INT NOT NULL DEFAULT 0,
+    pass_rate      REAL,
+    methods        TEXT,
+    PRIMARY KEY (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code),
+    CONSTRAINT fk_summary_eval FOREIGN KEY (course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code)
+        REFERENCES Evaluation(course_code, section_num, semester, year_offered, degree_name, degree_level, obj_code)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_summary_term_rate ON Evaluation_Summary (year_offered, semester, pass_rate);
+CREATE INDEX IF NOT EXISTS idx_summary_degree_rate ON Evaluation_Summary (degree_name, degree_level, pass_rate);
+CREATE INDEX IF NOT EXISTS idx_summary_rate ON Evaluation_Summary (pass_rate);
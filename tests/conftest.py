@@ -0,0 +1,29 @@
+import configparser
+import os
+import sys
+
+import pytest
+
+# The app imports its modules flat from src/, as when it is started from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from db_backend import connect_factory  # noqa: E402
+
+
+def sqlite_config():
+    config = configparser.ConfigParser()
+    config.read_dict({'database': {'backend': 'sqlite'}, 'sqlite': {'path': ':memory:'}})
+    return config
+
+
+@pytest.fixture
+def connect():
+    # A fresh in-memory database per test, migrated to the current schema
+    return connect_factory(sqlite_config())
+
+
+@pytest.fixture
+def conn(connect):
+    conn = connect()
+    yield conn
+    conn.close()
@@ -0,0 +1,77 @@
+import db_backend
+from db_backend import ER_DUP_ENTRY, SQLiteError, translate_sql
+
+import pytest
+
+
+def test_placeholders():
+    assert translate_sql("SELECT * FROM Course WHERE course_code = %s AND status = %s") == \
+        "SELECT * FROM Course WHERE course_code = ? AND status = ?"
+
+
+def test_insert_ignore():
+    assert translate_sql("INSERT IGNORE INTO Degree_Course (degree_name) VALUES (%s)") == \
+        "INSERT OR IGNORE INTO Degree_Course (degree_name) VALUES (?)"
+
+
+def test_on_duplicate_key_update():
+    sql = translate_sql("INSERT INTO Evaluation (course_code, count_A) VALUES (%s, %s) "
+                        "ON DUPLICATE KEY UPDATE count_A=VALUES(count_A), improvement=VALUES(improvement)")
+    assert sql == ("INSERT INTO Evaluation (course_code, count_A) VALUES (?, ?) "
+                   "ON CONFLICT DO UPDATE SET count_A=excluded.count_A, improvement=excluded.improvement")
+
+
+def test_group_concat_separator():
+    assert translate_sql("SELECT GROUP_CONCAT(method_name SEPARATOR ', ') FROM Evaluation_Method") == \
+        "SELECT GROUP_CONCAT(method_name, ', ') FROM Evaluation_Method"
+
+
+def test_group_concat_order_by():
+    sql = translate_sql("SELECT GROUP_CONCAT(EM.method_name ORDER BY EM.method_name SEPARATOR ', ') FROM Evaluation_Method EM")
+    if db_backend._ORDERED_AGGREGATES:
+        assert sql == "SELECT GROUP_CONCAT(EM.method_name, ', ' ORDER BY EM.method_name) FROM Evaluation_Method EM"
+    else:
+        assert sql == "SELECT GROUP_CONCAT(EM.method_name, ', ') FROM Evaluation_Method EM"
+
+
+def test_row_in_becomes_or_chain():
+    assert translate_sql("DELETE FROM T WHERE (a, b) IN ((%s, %s), (%s, %s))") == \
+        "DELETE FROM T WHERE ((a, b) = (?, ?) OR (a, b) = (?, ?))"
+
+
+def test_long_row_in_becomes_values():
+    groups = ', '.join(['(%s, %s)'] * (db_backend._ROW_IN_MAX_OR + 1))
+    sql = translate_sql(f"SELECT * FROM T WHERE (T.a, T.b) IN ({groups})")
+    assert sql == ("SELECT * FROM T WHERE (T.a, T.b) IN (SELECT * FROM (VALUES "
+                   + ', '.join(['(?, ?)'] * (db_backend._ROW_IN_MAX_OR + 1)) + "))")
+
+
+def test_like_escape():
+    assert translate_sql("SELECT * FROM Course WHERE course_code LIKE %s") == \
+        "SELECT * FROM Course WHERE course_code LIKE ? ESCAPE '\\'"
+
+
+def test_rewrites_run_on_sqlite(conn):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("CREATE TABLE T (a INT, b INT, note TEXT, PRIMARY KEY (a, b))")
+    cursor.executemany("INSERT INTO T (a, b, note) VALUES (%s, %s, %s)", [(1, 1, 'x'), (1, 2, 'y'), (2, 1, 'z_1')])
+    cursor.execute("INSERT IGNORE INTO T (a, b, note) VALUES (%s, %s, %s)", (1, 1, 'ignored'))
+    cursor.execute("INSERT INTO T (a, b, note) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE note=VALUES(note)",
+                   (1, 2, 'updated'))
+    cursor.execute("SELECT a, GROUP_CONCAT(note ORDER BY note SEPARATOR '; ') AS notes FROM T GROUP BY a ORDER BY a")
+    # Before SQLite 3.44 the order inside the group is not guaranteed
+    assert [(row['a'], sorted(row['notes'].split('; '))) for row in cursor.fetchall()] == \
+        [(1, ['updated', 'x']), (2, ['z_1'])]
+    cursor.execute("SELECT note FROM T WHERE (a, b) IN ((%s, %s), (%s, %s)) ORDER BY note", (1, 1, 2, 1))
+    assert [row['note'] for row in cursor.fetchall()] == ['x', 'z_1']
+    # As on MySQL, a backslash escapes _ in a LIKE pattern
+    cursor.execute("SELECT note FROM T WHERE note LIKE %s", ('z\\_%',))
+    assert [row['note'] for row in cursor.fetchall()] == ['z_1']
+
+
+def test_duplicate_key_errno(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Course (course_code, course_name) VALUES (%s, %s)", ('CS1', 'One'))
+    with pytest.raises(SQLiteError) as err:
+        cursor.execute("INSERT INTO Course (course_code, course_name) VALUES (%s, %s)", ('CS1', 'Other'))
+    assert err.value.errno == ER_DUP_ENTRY
@@ -0,0 +1,86 @@
+from evaluation_store import rebuild_evaluation_progress, rebuild_evaluation_summary, write_evaluations
+
+import pytest
+
+FALL1 = ('CS1', 1, 'Fall', 2024)
+FALL2 = ('CS1', 2, 'Fall', 2024)
+SPRING = ('CS2', 1, 'Spring', 2025)
+CS, DS = ('CS', 'BS'), ('DS', 'MS')
+
+
+@pytest.fixture
+def cursor(conn):
+    # Two degrees sharing CS1 with different objectives, and three sections
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Degree (degree_name, degree_level) VALUES (%s, %s)", [CS, DS])
+    cursor.executemany("INSERT INTO Course (course_code, course_name) VALUES (%s, %s)",
+                       [('CS1', 'Databases'), ('CS2', 'Statistics')])
+    cursor.executemany("INSERT INTO Objective (obj_code, title, description) VALUES (%s, %s, '')",
+                       [('O1', 'Design'), ('O2', 'Queries'), ('O3', 'Inference')])
+    cursor.executemany("INSERT INTO Degree_Course (degree_name, degree_level, course_code) VALUES (%s, %s, %s)",
+                       [CS + ('CS1',), CS + ('CS2',), DS + ('CS1',)])
+    cursor.executemany("INSERT INTO Degree_Objective (degree_name, degree_level, obj_code) VALUES (%s, %s, %s)",
+                       [CS + ('O1',), CS + ('O2',), CS + ('O3',), DS + ('O1',), DS + ('O3',)])
+    cursor.executemany("INSERT INTO Course_Objective (degree_name, degree_level, course_code, obj_code) VALUES (%s, %s, %s, %s)",
+                       [CS + ('CS1', 'O1'), CS + ('CS1', 'O2'), CS + ('CS2', 'O3'), DS + ('CS1', 'O1'), DS + ('CS1', 'O3')])
+    cursor.executemany("INSERT INTO Section (course_code, section_num, semester, year_offered, num_enrollments) VALUES (%s, %s, %s, %s, 30)",
+                       [FALL1, FALL2, SPRING])
+    rebuild_evaluation_summary(cursor)
+    rebuild_evaluation_progress(cursor)
+    conn.commit()
+    return cursor
+
+
+def derived(cursor):
+    cursor.execute("SELECT * FROM Evaluation_Summary ORDER BY 1, 2, 3, 4, 5, 6, 7")
+    summary = cursor.fetchall()
+    cursor.execute("""SELECT course_code, section_num, semester, year_offered, degree_name, degree_level,
+                             expected, entered, improvements
+                      FROM Evaluation_Progress ORDER BY 1, 2, 3, 4, 5, 6""")
+    return summary, cursor.fetchall()
+
+
+def assert_matches_rebuild(cursor):
+    incremental = derived(cursor)
+    rebuild_evaluation_summary(cursor)
+    rebuild_evaluation_progress(cursor)
+    assert incremental == derived(cursor)
+    return incremental
+
+
+def test_write_evaluations_matches_rebuild(cursor):
+    write_evaluations(cursor, [
+        FALL1 + CS + ('O1', 10, 10, 5, 5, 'More labs'),
+        FALL1 + CS + ('O2', 20, 5, 5, 0, ''),
+        FALL1 + DS + ('O3', 3, 3, 3, 1, None),
+        SPRING + CS + ('O3', 0, 0, 0, 0, None),
+    ], [
+        FALL1 + CS + ('O1', 'Exam'), FALL1 + CS + ('O1', 'Project'), FALL1 + DS + ('O3', 'Quiz'),
+    ])
+    summary, progress = assert_matches_rebuild(cursor)
+    assert len(summary) == 4
+    assert FALL1 + CS + (2, 2, 1) in progress
+    assert FALL1 + DS + (2, 1, 0) in progress
+    assert SPRING + CS + (1, 0, 0) in progress
+
+    # Regrading: counts cleared, methods replaced, an improvement note removed, a new section
+    write_evaluations(cursor, [
+        FALL1 + CS + ('O1', 0, 0, 0, 0, None),
+        FALL1 + DS + ('O3', 1, 1, 1, 1, 'Review sessions'),
+        FALL2 + DS + ('O1', 4, 4, 4, 4, None),
+    ], [
+        FALL1 + DS + ('O3', 'Exam'), FALL2 + DS + ('O1', 'Exam'), FALL2 + DS + ('O1', 'Homework'),
+    ])
+    summary, progress = assert_matches_rebuild(cursor)
+    assert FALL1 + CS + (2, 1, 0) in progress
+    assert FALL1 + DS + (2, 1, 1) in progress
+    assert FALL2 + DS + (2, 1, 0) in progress
+    methods = {row[:7]: row[10] for row in summary}
+    assert methods[FALL1 + CS + ('O1',)] is None
+    assert sorted(methods[FALL2 + DS + ('O1',)].split(', ')) == ['Exam', 'Homework']
+
+
+def test_write_evaluations_empty_batch(cursor):
+    before = derived(cursor)
+    write_evaluations(cursor, [], [])
+    assert derived(cursor) == before
@@ -0,0 +1,57 @@
+from json_api import decode_cursor, encode_cursor, keyset, order_by
+
+import pytest
+
+KEYS = ('course_code', 'section_num', 'obj_code')
+
+
+@pytest.fixture
+def cursor(conn):
+    # Sections with their objectives, as a LEFT JOIN lists them: a section without any has one
+    # row with a NULL objective
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE Listing (course_code TEXT, section_num INT, obj_code TEXT)")
+    cursor.executemany("INSERT INTO Listing VALUES (%s, %s, %s)", [
+        ('CS1', 1, 'O1'), ('CS1', 1, 'O2'), ('CS1', 2, None), ('CS1', 3, 'O1'),
+        ('CS2', 1, None), ('CS2', 2, 'O1'), ('CS2', 2, 'O3'), ('CS3', 1, None),
+    ])
+    return cursor
+
+
+def pages(cursor, descending, limit):
+    # Every page, following the cursor of each page's last row as the JSON API does
+    seen, after = [], None
+    while True:
+        where, params = keyset(KEYS, decode_cursor(after), descending) if after else ('1 = 1', [])
+        cursor.execute(f"SELECT * FROM Listing WHERE {where}{order_by(KEYS, descending)} LIMIT %s",
+                       params + [limit])
+        rows = cursor.fetchall()
+        seen.extend(rows)
+        if len(rows) < limit:
+            return seen
+        after = encode_cursor(rows[-1])
+
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_keyset_pages_across_null_keys(cursor, descending, limit):
+    cursor.execute(f"SELECT * FROM Listing{order_by(KEYS, descending)}")
+    expected = cursor.fetchall()
+    assert pages(cursor, descending, limit) == expected
+
+
+def test_keyset_stops_at_null():
+    assert keyset(KEYS, ['CS1', 2, None], descending=False) == \
+        ("(course_code > %s OR (course_code = %s AND (section_num > %s)))", ['CS1', 'CS1', 2])
+
+
+def test_keyset_rejects_other_listing():
+    with pytest.raises(ValueError):
+        keyset(KEYS, ['CS1', 2])
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(('CS1', 2, None))) == ['CS1', 2, None]
+    assert decode_cursor('') is None
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
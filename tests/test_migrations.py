@@ -0,0 +1,48 @@
+from db_backend import connect_factory
+from migrations import MIGRATIONS, applied_versions, migrate
+
+import pytest
+
+from conftest import sqlite_config
+
+
+@pytest.fixture
+def fresh():
+    # The base schema only, as an SQLite database is before its first migration
+    conn = connect_factory(sqlite_config(), migrate=False)()
+    yield conn
+    conn.close()
+
+
+def schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name")
+    return cursor.fetchall()
+
+
+def test_migrate_applies_every_version_once(fresh):
+    applied = migrate(fresh, 'sqlite')
+    assert [version for version, _, _ in applied] == [version for version, _, _ in MIGRATIONS]
+    assert applied_versions(fresh.cursor(), 'sqlite') == {version for version, _, _ in MIGRATIONS}
+    before = schema(fresh)
+    assert migrate(fresh, 'sqlite') == []
+    assert migrate(fresh, 'sqlite', dry_run=True) == []
+    assert schema(fresh) == before
+
+
+def test_migrate_in_steps_matches_one_run(fresh, conn):
+    migrate(fresh, 'sqlite', target=3)
+    assert applied_versions(fresh.cursor(), 'sqlite') == {1, 2, 3}
+    migrate(fresh, 'sqlite')
+    assert schema(fresh) == schema(conn)
+
+
+def test_migrate_rerun_without_versions(conn):
+    # As after a crash between a step's DDL and its Schema_Version row: every step checks the
+    # catalog first, so running them all again changes nothing
+    before = schema(conn)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Schema_Version")
+    conn.commit()
+    assert len(migrate(conn, 'sqlite')) == len(MIGRATIONS)
+    assert schema(conn) == before